@@ -6,7 +6,15 @@ a = Analysis(
     pathex=[],
     binaries=[],
     datas=[('src', 'app/src'), ('web', 'app/web'), ('templates', 'app/templates'), ('src/tesseract', 'app/src/tesseract')],
-    hiddenimports=[],
+    # Registry modules are imported lazily, so PyInstaller can't see them
+    hiddenimports=[
+        'emailConfirmation', 'emailContract', 'emailFollowup', 'emailReply',
+        'emailReview', 'scheduler', 'new_matter', 'close_matter', 'bill_matter',
+        'wordContract', 'wordReceipt', 'time_entries', 'batch_documents',
+        'availability',
+        # OCR backend, also imported lazily (ocr_engine.TesserocrBackend)
+        'tesserocr',
+    ],
     hookspath=[],
     hooksconfig={},
     runtime_hooks=[],
@@ -9,5 +9,21 @@ pyinstaller ^
   --add-data "web;app/web" ^
   --add-data "templates;app/templates" ^
   --add-data "src/tesseract;app/src/tesseract" ^
+  --paths src ^
+  --hidden-import emailConfirmation ^
+  --hidden-import emailContract ^
+  --hidden-import emailFollowup ^
+  --hidden-import emailReply ^
+  --hidden-import emailReview ^
+  --hidden-import scheduler ^
+  --hidden-import new_matter ^
+  --hidden-import close_matter ^
+  --hidden-import bill_matter ^
+  --hidden-import wordContract ^
+  --hidden-import wordReceipt ^
+  --hidden-import time_entries ^
+  --hidden-import batch_documents ^
+  --hidden-import availability ^
+  --hidden-import tesserocr ^
   src/main.py
 pause
\ No newline at end of file
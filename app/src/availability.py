@@ -0,0 +1,333 @@
+from config import *
+from calendar_cache import get_calendar_cache, CalendarEvent
+from lawyer_directory import get_lawyer_directory
+from datetime import datetime, date, time as dtime, timedelta
+import heapq
+import random
+import time
+
+DEFAULT_WORKING_HOURS = {"start": "9:00", "end": "17:00"}
+DEFAULT_DURATION_MINUTES = 60
+DEFAULT_STEP_MINUTES = 30
+WEEKDAYS = ("Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday")
+
+class Slot:
+    """ One bookable appointment slot. """
+    __slots__ = ("lawyer_id", "start", "end", "remaining")
+
+    def __init__(self, lawyer_id, start, end, remaining):
+        self.lawyer_id = lawyer_id
+        self.start = start
+        self.end = end
+        self.remaining = remaining   # appointments left that day under maxDailyAppointments
+
+    def to_dict(self):
+        return {
+            "lawyerId": self.lawyer_id,
+            "date": self.start.strftime("%Y-%m-%d"),
+            "time": self.start.strftime("%H:%M"),
+            "start": self.start.isoformat(timespec="minutes"),
+            "end": self.end.isoformat(timespec="minutes"),
+            "remaining": self.remaining,
+        }
+
+    def __repr__(self):
+        return f"Slot({self.lawyer_id}, {self.start:%Y-%m-%d %H:%M}-{self.end:%H:%M})"
+
+def parse_clock(value):
+    """ "9:00" -> time(9, 0) """
+    hours, minutes = value.split(":")
+    return dtime(int(hours), int(minutes))
+
+def working_days(start_date, end_date):
+    """ Weekdays from start_date to end_date, inclusive. """
+    day = start_date
+    while day <= end_date:
+        if day.weekday() < 5:
+            yield day
+        day += timedelta(days=1)
+
+def _round_up(moment, day_start, step):
+    """ Next step boundary (counted from day_start) at or after moment. """
+    offset = moment - day_start
+    remainder = offset % step
+    return moment if not remainder else moment + (step - remainder)
+
+def day_slots(day, events, working_hours, break_minutes, max_daily, duration, step, not_before=None):
+    """
+    Free slots for one lawyer on one day, in a single sweep over the day's
+    events (sorted by start). Each event blocks its own time plus the break
+    buffer on both sides; a day that already holds max_daily appointments has
+    no slots at all.
+    """
+    if max_daily and len(events) >= max_daily:
+        return []
+    remaining = (max_daily - len(events)) if max_daily else None
+
+    day_start = datetime.combine(day, parse_clock(working_hours["start"]))
+    day_end = datetime.combine(day, parse_clock(working_hours["end"]))
+    buffer = timedelta(minutes=break_minutes)
+
+    cursor = day_start
+    if not_before and not_before > cursor:
+        cursor = _round_up(not_before, day_start, step)
+
+    free = []
+    for event in events:
+        busy_start = event.start - buffer
+        busy_end = event.end + buffer
+        if busy_end <= cursor:
+            continue
+        while cursor + duration <= min(busy_start, day_end):
+            free.append((cursor, cursor + duration))
+            cursor += step
+        if busy_end > cursor:
+            cursor = _round_up(busy_end, day_start, step)
+        if cursor >= day_end:
+            break
+    while cursor + duration <= day_end:
+        free.append((cursor, cursor + duration))
+        cursor += step
+    return [(s, e, remaining) for s, e in free]
+
+def find_free_slots(lawyers, events_by_lawyer, start_date, end_date,
+                    duration_minutes=DEFAULT_DURATION_MINUTES, step_minutes=DEFAULT_STEP_MINUTES,
+                    now=None, limit=None, location=None):
+    """
+    Computes every open slot for the given lawyers between two dates.
+
+    lawyers are lawyers.json records; events_by_lawyer maps lawyer id to that
+    lawyer's events over the range, sorted by start. Weekends, times before
+    now and days the lawyer is unavailable at location are skipped.
+    Returns {lawyer id: [Slot]} in time order.
+    """
+    duration = timedelta(minutes=duration_minutes)
+    step = timedelta(minutes=step_minutes)
+    result = {}
+    for lawyer in lawyers:
+        lawyer_id = lawyer["id"]
+        hours = lawyer.get("workingHours") or DEFAULT_WORKING_HOURS
+        break_minutes = lawyer.get("breakMinutes", 0)
+        max_daily = lawyer.get("maxDailyAppointments")
+
+        # Bucket the (sorted) events by day once, instead of filtering per day
+        by_day = {}
+        for event in events_by_lawyer.get(lawyer_id, ()):
+            by_day.setdefault(event.start.date(), []).append(event)
+
+        slots = []
+        for day in working_days(start_date, end_date):
+            if now and day < now.date():
+                continue
+            if location and not available_at(lawyer, location, day):
+                continue
+            not_before = now if now and day == now.date() else None
+            for s, e, remaining in day_slots(day, by_day.get(day, []), hours, break_minutes,
+                                             max_daily, duration, step, not_before):
+                slots.append(Slot(lawyer_id, s, e, remaining))
+                if limit and len(slots) >= limit:
+                    break
+            if limit and len(slots) >= limit:
+                break
+        result[lawyer_id] = slots
+    return result
+
+def available_at(lawyer, location, day):
+    """ Applies the lawyer's "unavailability" rules ({location: [weekday names]}). """
+    blocked = (lawyer.get("unavailability") or {}).get(location.lower(), ())
+    return WEEKDAYS[day.weekday()] not in blocked
+
+def lawyer_events(lawyers, start, end, cache=None):
+    """ {lawyer id: events} from the calendar cache, in one cache query. """
+    cache = cache or get_calendar_cache()
+    by_name = cache.events_between([lawyer["name"] for lawyer in lawyers], start, end)
+    return {lawyer["id"]: by_name.get(lawyer["name"], []) for lawyer in lawyers}
+
+def get_availability(lawyer_ids, start_date, end_date, duration_minutes=DEFAULT_DURATION_MINUTES,
+                     step_minutes=DEFAULT_STEP_MINUTES, cache=None, now=None, limit=None):
+    """ Free slots for lawyers by id, with their calendars taken from the cache. """
+    directory = get_lawyer_directory()
+    lawyers = [directory.get(lawyer_id) for lawyer_id in lawyer_ids]
+    unknown = [lawyer_id for lawyer_id, lawyer in zip(lawyer_ids, lawyers) if lawyer is None]
+    if unknown:
+        raise ValueError(f"Unknown lawyer(s): {', '.join(unknown)}")
+
+    start = datetime.combine(start_date, dtime.min)
+    end = datetime.combine(end_date, dtime.max)
+    events = lawyer_events(lawyers, start, end, cache)
+    return find_free_slots(lawyers, events, start_date, end_date, duration_minutes, step_minutes,
+                           now=now or datetime.now(), limit=limit)
+
+def earliest_slots(case_type, location, start_date, end_date, duration_minutes=DEFAULT_DURATION_MINUTES,
+                   step_minutes=DEFAULT_STEP_MINUTES, limit=10, cache=None, now=None):
+    """
+    Earliest feasible slots across every lawyer whose specialties include
+    case_type, ranked by start time, then by the lawyer with the most room
+    left that day. Uses one calendar cache query for all lawyers.
+    """
+    lawyers = get_lawyer_directory().by_specialty(case_type)
+    if not lawyers:
+        raise ValueError(f"No lawyer handles case type: {case_type}")
+
+    start = datetime.combine(start_date, dtime.min)
+    end = datetime.combine(end_date, dtime.max)
+    events = lawyer_events(lawyers, start, end, cache)
+    # No lawyer can place more than `limit` slots in the overall top `limit`
+    per_lawyer = find_free_slots(lawyers, events, start_date, end_date, duration_minutes, step_minutes,
+                                 now=now or datetime.now(), limit=limit, location=location)
+
+    def rank(slot):
+        return (slot.start, -(slot.remaining or 0), slot.lawyer_id)
+
+    merged = heapq.merge(*[sorted(slots, key=rank) for slots in per_lawyer.values()], key=rank)
+    return [slot for _, slot in zip(range(limit), merged)]
+
+def parse_date(value):
+    if isinstance(value, date):
+        return value
+    return datetime.strptime(value[:10], "%Y-%m-%d").date()
+
+def process_availability(data):
+    """
+    Job entry point: data has lawyerIds, startDate, endDate (YYYY-MM-DD) and
+    optionally durationMinutes, stepMinutes and limit (slots per lawyer).
+    """
+    try:
+        lawyer_ids = data.get("lawyerIds") or []
+        if isinstance(lawyer_ids, str):
+            lawyer_ids = [lawyer_ids]
+        if not lawyer_ids:
+            return {"error": "No lawyer selected."}
+        start_date = parse_date(data.get("startDate") or date.today())
+        end_date = parse_date(data.get("endDate") or start_date + timedelta(days=14))
+
+        started = time.perf_counter()
+        slots = get_availability(
+            lawyer_ids, start_date, end_date,
+            duration_minutes=int(data.get("durationMinutes", DEFAULT_DURATION_MINUTES)),
+            step_minutes=int(data.get("stepMinutes", DEFAULT_STEP_MINUTES)),
+            limit=data.get("limit"),
+        )
+        return {
+            "status": "success",
+            "slots": {lawyer_id: [slot.to_dict() for slot in found] for lawyer_id, found in slots.items()},
+            "elapsed_ms": round((time.perf_counter() - started) * 1000, 1),
+        }
+    except Exception as e:
+        log(f"Error finding availability: {str(e)}")
+        return {"error": str(e)}
+
+def process_earliest_availability(data):
+    """
+    Job entry point: data has caseType, location, startDate, endDate and
+    optionally durationMinutes and limit.
+    """
+    try:
+        case_type = data.get("caseType", "")
+        if not case_type:
+            return {"error": "Case type is required."}
+        start_date = parse_date(data.get("startDate") or date.today())
+        end_date = parse_date(data.get("endDate") or start_date + timedelta(days=14))
+
+        started = time.perf_counter()
+        slots = earliest_slots(
+            case_type, data.get("location", ""), start_date, end_date,
+            duration_minutes=int(data.get("durationMinutes", DEFAULT_DURATION_MINUTES)),
+            limit=int(data.get("limit", 10)),
+        )
+        directory = get_lawyer_directory()
+        ranked = []
+        for rank, slot in enumerate(slots, start=1):
+            entry = slot.to_dict()
+            entry["rank"] = rank
+            entry["lawyerName"] = (directory.get(slot.lawyer_id) or {}).get("name", "")
+            ranked.append(entry)
+        return {
+            "status": "success",
+            "slots": ranked,
+            "elapsed_ms": round((time.perf_counter() - started) * 1000, 1),
+        }
+    except Exception as e:
+        log(f"Error finding earliest availability: {str(e)}")
+        return {"error": str(e)}
+
+
+# ----------------------------
+# Benchmark
+# ----------------------------
+
+def synthetic_calendar(lawyers, start_date, days, per_day=4, seed=7):
+    """ Random appointments filed under each lawyer's name, like the scheduler creates. """
+    rng = random.Random(seed)
+    events = []
+    for offset in range(days):
+        day = start_date + timedelta(days=offset)
+        for lawyer in lawyers:
+            for n in range(rng.randint(0, per_day)):
+                start = datetime.combine(day, dtime(rng.randint(8, 17), rng.choice((0, 15, 30, 45))))
+                end = start + timedelta(minutes=rng.choice((30, 60, 90)))
+                events.append(CalendarEvent(f"{lawyer['id']}-{offset}-{n}", "Client", start, end, (lawyer["name"],)))
+            # Some shared events (meetings, holidays) with several categories
+            if rng.random() < 0.1:
+                start = datetime.combine(day, dtime(12))
+                events.append(CalendarEvent(f"team-{offset}", "Team", start, start + timedelta(hours=1),
+                                            tuple(l["name"] for l in lawyers)))
+    return events
+
+def naive_free_slots(lawyer, events, start_date, end_date, duration, step):
+    """ Reference: test every candidate slot against every event, like one-at-a-time checks. """
+    hours = lawyer.get("workingHours") or DEFAULT_WORKING_HOURS
+    buffer = timedelta(minutes=lawyer.get("breakMinutes", 0))
+    slots = []
+    for day in working_days(start_date, end_date):
+        todays = [e for e in events if e.start.date() == day]
+        if lawyer.get("maxDailyAppointments") and len(todays) >= lawyer["maxDailyAppointments"]:
+            continue
+        cursor = datetime.combine(day, parse_clock(hours["start"]))
+        day_end = datetime.combine(day, parse_clock(hours["end"]))
+        while cursor + duration <= day_end:
+            if all(cursor + duration <= e.start - buffer or cursor >= e.end + buffer for e in todays):
+                slots.append((cursor, cursor + duration))
+            cursor += step
+    return slots
+
+def benchmark(days=365, per_day=6):
+    from calendar_cache import CalendarCache
+    lawyers = get_lawyer_directory().all()
+    start_date = date(2025, 1, 6)
+    end_date = start_date + timedelta(days=days - 1)
+    events = synthetic_calendar(lawyers, start_date, days, per_day)
+
+    cache = CalendarCache(loader=None, subscribe=None, max_age=None)
+    window_start = datetime.combine(start_date, dtime.min)
+    window_end = datetime.combine(end_date, dtime.max)
+    cache.load_events(events, window_start, window_end)
+
+    duration = timedelta(minutes=60)
+    step = timedelta(minutes=30)
+
+    started = time.perf_counter()
+    by_lawyer = lawyer_events(lawyers, window_start, window_end, cache)
+    found = find_free_slots(lawyers, by_lawyer, start_date, end_date, 60, 30)
+    sweep_ms = (time.perf_counter() - started) * 1000
+
+    started = time.perf_counter()
+    expected = {l["id"]: naive_free_slots(l, by_lawyer[l["id"]], start_date, end_date, duration, step)
+                for l in lawyers}
+    naive_ms = (time.perf_counter() - started) * 1000
+
+    for lawyer in lawyers:
+        got = [(s.start, s.end) for s in found[lawyer["id"]]]
+        assert got == expected[lawyer["id"]], f"Slot mismatch for {lawyer['id']}"
+
+    total = sum(len(v) for v in found.values())
+    print(f"{len(events)} events, {len(lawyers)} lawyers, {days} days: {total} free slots")
+    print(f"Sweep:  {sweep_ms:.1f} ms (including cache lookup)")
+    print(f"Naive:  {naive_ms:.1f} ms")
+
+    started = time.perf_counter()
+    best = earliest_slots("common", "office", start_date, end_date, limit=5, cache=cache, now=window_start)
+    print(f"Earliest 'common' office slots in {(time.perf_counter() - started) * 1000:.1f} ms: {best}")
+
+if __name__ == "__main__":
+    benchmark()
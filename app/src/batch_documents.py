@@ -0,0 +1,240 @@
+from config import *
+from docx_render import render_docx
+from word_pool import get_word_pool
+from lawyer_directory import get_lawyer_directory
+from job_engine import JobCancelled, check_cancelled, report_progress
+import csv
+import re
+import json
+import shutil
+import tempfile
+import time
+from datetime import datetime
+
+DOCUMENT_TYPES = ("receipt", "contract")
+
+# Manifest columns, besides the usual form fields
+# (clientName, clientEmail, depositAmount, paymentMethod, receiptReason, contractTitle)
+#   type         receipt or contract, when the batch mixes both
+#   language     English / Français (or en / fr)
+#   lawyerId     looked up in the lawyer directory for receipts
+#   date         YYYY-MM-DD printed on the document; defaults to today
+#   fileName     overrides the generated PDF name (a plain file name, no folders)
+
+def load_manifest(path):
+    """ Reads batch records from a .csv (one row per document) or .json file. """
+    if path.lower().endswith(".json"):
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        records = data.get("records", []) if isinstance(data, dict) else data
+    else:
+        # utf-8-sig drops the BOM Excel puts in front of CSV exports
+        with open(path, "r", encoding="utf-8-sig", newline="") as f:
+            records = list(csv.DictReader(f))
+    return [{k.strip(): (v.strip() if isinstance(v, str) else v) for k, v in r.items() if k}
+            for r in records]
+
+def parse_record_date(value):
+    if not value:
+        return datetime.today()
+    return datetime.strptime(value[:10], "%Y-%m-%d")
+
+def plan_document(record, default_type=None, templates_dir=TEMPLATES_DIR):
+    """
+    Turns one manifest record into a render plan: which template, which
+    replacements and which PDF name. Raises ValueError for unusable records.
+    """
+    # The Office modules pull in win32 / tkinter; only load them when planning
+    from office_utils import template_language
+    from wordContract import build_contract_replacements, contract_pdf_name
+    from wordReceipt import build_receipt_replacements, receipt_pdf_name
+
+    kind = (record.get("type") or default_type or "").strip().lower()
+    if kind not in DOCUMENT_TYPES:
+        raise ValueError(f"Unknown document type: {kind or '(none)'}")
+    if not record.get("clientName"):
+        raise ValueError("Missing clientName")
+
+    lang = template_language(record.get("language") or record.get("clientLanguage") or "English")
+    date = parse_record_date(record.get("date"))
+    hyperlinks = None
+
+    if kind == "receipt":
+        lawyer_id = record.get("lawyerId", "")
+        lawyer = get_lawyer_directory().get(lawyer_id) or {"id": lawyer_id, "name": record.get("lawyerName", "")}
+        replacements = build_receipt_replacements(record, lawyer, lang, date)
+        pdf_name = receipt_pdf_name(record["clientName"], date)
+    else:
+        replacements, hyperlinks = build_contract_replacements(record, lang, date)
+        pdf_name = contract_pdf_name(record["clientName"], lang, date)
+
+    if record.get("fileName"):
+        pdf_name = record["fileName"]
+        # A manifest must not write outside the output folder
+        if re.search(r'[\\/:]', pdf_name) or pdf_name.strip(". ") == "":
+            raise ValueError(f"fileName must be a plain file name: {pdf_name}")
+        if not pdf_name.lower().endswith(".pdf"):
+            pdf_name += ".pdf"
+
+    return {
+        "type": kind,
+        "template": os.path.join(templates_dir, lang, "Contract.docx" if kind == "contract" else "Receipt.docx"),
+        "replacements": replacements,
+        "hyperlinks": hyperlinks,
+        "pdf_name": pdf_name,
+    }
+
+def unique_name(name, taken):
+    """ Adds _2, _3... when two records would produce the same file name. """
+    stem, ext = os.path.splitext(name)
+    candidate = name
+    n = 2
+    while candidate.lower() in taken:
+        candidate = f"{stem}_{n}{ext}"
+        n += 1
+    taken.add(candidate.lower())
+    return candidate
+
+def render_document(plan, docx_path):
+    """
+    Fills the plan's template offline. Unlike prepare_docx there is no Word
+    pass to fill what the offline fill misses, so a template that lacks a
+    placeholder fails its row rather than give a document with {fields}
+    left in it.
+    """
+    report = render_docx(plan["template"], docx_path, plan["replacements"], plan["hyperlinks"])
+    if report["missing"]:
+        raise ValueError(f"Placeholders not found in {os.path.basename(plan['template'])}: "
+                         + ", ".join(report["missing"]))
+
+def export_pdf(docx_path, pdf_path):
+    """ Exports a filled .docx through the warm Word pool. """
+    with get_word_pool().document(docx_path) as document:
+        document.export_pdf(pdf_path)
+
+def write_summary(output_dir, results, started):
+    """ Writes the batch report next to the PDFs and returns its path. """
+    path = os.path.join(output_dir, f"batch_summary_{started:%Y%m%d-%H%M%S}.csv")
+    fields = ["row", "type", "clientName", "status", "file", "error", "ms"]
+    with open(path, "w", encoding="utf-8-sig", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=fields, extrasaction="ignore")
+        writer.writeheader()
+        writer.writerows(results)
+    return path
+
+def run_batch(records, output_dir, document_type=None, export=export_pdf, pdf=True,
+              templates_dir=TEMPLATES_DIR):
+    """
+    Renders each record offline and exports it through the same warm Word
+    session, so no document pays for Word startup or a save dialog. With pdf=False the filled .docx files are
+    written to output_dir instead and Word is never started.
+    Returns the summary; a failed record (bad manifest row, missing
+    template or placeholder, export error) never stops the batch.
+    """
+    from office_utils import sanitize_pdf_path
+    started = datetime.now()
+    start = time.perf_counter()
+    os.makedirs(output_dir, exist_ok=True)
+    work_dir = tempfile.mkdtemp(prefix="adminhub_batch_")
+    taken = set()
+    results = []
+
+    try:
+        for index, record in enumerate(records):
+            check_cancelled()
+            report_progress(index / max(len(records), 1), f"Document {index + 1} of {len(records)}")
+
+            result = {"row": index + 1, "clientName": record.get("clientName", ""), "status": "success"}
+            document_start = time.perf_counter()
+            try:
+                plan = plan_document(record, document_type, templates_dir)
+                result["type"] = plan["type"]
+                if not os.path.exists(plan["template"]):
+                    raise FileNotFoundError(f"Template not found: {plan['template']}")
+
+                pdf_name = unique_name(sanitize_pdf_path(os.path.join(output_dir, plan["pdf_name"])), taken)
+                # Filled in the work folder, so a failed row leaves nothing in output_dir
+                docx_path = os.path.join(work_dir, f"{index + 1:04d}.docx")
+                render_document(plan, docx_path)
+                if pdf:
+                    export(docx_path, pdf_name)
+                    result["file"] = pdf_name
+                else:
+                    result["file"] = os.path.splitext(pdf_name)[0] + ".docx"
+                    shutil.move(docx_path, result["file"])
+            except JobCancelled:
+                raise
+            except Exception as e:
+                log(f"Batch row {index + 1} failed: {e}")
+                result["status"] = "error"
+                result["error"] = str(e)
+            result["ms"] = round((time.perf_counter() - document_start) * 1000, 1)
+            results.append(result)
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    failed = sum(1 for r in results if r["status"] != "success")
+    summary = {
+        "status": "success" if not failed else ("partial" if failed < len(results) else "error"),
+        "message": f"{len(results) - failed} of {len(records)} documents created.",
+        "total": len(records),
+        "succeeded": len(results) - failed,
+        "failed": failed,
+        "elapsed_ms": round((time.perf_counter() - start) * 1000, 1),
+        "output_dir": output_dir,
+        "results": results,
+    }
+    summary["report"] = write_summary(output_dir, results, started)
+    return summary
+
+def process_batch_documents(data):
+    """
+    Batch entry point. Expects manifestPath (or records), outputDir and
+    optionally documentType ("receipt"/"contract") and pdf (default true).
+    """
+    try:
+        records = data.get("records")
+        if records is None:
+            manifest = data.get("manifestPath", "")
+            if not manifest or not os.path.exists(manifest):
+                return {"error": f"Manifest not found: {manifest}"}
+            records = load_manifest(manifest)
+        if not records:
+            return {"error": "The manifest has no records."}
+
+        output_dir = data.get("outputDir", "")
+        if not output_dir:
+            return {"error": "Output directory not provided."}
+
+        summary = run_batch(records, output_dir, data.get("documentType"), pdf=data.get("pdf", True))
+        log(f"Batch documents: {summary['message']} Report: {summary['report']}")
+        if summary["status"] == "error":
+            summary["error"] = "No document could be created, see the report."
+        return summary
+    except JobCancelled:
+        log("Batch documents cancelled")
+        raise
+    except Exception as e:
+        log(f"Error in batch documents: {str(e)}")
+        return {"error": str(e)}
+
+def benchmark(records=50):
+    """
+    Runs a contract batch offline (pdf=False) on a generated template, to
+    show the per-document cost once Word startup and dialogs are gone.
+    """
+    from docx_render import make_sample_docx
+    folder = tempfile.mkdtemp(prefix="batch_bench_")
+    for lang in ("en", "fr"):
+        os.makedirs(os.path.join(folder, lang))
+        make_sample_docx(os.path.join(folder, lang, "Contract.docx"), paragraphs=100)
+
+    manifest = [{"type": "contract", "clientName": f"Client {i}", "clientEmail": f"client{i}@example.com",
+                 "depositAmount": "1500", "contractTitle": "divorce", "date": "2025-07-31"}
+                for i in range(records)]
+    summary = run_batch(manifest, os.path.join(folder, "out"), pdf=False, templates_dir=folder)
+    print(f"{summary['message']} in {summary['elapsed_ms']:.0f} ms "
+          f"({summary['elapsed_ms'] / records:.1f} ms/document), report: {summary['report']}")
+
+if __name__ == "__main__":
+    benchmark()
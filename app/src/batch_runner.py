@@ -0,0 +1,276 @@
+from config import *
+from job_engine import JobCancelled, check_cancelled, report_progress
+import csv
+import json
+import time
+from datetime import datetime
+
+# ----------------------------
+# Matter batches for PCLaw
+# ----------------------------
+# Runs one action over a list of matters back to back in the same PCLaw
+# session. Every outcome is appended to a CSV log as soon as it is known,
+# and a checkpoint file next to it records how far the batch got, so a
+# crash, a PCLaw hang or a cancel can be resumed where it stopped.
+# Batches can also keep a ledger: one JSON object per line with the full
+# outcome (nested timings included) for scripts and month-end reports.
+
+MAX_CONSECUTIVE_ERRORS = 3   # PCLaw is probably stuck; stop and leave the checkpoint
+
+def load_matter_list(path):
+    """
+    Matter numbers from a .csv (matterId/matter column, else the first
+    column), a .json list (of numbers or {"matterId": ...}) or a text file
+    with one matter per line. Blank entries and duplicates are dropped.
+    """
+    if path.lower().endswith(".json"):
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        if isinstance(data, dict):
+            data = data.get("matters", [])
+        raw = [item.get("matterId", "") if isinstance(item, dict) else item for item in data]
+    elif path.lower().endswith(".csv"):
+        with open(path, "r", encoding="utf-8-sig", newline="") as f:
+            rows = list(csv.reader(f))
+        header = [h.strip().lower() for h in rows[0]] if rows else []
+        column = next((header.index(name) for name in ("matterid", "matter", "matter number") if name in header), None)
+        if column is None:
+            column = 0
+        else:
+            rows = rows[1:]
+        raw = [row[column] for row in rows if len(row) > column]
+    else:
+        with open(path, "r", encoding="utf-8-sig") as f:
+            raw = f.read().splitlines()
+
+    matters = []
+    seen = set()
+    for matter in raw:
+        matter = str(matter).strip()
+        if matter and matter not in seen:
+            seen.add(matter)
+            matters.append(matter)
+    return matters
+
+class MatterBatch:
+    """
+    The CSV log and checkpoint of one batch. The checkpoint holds the full
+    matter list and the outcome of each matter handled so far; resuming
+    skips matters already marked done and retries the rest.
+    """
+    def __init__(self, kind, matters, output_dir, fields, started=None, ledger=False):
+        self.kind = kind
+        self.matters = list(matters)
+        self.fields = ["matter", "status"] + [f for f in fields if f not in ("matter", "status")] + ["error", "seconds", "time"]
+        started = started or datetime.now()
+        self.started = started.strftime("%Y-%m-%d %H:%M:%S")
+        name = f"{kind}_{started:%Y%m%d-%H%M%S}"
+        self.log_path = os.path.join(output_dir, name + ".csv")
+        self.checkpoint_path = os.path.join(output_dir, name + ".checkpoint.json")
+        self.ledger_path = os.path.join(output_dir, name + ".ledger.jsonl") if ledger else None
+        self.done = {}   # matter -> status
+
+    @classmethod
+    def resume(cls, checkpoint_path):
+        """ Reopens a batch from its checkpoint; new rows go to the same CSV. """
+        with open(checkpoint_path, "r", encoding="utf-8") as f:
+            state = json.load(f)
+        batch = cls(state["kind"], state["matters"], os.path.dirname(checkpoint_path), state["fields"])
+        batch.fields = state["fields"]
+        batch.started = state["started"]
+        batch.log_path = state["log"]
+        batch.checkpoint_path = checkpoint_path
+        batch.ledger_path = state.get("ledger")
+        batch.done = dict(state.get("done", {}))
+        return batch
+
+    def pending(self, final_statuses):
+        return [m for m in self.matters if self.done.get(m) not in final_statuses]
+
+    def record(self, row):
+        """ Appends one outcome to the CSV and updates the checkpoint. """
+        new_file = not os.path.exists(self.log_path)
+        with open(self.log_path, "a", encoding="utf-8-sig" if new_file else "utf-8", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=self.fields, extrasaction="ignore")
+            if new_file:
+                writer.writeheader()
+            writer.writerow(row)
+            f.flush()
+            os.fsync(f.fileno())
+        if self.ledger_path:
+            with open(self.ledger_path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(row, default=str) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+        self.done[row["matter"]] = row["status"]
+        self.save()
+
+    def save(self):
+        state = {
+            "kind": self.kind,
+            "started": self.started,
+            "log": self.log_path,
+            "ledger": self.ledger_path,
+            "fields": self.fields,
+            "matters": self.matters,
+            "done": self.done,
+        }
+        temp_path = self.checkpoint_path + ".tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump(state, f, indent=1)
+        os.replace(temp_path, self.checkpoint_path)
+
+def run_matter_batch(kind, matters, handler, output_dir=None, fields=(), resume_path=None,
+                     final_statuses=("closed", "billed", "skipped", "needs_review"), recover=None,
+                     max_errors=MAX_CONSECUTIVE_ERRORS, ledger=False, clock=time.perf_counter):
+    """
+    Calls handler(matter) for each matter and logs the row it returns
+    (a dict with at least "status"). A handler exception is logged as an
+    error row; recover() is then given a chance to put PCLaw back in a known
+    state before the next matter. After max_errors errors in a row the batch
+    stops with status "stopped" and can be resumed from the checkpoint.
+    Matters whose status is in final_statuses are never redone on resume.
+    With ledger=True every row is also appended to a .ledger.jsonl file.
+    """
+    if resume_path:
+        batch = MatterBatch.resume(resume_path)
+        log(f"Resuming {batch.kind} batch: {len(batch.done)} of {len(batch.matters)} already handled")
+    else:
+        os.makedirs(output_dir, exist_ok=True)
+        batch = MatterBatch(kind, matters, output_dir, fields, ledger=ledger)
+        batch.save()
+
+    todo = batch.pending(final_statuses)
+    counts = {}
+    consecutive_errors = 0
+    stopped = None
+    start = clock()
+
+    for index, matter in enumerate(todo):
+        check_cancelled()
+        report_progress(index / max(len(todo), 1), f"Matter {matter} ({index + 1} of {len(todo)})")
+
+        matter_start = clock()
+        try:
+            row = dict(handler(matter) or {})
+            row.setdefault("status", "error")
+        except JobCancelled:
+            raise
+        except Exception as e:
+            log(f"{kind} failed for matter {matter}: {e}")
+            row = {"status": "error", "error": str(e)}
+
+        row["matter"] = matter
+        row["seconds"] = round(clock() - matter_start, 1)
+        row["time"] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        batch.record(row)
+        counts[row["status"]] = counts.get(row["status"], 0) + 1
+
+        if row["status"] == "error":
+            consecutive_errors += 1
+            if consecutive_errors >= max_errors:
+                stopped = f"Stopped after {consecutive_errors} errors in a row; resume from the checkpoint."
+                log(stopped)
+                break
+            if recover:
+                try:
+                    recover()
+                except Exception as e:
+                    log(f"Recovery after matter {matter} failed: {e}")
+        else:
+            consecutive_errors = 0
+
+    remaining = len(batch.pending(final_statuses))
+    handled = sum(counts.values())
+    summary = {
+        "status": "stopped" if stopped else ("success" if not remaining else "partial"),
+        "message": stopped or f"{handled} matter(s) handled, {remaining} left to retry.",
+        "total": len(batch.matters),
+        "handled": handled,
+        "remaining": remaining,
+        "counts": counts,
+        "elapsed_s": round(clock() - start, 1),
+        "log": batch.log_path,
+        "ledger": batch.ledger_path,
+        "checkpoint": batch.checkpoint_path,
+    }
+    return summary
+
+def matter_batch_data(data):
+    """
+    Reads the batch keys shared by the PCLaw batch entry points: matters (a
+    list) or matterListPath, outputDir, and resumePath to continue a batch
+    from its checkpoint. Returns (matters, output_dir, resume_path).
+    """
+    resume_path = data.get("resumePath") or None
+    if resume_path:
+        if not os.path.exists(resume_path):
+            raise ValueError(f"Checkpoint not found: {resume_path}")
+        return [], None, resume_path
+
+    matters = data.get("matters")
+    if matters is None:
+        path = data.get("matterListPath", "")
+        if not path or not os.path.exists(path):
+            raise ValueError(f"Matter list not found: {path}")
+        matters = load_matter_list(path)
+        output_dir = data.get("outputDir") or os.path.dirname(path)
+    else:
+        matters = [str(m).strip() for m in matters if str(m).strip()]
+        output_dir = data.get("outputDir", "")
+    if not matters:
+        raise ValueError("No matters to process.")
+    if not output_dir:
+        raise ValueError("Output directory not provided.")
+    return matters, output_dir, None
+
+def read_ledger(path):
+    """ Rows of a .ledger.jsonl file; a line cut short by a crash is skipped. """
+    rows = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                rows.append(json.loads(line))
+            except ValueError:
+                continue
+    return rows
+
+def benchmark(matters=200):
+    """
+    Runs a fake close batch that crashes partway, then resumes it from the
+    checkpoint, to show nothing is redone or lost.
+    """
+    import random
+    import tempfile
+    rng = random.Random(5)
+    folder = tempfile.mkdtemp(prefix="matter_batch_")
+    numbers = [f"{2400 + i}" for i in range(matters)]
+    balances = {m: (0.0 if rng.random() < 0.8 else round(rng.uniform(1, 900), 2)) for m in numbers}
+    calls = []
+
+    def close(matter):
+        calls.append(matter)
+        if len(calls) == matters // 2:
+            raise KeyboardInterrupt   # the app died halfway
+        if rng.random() < 0.02:
+            raise RuntimeError("Close Matter dialog did not open")
+        if balances[matter]:
+            return {"status": "skipped", "trust": balances[matter]}
+        return {"status": "closed", "trust": 0.0}
+
+    try:
+        run_matter_batch("close_matters", numbers, close, folder, fields=["trust"], ledger=True)
+    except KeyboardInterrupt:
+        pass
+    checkpoint = next(os.path.join(folder, n) for n in os.listdir(folder) if n.endswith(".checkpoint.json"))
+    first_pass = len(calls)
+    summary = run_matter_batch("close_matters", None, close, resume_path=checkpoint)
+    with open(summary["log"], "r", encoding="utf-8-sig") as f:
+        rows = list(csv.DictReader(f))
+    print(f"First pass died after {first_pass} matters; resume handled {summary['handled']} more")
+    print(f"{summary['counts']}, {summary['remaining']} left to retry")
+    print(f"CSV rows: {len(rows)}, distinct matters: {len({r['matter'] for r in rows})}, log: {summary['log']}")
+    print(f"Ledger rows: {len(read_ledger(summary['ledger']))}")
+
+if __name__ == "__main__":
+    benchmark()
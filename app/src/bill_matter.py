@@ -1,5 +1,8 @@
 from pclaw import *
 from parse_json import *
+from batch_runner import run_matter_batch, matter_batch_data
+from job_engine import JobCancelled
+from ocr_engine import get_ocr_engine
 
 def process_bill_matter(data):
     """
@@ -15,7 +18,22 @@ def process_bill_matter(data):
         matter = get_matter(data)
         sleep(1)
 
-        bill_matter(app, matter)
+        result = bill_matter(app, matter)
+        if result["status"] == "needs_review":
+            return {
+                "status": "needs_review",
+                "message": f"Matter {matter} was billed but {result['reason']}; check the bill in PCLaw",
+                "matter_id": matter,
+                "reason": result["reason"],
+                "step": result["step"]
+            }
+        if result["status"] != "billed":
+            return {
+                "status": "skipped",
+                "message": f"Matter {matter} not billed ({result['reason']})",
+                "matter_id": matter,
+                "reason": result["reason"]
+            }
         
         return {
             "status": "success",
@@ -27,6 +45,72 @@ def process_bill_matter(data):
         log(f"Error billing matter: {str(e)}")
         return {"error": str(e)}
 
+# Ledger columns for billing runs; timings are kept in full in the .jsonl ledger
+BILL_FIELDS = ["reason", "step", "date", "trust", "retainer"]
+# A matter whose bill was created is never billed again on resume, even when a
+# later step failed ("needs_review": the bill is checked by hand)
+BILL_FINAL_STATUSES = ("billed", "skipped", "needs_review")
+
+def bill_matter_quietly(app, matter):
+    """
+    Bills one matter for a run: no message boxes, skip reason in the ledger.
+    A bill left half-done is backed out of here, since the run only recovers
+    after errors.
+    """
+    result = bill_matter(app, matter, notify=False)
+    if result["status"] == "needs_review":
+        try:
+            recover_bill_matter()
+        except Exception as e:
+            log(f"Recovery after matter {matter} failed: {e}")
+    return result
+
+def recover_bill_matter():
+    """
+    Backs out of whatever dialogs a failed matter left open, and drops the
+    cached PCLaw window so the next matter looks it up again.
+    """
+    get_pclaw_connection().invalidate()
+    for _ in range(3):
+        send_keys("{ESC}")
+        sleep(0.3)
+    connect_to_pclaw().set_focus()
+
+def process_batch_bill_matter(data):
+    """
+    Month-end billing run: bills a list of matters back to back in one
+    PCLaw session, without message boxes. Matters with a trust balance, an
+    unexpected Gen Rtnr or no date are skipped with the reason recorded; a
+    matter that failed after its bill was created is marked needs_review and
+    not billed again on resume.
+    Expects matters or matterListPath, outputDir, and optionally resumePath
+    to continue from a checkpoint.
+    Returns the batch summary with the CSV, ledger and checkpoint paths.
+    """
+    try:
+        matters, output_dir, resume_path = matter_batch_data(data)
+
+        app = connect_to_pclaw()
+        app.set_focus()
+        sleep(1)
+
+        ocr_before = get_ocr_engine().summary()
+        summary = run_matter_batch(
+            "bill_matters", matters, lambda matter: bill_matter_quietly(app, matter), output_dir,
+            fields=BILL_FIELDS, resume_path=resume_path, final_statuses=BILL_FINAL_STATUSES,
+            recover=recover_bill_matter, ledger=True)
+        summary["ocr"] = get_ocr_engine().usage_since(ocr_before)
+        summary["connection"] = get_pclaw_connection().summary()
+        log(f"Billing run: {summary['message']} Ledger: {summary['ledger']} OCR: {summary['ocr']}")
+        return summary
+
+    except JobCancelled:
+        log("Billing run cancelled")
+        raise
+    except Exception as e:
+        log(f"Error in billing run: {str(e)}")
+        return {"error": str(e)}
+
 def main():
     """Backward compatibility for standalone execution"""
     try:
@@ -0,0 +1,367 @@
+from config import *
+from outlook_session import get_outlook_session
+from bisect import bisect_left
+from datetime import datetime, timedelta
+import re
+import threading
+import time
+
+OL_FOLDER_CALENDAR = 9
+OL_APPOINTMENT = 26   # AppointmentItem.Class
+LOCALE_SSHORTDATE = 0x1F
+DEFAULT_SHORT_DATE = "M/d/yyyy"
+
+# ----------------------------
+# Restrict / GetTable filters
+# ----------------------------
+# Outlook parses the dates in a Jet filter with the Windows regional
+# settings, so month names ("July" vs "juillet") and a fixed M/D order both
+# break on a French Windows. Every filter goes through restriction_date():
+# numbers only, in the user's short date order, with a 24-hour time.
+
+_date_pattern = None
+
+def short_date_pattern():
+    """ strftime pattern for the Windows short date format (e.g. %d/%m/%Y). """
+    global _date_pattern
+    if _date_pattern is None:
+        windows = DEFAULT_SHORT_DATE
+        try:
+            buffer = ctypes.create_unicode_buffer(80)
+            if ctypes.windll.kernel32.GetLocaleInfoEx(None, LOCALE_SSHORTDATE, buffer, 80):
+                windows = buffer.value
+        except Exception:
+            pass   # not on Windows
+        pattern = windows.replace("'", "")
+        pattern = re.sub(r"y+", "%Y", pattern)
+        pattern = re.sub(r"M+", "%m", pattern)
+        pattern = re.sub(r"d{3,}\W*", "", pattern)   # weekday names: language dependent
+        pattern = re.sub(r"d+", "%d", pattern)
+        _date_pattern = pattern
+    return _date_pattern
+
+def restriction_date(value):
+    """ A datetime as Outlook's Restrict and GetTable filters parse it. """
+    return value.strftime(f"{short_date_pattern()} %H:%M")
+
+def window_filter(start, end):
+    """ Jet filter for items overlapping [start, end]. """
+    return f"[Start] <= '{restriction_date(end)}' AND [End] >= '{restriction_date(start)}'"
+
+def to_naive(value):
+    """
+    pywin32 hands back Outlook times as local wall-clock times tagged with a
+    UTC tzinfo. Dropping the tzinfo gives the local time, comparable with
+    the naive datetimes built from the form.
+    """
+    if value is None:
+        return None
+    if getattr(value, "tzinfo", None) is not None:
+        value = value.replace(tzinfo=None)
+    return datetime(value.year, value.month, value.day, value.hour, value.minute, value.second)
+
+def split_categories(categories):
+    """ Outlook stores categories as one "A, B" string. """
+    if not categories:
+        return ()
+    return tuple(c.strip() for c in categories.replace(";", ",").split(",") if c.strip())
+
+def category_key(category):
+    """ How categories are compared: Outlook matches them case-insensitively. """
+    return category.strip().lower()
+
+class CalendarEvent:
+    """ Plain copy of the appointment fields the scheduler needs; no COM references. """
+    __slots__ = ("entry_id", "subject", "start", "end", "categories", "all_day")
+
+    def __init__(self, entry_id, subject, start, end, categories=(), all_day=False):
+        self.entry_id = entry_id
+        self.subject = subject
+        self.start = start
+        self.end = end
+        self.categories = categories
+        self.all_day = all_day
+
+    @classmethod
+    def from_item(cls, item):
+        """ Reads an AppointmentItem once. Runs on the Outlook session thread. """
+        return cls(
+            entry_id=item.EntryID,
+            subject=item.Subject or "",
+            start=to_naive(item.Start),
+            end=to_naive(item.End),
+            categories=split_categories(item.Categories),
+            all_day=bool(item.AllDayEvent),
+        )
+
+    def __repr__(self):
+        return f"CalendarEvent({self.subject!r}, {self.start:%Y-%m-%d %H:%M}-{self.end:%H:%M}, {self.categories})"
+
+class IntervalIndex:
+    """
+    Events of one category sorted by start. Overlap queries bisect on start,
+    going back by the longest duration seen so any event still running at
+    the query start is found.
+    """
+    __slots__ = ("_starts", "_events", "_max_duration")
+
+    def __init__(self):
+        self._starts = []
+        self._events = []
+        self._max_duration = timedelta(0)
+
+    def __len__(self):
+        return len(self._events)
+
+    def add(self, event):
+        position = bisect_left(self._starts, event.start)
+        # Keep ties in insertion order, like insort_right would
+        while position < len(self._starts) and self._starts[position] == event.start:
+            position += 1
+        self._starts.insert(position, event.start)
+        self._events.insert(position, event)
+        self._max_duration = max(self._max_duration, event.end - event.start)
+
+    def remove(self, event):
+        position = bisect_left(self._starts, event.start)
+        while position < len(self._events) and self._starts[position] == event.start:
+            if self._events[position] is event:
+                del self._starts[position]
+                del self._events[position]
+                return True
+            position += 1
+        return False
+
+    def overlapping(self, start, end):
+        """ Events with event.start < end and event.end > start, in start order. """
+        low = bisect_left(self._starts, start - self._max_duration)
+        high = bisect_left(self._starts, end)
+        return [e for e in self._events[low:high] if e.end > start]
+
+    def events(self):
+        return list(self._events)
+
+def read_calendar_items(namespace, start, end):
+    """
+    Loads the calendar between start and end as CalendarEvent records, with
+    recurring occurrences expanded. Runs on the Outlook session thread.
+    """
+    calendar = namespace.GetDefaultFolder(OL_FOLDER_CALENDAR)
+    items = calendar.Items
+    items.IncludeRecurrences = True
+    items.Sort("[Start]")
+
+    # Overlap filter (start <= window end AND end >= window start)
+    restricted = items.Restrict(window_filter(start, end))
+
+    events = []
+    for item in restricted:
+        try:
+            if item is None or getattr(item, "Class", OL_APPOINTMENT) != OL_APPOINTMENT:
+                continue
+            events.append(CalendarEvent.from_item(item))
+        except Exception as e:
+            log(f"Skipping unreadable calendar item: {e}")
+    return events
+
+def read_calendar(namespace, start, end):
+    """
+    Default cache loader: bulk Table API read, falling back to walking Items
+    if the table can't be read (e.g. an older Outlook or a limited store).
+    """
+    from calendar_table import read_calendar_table
+    try:
+        return read_calendar_table(namespace, start, end)
+    except Exception as e:
+        log(f"Calendar table read failed, reading items instead: {e}")
+        return read_calendar_items(namespace, start, end)
+
+def subscribe_item_events(items, on_add, on_change, on_remove):
+    """ Hooks Items.ItemAdd/ItemChange/ItemRemove. The returned sink must be kept alive. """
+    from win32com import client as COM
+
+    class ItemsEvents:
+        def OnItemAdd(self, item):
+            on_add(item)
+
+        def OnItemChange(self, item):
+            on_change(item)
+
+        def OnItemRemove(self):
+            on_remove()
+
+    return COM.DispatchWithEvents(items, ItemsEvents)
+
+class CalendarCache:
+    """
+    In-memory copy of a date window of the default calendar, indexed by
+    category (the scheduler files each appointment under the lawyer's name).
+
+    The window is loaded once, then kept current from Outlook's item events,
+    which are delivered on the session thread while it pumps messages.
+    ItemRemove doesn't say which item went away, and recurring series change
+    many occurrences at once, so those mark the cache stale and the next
+    query reloads the window.
+    """
+    def __init__(self, session=None, loader=read_calendar, subscribe=subscribe_item_events,
+                 days_back=1, days_ahead=CALENDAR_WINDOW_DAYS, max_age=CALENDAR_MAX_AGE_SECONDS,
+                 clock=time.monotonic):
+        self._session = session
+        self._loader = loader
+        self._subscribe = subscribe
+        self.days_back = days_back
+        self.days_ahead = days_ahead
+        self.max_age = max_age
+        self.clock = clock
+        self._lock = threading.RLock()
+        self._by_category = {}
+        self._by_entry = {}        # entry_id -> [events], occurrences share an id
+        self._window = None        # (start, end)
+        self._loaded_at = None
+        self._stale = True
+        self._sink = None
+        self._sink_namespace = None
+        self.stats = {"loads": 0, "queries": 0, "added": 0, "changed": 0, "removed": 0, "events": 0}
+
+    @property
+    def session(self):
+        return self._session or get_outlook_session()
+
+    # --- Queries ---
+
+    def overlapping(self, category, start, end):
+        """ Timed events filed under category that overlap [start, end). """
+        self.ensure_window(start, end)
+        with self._lock:
+            self.stats["queries"] += 1
+            index = self._by_category.get(category_key(category))
+            return index.overlapping(start, end) if index else []
+
+    def events_between(self, categories, start, end):
+        """ {category: [events]} for several categories in one call. """
+        self.ensure_window(start, end)
+        with self._lock:
+            self.stats["queries"] += 1
+            result = {}
+            for category in categories:
+                index = self._by_category.get(category_key(category))
+                result[category] = index.overlapping(start, end) if index else []
+            return result
+
+    def is_free(self, category, start, end, break_minutes=0):
+        """ True when nothing under category falls within the slot plus the break buffer. """
+        buffer = timedelta(minutes=break_minutes)
+        return not self.overlapping(category, start - buffer, end + buffer)
+
+    # --- Loading ---
+
+    def ensure_window(self, start, end):
+        """ Reloads when stale, too old, or when the query falls outside the window. """
+        with self._lock:
+            window = self._window
+            fresh = (not self._stale and self._loaded_at is not None
+                     and (self.max_age is None or self.clock() - self._loaded_at < self.max_age))
+            if fresh and window and window[0] <= start and end <= window[1]:
+                return
+        today = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+        window_start = min(today - timedelta(days=self.days_back), start.replace(hour=0, minute=0, second=0, microsecond=0))
+        window_end = max(today + timedelta(days=self.days_ahead), end)
+        self.refresh(window_start, window_end)
+
+    def refresh(self, start, end):
+        """ Reloads the window from Outlook and (re)subscribes to its item events. """
+        self.session.run(self._load_on_session, start, end)
+
+    def load_events(self, events, start, end):
+        """ Replaces the cached window with the given records. """
+        by_category = {}
+        by_entry = {}
+        for event in events:
+            if event.all_day or event.end is None or event.start is None:
+                continue
+            by_entry.setdefault(event.entry_id, []).append(event)
+            for category in event.categories:
+                by_category.setdefault(category_key(category), IntervalIndex()).add(event)
+        with self._lock:
+            self._by_category = by_category
+            self._by_entry = by_entry
+            self._window = (start, end)
+            self._loaded_at = self.clock()
+            self._stale = False
+            self.stats["loads"] += 1
+            self.stats["events"] = sum(len(v) for v in by_entry.values())
+
+    def invalidate(self):
+        with self._lock:
+            self._stale = True
+
+    def _load_on_session(self, outlook, namespace, start, end):
+        started = time.perf_counter()
+        events = self._loader(namespace, start, end)
+        self.load_events(events, start, end)
+        log(f"Calendar cache loaded {self.stats['events']} events "
+            f"({start:%Y-%m-%d} to {end:%Y-%m-%d}) in {(time.perf_counter() - started) * 1000:.0f} ms")
+        if self._subscribe and self._sink_namespace is not namespace:
+            # First load, or the session reconnected to a new Outlook
+            try:
+                items = namespace.GetDefaultFolder(OL_FOLDER_CALENDAR).Items
+                self._sink = self._subscribe(items, self._on_item_add, self._on_item_change, self._on_item_remove)
+                self._sink_namespace = namespace
+            except Exception as e:
+                log(f"Calendar events unavailable, falling back to periodic reloads: {e}")
+
+    # --- Outlook item events (session thread) ---
+
+    def _on_item_add(self, item):
+        self.stats["added"] += 1
+        self._apply_item(item)
+
+    def _on_item_change(self, item):
+        self.stats["changed"] += 1
+        self._apply_item(item)
+
+    def _on_item_remove(self):
+        self.stats["removed"] += 1
+        self.invalidate()
+
+    def _apply_item(self, item):
+        try:
+            if getattr(item, "Class", OL_APPOINTMENT) != OL_APPOINTMENT:
+                return
+            if getattr(item, "IsRecurring", False):
+                # A series change touches every occurrence; reload instead
+                self.invalidate()
+                return
+            event = CalendarEvent.from_item(item)
+        except Exception as e:
+            log(f"Calendar event ignored, reloading instead: {e}")
+            self.invalidate()
+            return
+
+        with self._lock:
+            self._drop_entry(event.entry_id)
+            if event.all_day or self._window is None:
+                return
+            if event.end <= self._window[0] or event.start >= self._window[1]:
+                return
+            self._by_entry[event.entry_id] = [event]
+            for category in event.categories:
+                self._by_category.setdefault(category_key(category), IntervalIndex()).add(event)
+
+    def _drop_entry(self, entry_id):
+        for old in self._by_entry.pop(entry_id, ()):
+            for category in old.categories:
+                index = self._by_category.get(category_key(category))
+                if index is not None:
+                    index.remove(old)
+
+_cache = None
+_cache_lock = threading.Lock()
+
+def get_calendar_cache():
+    """ Returns the shared CalendarCache. """
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = CalendarCache()
+        return _cache
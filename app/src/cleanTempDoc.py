@@ -1,6 +1,10 @@
 import os
 import sys
 import time
+import json
+import heapq
+import itertools
+import tempfile
 import threading
 from config import log
 
@@ -69,31 +73,233 @@ def process_clean_temp_doc(file_path, timeout_minutes=30, check_interval=30):
     log(timeout_msg)
     return {"error": timeout_msg}
 
+class TempReaper:
+    """
+    Deletes temp documents once Office lets go of them, from a single thread.
+
+    Pending files sit in a heap ordered by their next probe time. A file that
+    is still locked is probed again after a growing delay (initial_delay,
+    doubled up to max_delay) until its deadline passes. Pending paths are kept
+    in a small JSON journal so files left behind by an earlier session are
+    swept on the next start.
+
+    probe(path) -> bool says whether a file can be deleted; clock is a
+    monotonic time source and wall a time.time-like one. Both can be swapped
+    out to test without real locks or real waiting (see run_pending).
+    """
+    def __init__(self, journal_path=None, probe=None, clock=time.monotonic, wall=time.time,
+                 initial_delay=2.0, max_delay=60.0):
+        self.journal_path = journal_path or os.path.join(tempfile.gettempdir(), "adminhub_temp_journal.json")
+        self.probe = probe or is_file_unlocked
+        self.clock = clock
+        self.wall = wall
+        self.initial_delay = initial_delay
+        self.max_delay = max_delay
+        self._heap = []       # (next probe time, sequence, path)
+        self._entries = {}    # path -> {"deadline", "delay", "attempts"}
+        self._journal = {}    # path -> {"added", "deadline"} in wall-clock seconds
+        self._sequence = itertools.count()
+        self._cond = threading.Condition()
+        self._thread = None
+        self._stopping = False
+        self.stats = {"deleted": 0, "gone": 0, "expired": 0, "probes": 0}
+
+    # --- Public API ---
+
+    def add(self, path, timeout_minutes=30, delay=None):
+        """ Schedules path for deletion once it is unlocked. """
+        path = os.path.abspath(path)
+        timeout = timeout_minutes * 60
+        with self._cond:
+            self._journal[path] = {"added": self.wall(), "deadline": self.wall() + timeout}
+            self._write_journal()
+            self._schedule(path, self.clock() + timeout, self.initial_delay if delay is None else delay)
+            self._cond.notify()
+
+    def sweep(self, timeout_minutes=30):
+        """
+        Picks up files journaled by earlier sessions: deletes the ones that are
+        free now and schedules the rest again.
+        """
+        pending = self._read_journal()
+        swept = 0
+        for path in pending:
+            if not os.path.exists(path):
+                self._finish(path)
+            elif self._try_delete(path):
+                swept += 1
+                self._finish(path)
+            else:
+                self.add(path, timeout_minutes)
+        if pending:
+            log(f"Temp sweep: {swept} leftover file(s) deleted, {len(self._entries)} still pending")
+        return swept
+
+    def start(self):
+        with self._cond:
+            if self._thread is None or not self._thread.is_alive():
+                self._stopping = False
+                self._thread = threading.Thread(target=self._loop, name="TempReaper", daemon=True)
+                self._thread.start()
+
+    def stop(self, timeout=5):
+        """ Stops the thread. Pending files stay in the journal for the next start. """
+        with self._cond:
+            self._stopping = True
+            self._cond.notify()
+        if self._thread is not None:
+            self._thread.join(timeout=timeout)
+
+    def pending(self):
+        with self._cond:
+            return sorted(self._entries)
+
+    def run_pending(self):
+        """
+        Probes every file that is due now and returns the delay until the next
+        one (None when nothing is left).
+        """
+        while True:
+            with self._cond:
+                if not self._heap:
+                    return None
+                due_at, _, path = self._heap[0]
+                wait = due_at - self.clock()
+                if wait > 0:
+                    return wait
+                heapq.heappop(self._heap)
+                entry = self._entries.get(path)
+                if entry is None or entry["due_at"] != due_at:
+                    continue   # stale heap item; the path was rescheduled or finished
+            self._probe_entry(path, entry)
+
+    # --- Internals ---
+
+    def _schedule(self, path, deadline, delay):
+        entry = self._entries.get(path)
+        if entry is None:
+            entry = self._entries[path] = {"attempts": 0}
+        entry["deadline"] = deadline
+        entry["delay"] = delay
+        # Never sleep past the deadline; the last probe happens right on it
+        entry["due_at"] = min(self.clock() + delay, deadline)
+        heapq.heappush(self._heap, (entry["due_at"], next(self._sequence), path))
+
+    def _probe_entry(self, path, entry):
+        entry["attempts"] += 1
+        done = self._try_delete(path)
+        with self._cond:
+            if done:
+                self._finish(path)
+            elif self.clock() >= entry["deadline"]:
+                self.stats["expired"] += 1
+                log(f"Gave up on temp file after {entry['attempts']} probes: {path} (will retry next start)")
+                # Left in the journal on purpose, so the next startup sweep retries it
+                self._entries.pop(path, None)
+            else:
+                delay = min(entry["delay"] * 2, self.max_delay)
+                self._schedule(path, entry["deadline"], delay)
+
+    def _try_delete(self, path):
+        """ True once the file is gone, whoever deleted it. """
+        if not os.path.exists(path):
+            self.stats["gone"] += 1
+            return True
+        self.stats["probes"] += 1
+        if not self.probe(path):
+            return False
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            return True
+        except OSError:
+            return False
+        self.stats["deleted"] += 1
+        log(f"Temp file deleted: {path}")
+        return True
+
+    def _finish(self, path):
+        with self._cond:
+            self._entries.pop(path, None)
+            if self._journal.pop(path, None) is not None:
+                self._write_journal()
+
+    def _loop(self):
+        while True:
+            try:
+                wait = self.run_pending()
+            except Exception as e:
+                log(f"Temp reaper error: {e}")
+                wait = self.initial_delay
+            with self._cond:
+                if self._stopping:
+                    return
+                if not self._heap or self._heap[0][0] - self.clock() > 0:
+                    self._cond.wait(timeout=wait)
+                if self._stopping:
+                    return
+
+    def _read_journal(self):
+        try:
+            with open(self.journal_path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            data = {}
+        except (OSError, ValueError) as e:
+            log(f"Ignoring unreadable temp journal {self.journal_path}: {e}")
+            data = {}
+        with self._cond:
+            for path, info in data.items():
+                self._journal.setdefault(path, info)
+        return list(data)
+
+    def _write_journal(self):
+        # Called with the lock held; write to a side file and swap it in
+        temp_path = self.journal_path + ".tmp"
+        try:
+            with open(temp_path, "w", encoding="utf-8") as f:
+                json.dump(self._journal, f, indent=1)
+            os.replace(temp_path, self.journal_path)
+        except OSError as e:
+            log(f"Could not write temp journal: {e}")
+
+_reaper = None
+_reaper_lock = threading.Lock()
+
+def get_temp_reaper():
+    """ Returns the shared TempReaper, sweeping earlier sessions' leftovers on first use. """
+    global _reaper
+    with _reaper_lock:
+        if _reaper is None:
+            _reaper = TempReaper()
+            try:
+                _reaper.sweep()
+            except Exception as e:
+                log(f"Temp sweep failed: {e}")
+            _reaper.start()
+        return _reaper
+
+def shutdown_temp_reaper():
+    with _reaper_lock:
+        if _reaper is not None:
+            _reaper.stop()
+
 def cleanup_temp_doc_async(file_path, timeout_minutes=30):
     """
-    Start the cleanup process in a background thread to avoid blocking the main application.
-    
+    Hands the file to the shared temp reaper, which deletes it once Office
+    releases it. Returns right away.
+
     This is the function you'll call from office_utils.py instead of subprocess.
     
     Args:
         file_path (str): Path to the temporary file to clean up
         timeout_minutes (int): Maximum time to wait before giving up
     """
-    def cleanup_worker():
-        """Worker function that runs in the background thread."""
-        try:
-            result = process_clean_temp_doc(file_path, timeout_minutes)
-            if result.get("error"):
-                log(f"Cleanup error: {result['error']}")
-            else:
-                log(f"Cleanup completed: {result['message']}")
-        except Exception as e:
-            log(f"Unexpected error in cleanup worker: {e}")
-    
-    # Start the cleanup in a daemon thread so it doesn't prevent app shutdown
-    cleanup_thread = threading.Thread(target=cleanup_worker, daemon=True)
-    cleanup_thread.start()
-    log(f"Started background cleanup thread for: {file_path}")
+    if not file_path:
+        log("No file path provided for cleanup")
+        return
+    get_temp_reaper().add(file_path, timeout_minutes)
+    log(f"Queued temp file for cleanup: {file_path}")
 
 # Keep the original standalone functionality for backward compatibility and testing
 def main():
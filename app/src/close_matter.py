@@ -1,5 +1,9 @@
 from pclaw import *
 from parse_json import *
+from batch_runner import run_matter_batch, matter_batch_data
+from job_engine import JobCancelled
+from ocr_engine import get_ocr_engine
+from pywinauto.findwindows import find_windows
 
 def process_close_matter(data):
     """
@@ -15,7 +19,14 @@ def process_close_matter(data):
         matter = get_matter(data)
         sleep(1)
 
-        close_matter(matter)
+        result = close_matter(matter)
+        if result["status"] != "closed":
+            return {
+                "status": "skipped",
+                "message": f"Matter {matter} not closed: balances are not zero",
+                "matter_id": matter,
+                "balances": result["balances"]
+            }
         
         return {
             "status": "success",
@@ -27,6 +38,63 @@ def process_close_matter(data):
         log(f"Error closing matter: {str(e)}")
         return {"error": str(e)}
 
+def close_matter_quietly(matter):
+    """ Closes one matter for a batch: no message boxes, balances as CSV columns. """
+    result = close_matter(matter, notify=False)
+    row = {"status": result["status"]}
+    for label, value in result["balances"].items():
+        row[label] = "" if value is None else f"{value:.2f}"
+    if not result["balances"]:
+        row["note"] = "Balances could not be read"
+    elif result["status"] == "skipped":
+        row["note"] = "Balance not zero" if balances_readable(result["balances"]) else "Some balances unreadable"
+    return row
+
+def balances_readable(balances):
+    return all(value is not None for value in balances.values())
+
+def recover_close_matter():
+    """
+    Gets rid of a Close Matter dialog left open by a failed matter. The
+    cached PCLaw window is dropped first: the failure may have been PCLaw
+    hanging or restarting, and a stale wrapper would fail the next matter too.
+    """
+    get_pclaw_connection().invalidate()
+    if find_windows(title=CLOSE_MATTER_TITLE, top_level_only=False):
+        cancel_close_matter_dialog()
+    connect_to_pclaw().set_focus()
+
+def process_batch_close_matter(data):
+    """
+    Closes a list of matters back to back in one PCLaw session, without
+    message boxes. Matters with a balance (or unreadable balances) are
+    skipped. Expects matters or matterListPath, outputDir, and optionally
+    resumePath to continue from a checkpoint.
+    Returns the batch summary with the CSV log and checkpoint paths.
+    """
+    try:
+        matters, output_dir, resume_path = matter_batch_data(data)
+
+        app = connect_to_pclaw()
+        app.set_focus()
+        sleep(1)
+
+        ocr_before = get_ocr_engine().summary()
+        summary = run_matter_batch(
+            "close_matters", matters, close_matter_quietly, output_dir,
+            fields=BALANCE_LABELS + ["note"], resume_path=resume_path, recover=recover_close_matter)
+        summary["ocr"] = get_ocr_engine().usage_since(ocr_before)
+        summary["connection"] = get_pclaw_connection().summary()
+        log(f"Batch close: {summary['message']} Log: {summary['log']} OCR: {summary['ocr']}")
+        return summary
+
+    except JobCancelled:
+        log("Batch close cancelled")
+        raise
+    except Exception as e:
+        log(f"Error in batch close: {str(e)}")
+        return {"error": str(e)}
+
 def main():
     """Backward compatibility for standalone execution"""
     try:
@@ -0,0 +1,83 @@
+from config import log
+import queue
+import threading
+from concurrent.futures import Future
+
+class ComThread:
+    """
+    A dedicated thread with its own COM apartment.
+    COM objects created here must only be used here, so callers hand work
+    over as callables through a queue and wait on the returned Future.
+    While idle, the thread pumps Windows messages so COM events get delivered.
+    """
+    def __init__(self, name, pump_interval=0.1):
+        self.name = name
+        self.pump_interval = pump_interval
+        self._queue = queue.Queue()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        with self._lock:
+            if not self.running:
+                self._thread = threading.Thread(target=self._loop, name=self.name, daemon=True)
+                self._thread.start()
+
+    def submit(self, func, *args, **kwargs):
+        """ Queues func to run on the COM thread and returns a Future. """
+        self.start()
+        future = Future()
+        self._queue.put((future, func, args, kwargs))
+        return future
+
+    def call(self, func, *args, timeout=None, **kwargs):
+        """ Runs func on the COM thread and waits for its result. """
+        if threading.current_thread() is self._thread:
+            # Already on the COM thread: queueing would deadlock
+            return func(*args, **kwargs)
+        return self.submit(func, *args, **kwargs).result(timeout=timeout)
+
+    def stop(self, timeout=5):
+        """ Finishes queued work, then ends the thread. """
+        if self.running:
+            self._queue.put(None)
+            self._thread.join(timeout=timeout)
+
+    def _loop(self):
+        pythoncom = _import_pythoncom()
+        if pythoncom:
+            pythoncom.CoInitialize()
+        try:
+            while True:
+                try:
+                    item = self._queue.get(timeout=self.pump_interval)
+                except queue.Empty:
+                    if pythoncom:
+                        pythoncom.PumpWaitingMessages()
+                    continue
+                if item is None:
+                    break
+                future, func, args, kwargs = item
+                if not future.set_running_or_notify_cancel():
+                    continue
+                try:
+                    future.set_result(func(*args, **kwargs))
+                except BaseException as e:
+                    future.set_exception(e)
+        except Exception as e:
+            log(f"COM thread {self.name} stopped: {e}")
+        finally:
+            if pythoncom:
+                pythoncom.CoUninitialize()
+
+def _import_pythoncom():
+    """ pythoncom is Windows-only; fakes run fine without it. """
+    try:
+        import pythoncom
+        return pythoncom
+    except ImportError:
+        return None
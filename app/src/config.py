@@ -43,6 +43,54 @@ SRC_DIR = os.path.join(ROOT_DIR, 'app', 'src')
 WEB_DIR = os.path.join(ROOT_DIR, 'app', 'web')
 TEMPLATES_DIR = os.path.join(ROOT_DIR, 'app', 'templates')
 INDEX_HTML = os.path.join(WEB_DIR, 'index.html')
+LAWYERS_JSON = os.path.join(WEB_DIR, 'js', 'lawyers.json')
+
+# Import all automation modules in the background after the window opens
+PREWARM_MODULES = True
+
+# Threads available to the job engine behind HubAPI.run
+JOB_WORKERS = 4
+
+# Warm Python workers for scripts not yet in the module registry
+WORKER_POOL_SIZE = 2
+# Seconds a worker gets to answer before it's treated as hung and restarted
+WORKER_CALL_TIMEOUT = 300
+
+# Prepared forms kept by revision ID for repeated actions
+FORM_CACHE_SIZE = 16
+
+# Hidden Word instances kept warm for contracts and receipts
+WORD_POOL_SIZE = 1
+WORD_POOL_MAX_DOCUMENTS = 20
+WORD_POOL_PREWARM = False
+
+# Calendar cache: days loaded ahead of today, and how long before a full reload
+CALENDAR_WINDOW_DAYS = 60
+CALENDAR_MAX_AGE_SECONDS = 900
+
+# OCR backend for PCLaw screens: "auto" (tesserocr if installed, else
+# tesseract.exe), "tesserocr" or "cli"
+OCR_BACKEND = "auto"
+# Screenshot regions OCR'd at once (one Tesseract per worker). Only the
+# Register's two crops use it: per-amount Close Matter crops were not done
+# (see pclaw.ocr_read_balances), so Close Matter is still a single crop
+OCR_WORKERS = 4
+# OCR results kept for unchanged screen regions (0 turns the cache off)
+OCR_CACHE_SIZE = 256
+# Binarize and upscale PCLaw crops, with per-field Tesseract profiles, before
+# OCR (ocr_preprocess). Off: on the labelled corpus in src/ocr_corpus
+# (ocr_preprocess.benchmark(), Tesseract 5.5) raw crops read 40/40 amounts
+# and 40/40 dates at 5.5 / 7.7 ms per field, preprocessed ones 24/40 and
+# 25/40 at 9.2 / 11.7 ms. When on, balances are only trusted where the raw
+# crop reads the same amount
+OCR_PREPROCESS = False
+# Folder where every crop sent to OCR is saved for that corpus (unlabelled;
+# fill in "expected" in its corpus.json). Empty: nothing is saved
+OCR_CAPTURE_DIR = ""
+# Read PCLaw values from the UI Automation tree before falling back to OCR
+# (uia_extract). Off until the label/value matching is checked on the real
+# Close Matter and Register dialogs; OCR only meanwhile
+PCLAW_UIA_FIRST = False
 
 
 """
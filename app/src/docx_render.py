@@ -0,0 +1,372 @@
+from config import *
+from xml.sax.saxutils import escape
+import re
+import shutil
+import tempfile
+import time
+import zipfile
+
+# {name} placeholders in the Word templates
+PLACEHOLDER_RE = re.compile(r"\{(\w+)\}")
+
+# Text nodes, and the paragraph tags that bound a placeholder
+TEXT_NODE_RE = re.compile(r"<w:t(?:\s[^>]*)?>(.*?)</w:t>|<w:t(?:\s[^>]*)?/>|<w:p[\s>/]|</w:p>", re.S)
+RUN_START_RE = re.compile(r"<w:r[\s>]")
+RUN_PROPS_RE = re.compile(r"<w:rPr>.*?</w:rPr>|<w:rPr/>", re.S)
+
+# Parts that can hold template text
+TEXT_PART_RE = re.compile(r"^word/(document|header\d*|footer\d*)\.xml$")
+
+def _attr(value):
+    return escape(value, {'"': "&quot;"})
+
+RELS_NS = "http://schemas.openxmlformats.org/package/2006/relationships"
+HYPERLINK_REL = "http://schemas.openxmlformats.org/officeDocument/2006/relationships/hyperlink"
+R_NS = "http://schemas.openxmlformats.org/officeDocument/2006/relationships"
+
+def _key(placeholder):
+    """ Accepts "clientName" or "{clientName}". """
+    return placeholder.strip("{}")
+
+def merge_split_placeholders(xml):
+    """
+    Word often splits "{clientName}" over several runs (spell check, edits,
+    formatting). Moves the text of every placeholder into the text node where
+    it starts, so each one can then be replaced within a single node.
+    """
+    edits = {}   # node start -> (node end, new text)
+    paragraph = []
+    for match in TEXT_NODE_RE.finditer(xml):
+        if match.group(0).startswith("<w:t"):
+            paragraph.append(match)
+        else:
+            _merge_paragraph(paragraph, edits)
+            paragraph = []
+    _merge_paragraph(paragraph, edits)
+    if not edits:
+        return xml
+
+    out = []
+    position = 0
+    for start in sorted(edits):
+        end, text = edits[start]
+        out.append(xml[position:start])
+        out.append(f'<w:t xml:space="preserve">{text}</w:t>')
+        position = end
+    out.append(xml[position:])
+    return "".join(out)
+
+def _merge_paragraph(nodes, edits):
+    if len(nodes) < 2:
+        return
+    texts = [node.group(1) or "" for node in nodes]
+    joined = "".join(texts)
+    if "{" not in joined:
+        return
+
+    # Which node each character belongs to; a split placeholder is handed
+    # over to the node it starts in
+    owners = []
+    for index, text in enumerate(texts):
+        owners.extend([index] * len(text))
+    moved = False
+    for match in PLACEHOLDER_RE.finditer(joined):
+        first = owners[match.start()]
+        if owners[match.end() - 1] != first:
+            owners[match.start():match.end()] = [first] * (match.end() - match.start())
+            moved = True
+    if not moved:
+        return
+
+    merged = [[] for _ in nodes]
+    for char, owner in zip(joined, owners):
+        merged[owner].append(char)
+    for node, text, chars in zip(nodes, texts, merged):
+        new_text = "".join(chars)
+        if new_text != text:
+            edits[node.start()] = (node.end(), new_text)
+
+def fill_text(xml, values, found):
+    """ Replaces placeholders inside text nodes. Unknown placeholders stay as they are. """
+    def replace_node(node):
+        text = node.group(1)
+        if not text or "{" not in text:
+            return node.group(0)
+
+        def replace(match):
+            name = match.group(1)
+            if name not in values:
+                return match.group(0)
+            found[name] = found.get(name, 0) + 1
+            return values[name]
+
+        filled = PLACEHOLDER_RE.sub(replace, text)
+        if filled == text:
+            return node.group(0)
+        return f'<w:t xml:space="preserve">{filled}</w:t>'
+
+    return TEXT_NODE_RE.sub(lambda m: replace_node(m) if m.group(0).startswith("<w:t") else m.group(0), xml)
+
+def insert_hyperlink(xml, placeholder, text, rel_id, tooltip=None):
+    """
+    Turns each run text containing the placeholder into a w:hyperlink showing
+    text. The run is split around the placeholder and keeps its formatting.
+    Returns (xml, count).
+    """
+    token = "{" + _key(placeholder) + "}"
+    count = 0
+    out = []
+    position = 0
+    for match in TEXT_NODE_RE.finditer(xml):
+        content = match.group(1)
+        if not match.group(0).startswith("<w:t") or not content or token not in content:
+            continue
+        # Formatting of the enclosing run
+        run_start = None
+        for run in RUN_START_RE.finditer(xml, position, match.start()):
+            run_start = run.start()
+        props = ""
+        if run_start is not None:
+            found = RUN_PROPS_RE.search(xml, run_start, match.start())
+            if found:
+                props = found.group(0)
+        link_props = _hyperlink_props(props)
+        tip = f' w:tooltip="{_attr(tooltip)}"' if tooltip else ""
+
+        pieces = content.split(token)
+        parts = [f'<w:t xml:space="preserve">{pieces[0]}</w:t></w:r>']
+        for index, piece in enumerate(pieces[1:], 1):
+            parts.append(f'<w:hyperlink r:id="{rel_id}"{tip} w:history="1">'
+                         f'<w:r>{link_props}<w:t xml:space="preserve">{text}</w:t></w:r></w:hyperlink>')
+            parts.append(f'<w:r>{props}<w:t xml:space="preserve">{piece}</w:t>')
+            # The last run is closed by the original </w:r>
+            if index < len(pieces) - 1:
+                parts.append("</w:r>")
+            count += 1
+        out.append(xml[position:match.start()])
+        out.append("".join(parts))
+        position = match.end()
+    out.append(xml[position:])
+    return "".join(out), count
+
+# Child order of w:rPr in the WordprocessingML schema; Word rejects runs
+# whose properties are out of order
+RPR_ORDER = [
+    "rStyle", "rFonts", "b", "bCs", "i", "iCs", "caps", "smallCaps", "strike", "dstrike",
+    "outline", "shadow", "emboss", "imprint", "noProof", "snapToGrid", "vanish", "webHidden",
+    "color", "spacing", "w", "kern", "position", "sz", "szCs", "highlight", "u", "effect",
+    "bdr", "shd", "fitText", "vertAlign", "rtl", "cs", "em", "lang", "eastAsianLayout",
+    "specVanish", "oMath", "rPrChange",
+]
+RPR_CHILD_RE = re.compile(r"<w:(\w+)\b[^>]*?/>|<w:(\w+)\b[^>]*>.*?</w:\2>", re.S)
+
+def _hyperlink_props(props):
+    """ Run properties for link text: the run's own, plus the Hyperlink look. """
+    children = []
+    if props and props != "<w:rPr/>":
+        inner = props[len("<w:rPr>"):-len("</w:rPr>")]
+        for child in RPR_CHILD_RE.finditer(inner):
+            tag = child.group(1) or child.group(2)
+            if tag not in ("rStyle", "color", "u"):
+                children.append((tag, child.group(0)))
+    children += [("rStyle", '<w:rStyle w:val="Hyperlink"/>'),
+                 ("color", '<w:color w:val="0563C1"/>'),
+                 ("u", '<w:u w:val="single"/>')]
+    # Stable sort: unknown tags keep their place at the end
+    rank = {tag: index for index, tag in enumerate(RPR_ORDER)}
+    children.sort(key=lambda child: rank.get(child[0], len(RPR_ORDER)))
+    return "<w:rPr>" + "".join(xml for _, xml in children) + "</w:rPr>"
+
+def add_relationship(rels_xml, target, rel_type=HYPERLINK_REL, external=True):
+    """ Adds a relationship to a .rels part and returns (rels_xml, new id). """
+    if rels_xml is None:
+        rels_xml = ('<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+                    f'<Relationships xmlns="{RELS_NS}"></Relationships>')
+    used = [int(n) for n in re.findall(r'Id="rId(\d+)"', rels_xml)]
+    rel_id = f"rId{max(used, default=0) + 1}"
+    mode = ' TargetMode="External"' if external else ""
+    entry = (f'<Relationship Id="{rel_id}" Type="{rel_type}" '
+             f'Target="{_attr(target)}"{mode}/>')
+    return rels_xml.replace("</Relationships>", entry + "</Relationships>"), rel_id
+
+def _rels_name(part_name):
+    folder, name = part_name.rsplit("/", 1)
+    return f"{folder}/_rels/{name}.rels"
+
+def _ensure_r_namespace(xml):
+    """ Declares the r: prefix on the root element when a part lacks it. """
+    if 'xmlns:r="' in xml:
+        return xml
+    root = re.search(r"<w:(document|hdr|ftr)\b", xml)
+    if not root:
+        return xml
+    return xml[:root.end()] + f' xmlns:r="{R_NS}"' + xml[root.end():]
+
+def render_docx(source, dest, replacements, hyperlinks=None, strict=False):
+    """
+    Fills {placeholder} text in a .docx without Word and writes it to dest.
+
+    replacements maps placeholders ("clientName" or "{clientName}") to text.
+    hyperlinks maps placeholders to (address, display text[, tooltip]); each
+    one becomes a real link, e.g. a mailto: for {clientEmail}.
+    Returns a report with the placeholders filled and those never found.
+    """
+    values = {_key(k): escape("" if v is None else str(v)) for k, v in replacements.items()}
+    links = {_key(k): v for k, v in (hyperlinks or {}).items()}
+    found = {}
+
+    with zipfile.ZipFile(source) as zin:
+        names = set(zin.namelist())
+        parts = {}
+        rels = {}
+        for info in zin.infolist():
+            if not TEXT_PART_RE.match(info.filename):
+                continue
+            xml = zin.read(info).decode("utf-8")
+            if "{" not in xml:
+                continue
+            xml = merge_split_placeholders(xml)
+            xml = fill_text(xml, values, found)
+            for name, link in links.items():
+                token = "{" + name + "}"
+                if token not in xml:
+                    continue
+                address, text = link[0], link[1]
+                tooltip = link[2] if len(link) > 2 else None
+                rels_name = _rels_name(info.filename)
+                if rels_name not in rels:
+                    rels[rels_name] = zin.read(rels_name).decode("utf-8") if rels_name in names else None
+                rels[rels_name], rel_id = add_relationship(rels[rels_name], address)
+                xml, count = insert_hyperlink(_ensure_r_namespace(xml), token, escape(text), rel_id, tooltip)
+                found[name] = found.get(name, 0) + count
+            parts[info.filename] = xml
+
+        # Write next to dest first so a failed render never leaves half a file
+        folder = os.path.dirname(os.path.abspath(dest))
+        fd, temp_path = tempfile.mkstemp(suffix=".docx", dir=folder)
+        os.close(fd)
+        try:
+            with zipfile.ZipFile(temp_path, "w", zipfile.ZIP_DEFLATED) as zout:
+                for info in zin.infolist():
+                    if info.filename in parts:
+                        zout.writestr(info, parts[info.filename].encode("utf-8"))
+                    elif info.filename in rels:
+                        zout.writestr(info, rels[info.filename].encode("utf-8"))
+                    else:
+                        zout.writestr(info, zin.read(info))
+                for rels_name, rels_xml in rels.items():
+                    if rels_name not in names:
+                        zout.writestr(rels_name, rels_xml.encode("utf-8"))
+            shutil.move(temp_path, dest)
+        except Exception:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+
+    report = {
+        "filled": found,
+        "missing": sorted((set(values) | set(links)) - set(found)),
+    }
+    if report["missing"]:
+        message = f"{os.path.basename(source)}: placeholders not found: {report['missing']}"
+        if strict:
+            raise KeyError(message)
+        log(message)
+    return report
+
+def prepare_docx(source, dest, replacements, hyperlinks=None):
+    """
+    Fills source into dest offline. If that fails, or some placeholders
+    weren't found, copies the template as-is so Word fills it instead.
+    Returns True when the offline fill worked.
+    """
+    try:
+        report = render_docx(source, dest, replacements, hyperlinks)
+    except Exception as e:
+        log(f"Offline fill failed for {os.path.basename(source)}, falling back to Word: {e}")
+        shutil.copy(source, dest)
+        return False
+    if report["missing"]:
+        log(f"Offline fill of {os.path.basename(source)} missed {report['missing']}, falling back to Word")
+        shutil.copy(source, dest)
+        return False
+    return True
+
+def mailto_link(email, tooltip="Email Client"):
+    """ Hyperlink spec for render_docx, like word_hyperlink_email made. """
+    return (f"mailto:{email}", email, tooltip)
+
+
+# ----------------------------
+# Sample document for tests and benchmarks
+# ----------------------------
+
+W_NS = "http://schemas.openxmlformats.org/wordprocessingml/2006/main"
+
+def make_sample_docx(path, paragraphs=40):
+    """
+    Writes a minimal .docx shaped like the contract template, with placeholders
+    split across runs the way Word saves them.
+    """
+    run = '<w:r><w:rPr><w:b/></w:rPr><w:t xml:space="preserve">{}</w:t></w:r>'
+    body = [
+        "<w:p>" + run.format("Between {client") + '<w:proofErr w:type="spellStart"/>'
+        + run.format("Name") + run.format("} and the firm, on {date}.") + "</w:p>",
+        "<w:p>" + run.format("Contact: ") + run.format("{clientEmail}") + "</w:p>",
+        "<w:p>" + run.format("Mandate: {contractTitle}. Deposit of {deposit")
+        + run.format("Amount}$ (total {totalAmount}$ &amp; taxes).") + "</w:p>",
+    ]
+    filler = "<w:p>" + run.format("Lorem ipsum dolor sit amet, consectetur adipiscing elit.") + "</w:p>"
+    body.extend([filler] * paragraphs)
+    document = (f'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+                f'<w:document xmlns:w="{W_NS}" xmlns:r="{R_NS}"><w:body>'
+                + "".join(body) + "</w:body></w:document>")
+    footer = (f'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+              f'<w:ftr xmlns:w="{W_NS}"><w:p>' + run.format("Signed on {da") + run.format("te}")
+              + "</w:p></w:ftr>")
+    content_types = (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+        '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+        '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+        '<Default Extension="xml" ContentType="application/xml"/>'
+        '<Override PartName="/word/document.xml" ContentType="application/vnd.openxmlformats-officedocument.wordprocessingml.document.main+xml"/>'
+        '<Override PartName="/word/footer1.xml" ContentType="application/vnd.openxmlformats-officedocument.wordprocessingml.footer+xml"/>'
+        '</Types>')
+    package_rels = (
+        f'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n<Relationships xmlns="{RELS_NS}">'
+        '<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" Target="word/document.xml"/>'
+        '</Relationships>')
+    document_rels = (
+        f'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n<Relationships xmlns="{RELS_NS}">'
+        '<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/footer" Target="footer1.xml"/>'
+        '</Relationships>')
+    with zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED) as z:
+        z.writestr("[Content_Types].xml", content_types)
+        z.writestr("_rels/.rels", package_rels)
+        z.writestr("word/document.xml", document)
+        z.writestr("word/_rels/document.xml.rels", document_rels)
+        z.writestr("word/footer1.xml", footer)
+    return path
+
+def benchmark(documents=200):
+    """ Times offline filling of a contract-sized document. """
+    folder = tempfile.mkdtemp(prefix="docx_render_")
+    source = make_sample_docx(os.path.join(folder, "Contract.docx"), paragraphs=400)
+    replacements = {
+        "{clientName}": "Jean Tremblay",
+        "{contractTitle}": "Representation in Divorce",
+        "{depositAmount}": "1500",
+        "{totalAmount}": "1824.63",
+        "{date}": "July 22nd, 2025",
+    }
+    hyperlinks = {"{clientEmail}": mailto_link("jean@example.com")}
+
+    start = time.perf_counter()
+    for i in range(documents):
+        report = render_docx(source, os.path.join(folder, f"filled_{i}.docx"), replacements, hyperlinks)
+    elapsed = (time.perf_counter() - start) / documents * 1000
+    size = os.path.getsize(source) // 1024
+    print(f"Offline fill: {elapsed:.2f} ms/document ({size} KB template, filled {report['filled']})")
+
+if __name__ == "__main__":
+    benchmark()
@@ -1,5 +1,6 @@
 from office_utils import *
 from parse_json import *
+from template_engine import render_template
 from datetime import datetime
 
 def process_email_confirmation(data):
@@ -29,13 +30,8 @@ def process_email_confirmation(data):
 
         lang = "fr" if client_language.startswith("fr") else "en"
         template_name = location.capitalize() + ".html"
-        template_path = os.path.join(TEMPLATES_DIR, lang, template_name)
 
-        if not os.path.exists(template_path):
-            raise FileNotFoundError(f"Template not found: {template_path}")
-
-        with open(template_path, "r", encoding="utf-8") as f:
-            html_body = f.read()
+        context = {"lawyerName": get_lawyer_string(lawyer_name, lawyer_id)}
 
         # Handle appointment date and time
         if appointment_date and appointment_time:
@@ -47,29 +43,20 @@ def process_email_confirmation(data):
             base_rate = 60 if is_ref_barreau else 125 if is_first_consult else 350
             total_rate = add_taxes(base_rate)
 
-            teams_block = get_teams_block()
-            
-            html_body = (
-                html_body
-                    .replace("{{date}}", formatted_date)
-                    .replace("{{time}}", formatted_time)
-                    .replace("{{rates}}", str(base_rate))
-                    .replace("{{totalRates}}", f"{total_rate:.2f}")
-                    .replace("{{teamsMeeting}}", teams_block if location.lower() == "teams" else "")
-            )
-
-        lawyer_string = get_lawyer_string(lawyer_name, lawyer_id)
-        html_body = html_body.replace("{{lawyerName}}", lawyer_string)
+            context.update({
+                "date": formatted_date,
+                "time": formatted_time,
+                "rates": str(base_rate),
+                "totalRates": f"{total_rate:.2f}",
+            })
+            if location.lower() == "teams":
+                context["teamsMeeting"] = get_teams_block()
 
-        outlook = COM.Dispatch("Outlook.Application")
-        mail = outlook.CreateItem(0)  # 0 = olMailItem
-        mail.To = client_email
-        mail.Subject = ("Confirmation de rendez-vous - Allen Madelin"
-                        if lang == "fr" else "Confirmation of appointment - Allen Madelin")
-        mail.HTMLBody = html_body
-        mail.Display()
+        html_body = render_template(lang, template_name, context)
 
-        focus_office_window(mail)
+        subject = ("Confirmation de rendez-vous - Allen Madelin"
+                   if lang == "fr" else "Confirmation of appointment - Allen Madelin")
+        create_mail_draft(client_email, subject, html_body)
         
         # Return success result
         return {
@@ -1,5 +1,6 @@
 from office_utils import *
 from parse_json import *
+from template_engine import render_template
 
 def process_email_followup(data):
     try:
@@ -9,18 +10,10 @@ def process_email_followup(data):
         client_language = get_language(data)
         lang = "fr" if client_language.startswith("fr") else "en"
 
-        template_path = os.path.join(TEMPLATES_DIR, lang, "Suivi.html")
-        with open(template_path, "r", encoding="utf-8") as f:
-            html_body = f.read()
+        html_body = render_template(lang, "Suivi.html")
 
-        outlook = COM.Dispatch("Outlook.Application")
-        mail = outlook.CreateItem(0)  # 0 = olMailItem
-        mail.To = client_email
-        mail.Subject = "Suivi de dossier - Allen Madelin" if lang == "fr" else "Follow-up - Allen Madelin"
-        mail.HTMLBody = html_body
-        mail.Display()
-
-        focus_office_window(mail)
+        subject = "Suivi de dossier - Allen Madelin" if lang == "fr" else "Follow-up - Allen Madelin"
+        create_mail_draft(client_email, subject, html_body)
 
         # Return success result
         return {
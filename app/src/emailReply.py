@@ -1,5 +1,6 @@
 from office_utils import *
 from parse_json import *
+from template_engine import render_template
 
 def process_email_reply(data):
     try:
@@ -11,21 +12,12 @@ def process_email_reply(data):
         lawyer_id = lawyer.get("id", "")
         lang = "fr" if client_language.startswith("fr") else "en"
 
-        template_path = os.path.join(TEMPLATES_DIR, lang, "Reply.html")
+        html_body = render_template(lang, "Reply.html", {
+            "lawyerName": get_lawyer_string(lawyer_name, lawyer_id),
+        })
 
-        with open(template_path, "r", encoding="utf-8") as f:
-            html_body = f.read()
-
-        html_body = html_body.replace("{{lawyerName}}", get_lawyer_string(lawyer_name, lawyer_id))
-
-        outlook = COM.Dispatch("Outlook.Application")
-        mail = outlook.CreateItem(0)  # 0 = olMailItem
-        mail.To = client_email
-        mail.Subject = "Réponse - Allen Madelin" if lang == "fr" else "Reply - Allen Madelin"
-        mail.HTMLBody = html_body
-        mail.Display()
-        
-        focus_office_window(mail)
+        subject = "Réponse - Allen Madelin" if lang == "fr" else "Reply - Allen Madelin"
+        create_mail_draft(client_email, subject, html_body)
         
         # Return success result
         return {
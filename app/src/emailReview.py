@@ -1,5 +1,6 @@
 from office_utils import *
 from parse_json import *
+from template_engine import render_template
 
 def process_email_review(data):
     try:
@@ -9,18 +10,10 @@ def process_email_review(data):
         client_language = get_language(data)
         lang = "fr" if client_language.startswith("fr") else "en"
 
-        template_path = os.path.join(TEMPLATES_DIR, lang, "Review.html")
-        with open(template_path, "r", encoding="utf-8") as f:
-            html_body = f.read()
+        html_body = render_template(lang, "Review.html")
 
-        outlook = COM.Dispatch("Outlook.Application")
-        mail = outlook.CreateItem(0)
-        mail.To = client_email
-        mail.Subject = "Commentaires Google - Allen Madelin" if lang == "fr" else "Google Review - Allen Madelin"
-        mail.HTMLBody = html_body
-        mail.Display()
-
-        focus_office_window(mail)
+        subject = "Commentaires Google - Allen Madelin" if lang == "fr" else "Google Review - Allen Madelin"
+        create_mail_draft(client_email, subject, html_body)
         
         # Return success result
         return {
@@ -0,0 +1,476 @@
+from config import *
+from ocr_engine import DEFAULT_CONFIG
+from calendar_table import TABLE_COLUMNS, OL_USER_ITEMS, load_fixture
+import re
+import time
+
+# ----------------------------
+# Fakes for tests and benchmarks
+# ----------------------------
+# Stand-ins for the applications the hub drives, so the engines around them
+# can be exercised on Linux. Nothing in the app imports this module: only
+# app/tests and the benchmark() of each module.
+
+# ----------------------------
+# Outlook (outlook_session)
+# ----------------------------
+
+class _FakeObject:
+    """ Accepts any attribute, like a late-bound COM object. """
+    def __init__(self, **attrs):
+        self.__dict__.update(attrs)
+
+class FakeMailItem(_FakeObject):
+    def __init__(self, outlook):
+        super().__init__(To="", Subject="", HTMLBody="", Body="", displayed=False)
+        self._outlook = outlook
+        self.Attachments = _FakeObject(items=[])
+        self.Attachments.Add = self.Attachments.items.append
+        self.GetInspector = _FakeObject(Activate=lambda: None)
+
+    def Display(self):
+        self._outlook._touch()
+        self.displayed = True
+
+class FakeNamespace:
+    def __init__(self, outlook):
+        self._outlook = outlook
+        self.logged_on = False
+
+    def Logon(self, *args):
+        self._outlook._touch()
+        self.logged_on = True
+
+    @property
+    def CurrentUser(self):
+        self._outlook._touch()
+        return _FakeObject(Name="Reception")
+
+    def GetDefaultFolder(self, folder_id):
+        self._outlook._touch()
+        return _FakeObject(Items=[], folder_id=folder_id)
+
+class FakeOutlook:
+    """
+    Stand-in for Outlook.Application.
+    dispatch_delay simulates the cost of connecting; crash() makes every
+    later call fail like a closed Outlook would.
+    """
+    def __init__(self, dispatch_delay=0.0, call_delay=0.0):
+        time.sleep(dispatch_delay)
+        self.call_delay = call_delay
+        self.alive = True
+        self.created = []
+        self._namespace = FakeNamespace(self)
+
+    def _touch(self):
+        if not self.alive:
+            raise ConnectionError("The RPC server is unavailable.")
+        if self.call_delay:
+            time.sleep(self.call_delay)
+
+    def crash(self):
+        self.alive = False
+
+    def GetNamespace(self, name):
+        self._touch()
+        return self._namespace
+
+    def CreateItem(self, item_type):
+        self._touch()
+        item = FakeMailItem(self)
+        self.created.append(item)
+        return item
+
+def fake_outlook_factory(dispatch_delay=0.0, call_delay=0.0, instances=None):
+    """ Factory for OutlookSession that builds FakeOutlook instances. """
+    def factory():
+        outlook = FakeOutlook(dispatch_delay, call_delay)
+        if instances is not None:
+            instances.append(outlook)
+        namespace = outlook.GetNamespace("MAPI")
+        namespace.Logon()
+        return outlook, namespace
+    return factory
+
+
+# ----------------------------
+# Outlook calendar (calendar_table)
+# ----------------------------
+
+class FixtureItem:
+    """ Stand-in AppointmentItem built from a recorded row. """
+    Class = 26
+
+    def __init__(self, row, rpc_delay=0.0):
+        self._row = dict(zip(TABLE_COLUMNS, row))
+        self._rpc_delay = rpc_delay
+
+    def __getattr__(self, name):
+        row = self.__dict__.get("_row", {})
+        if name not in row:
+            raise AttributeError(name)
+        if self._rpc_delay:
+            time.sleep(self._rpc_delay)   # every property read is a round trip
+        return row[name]
+
+class FixtureTable:
+    def __init__(self, rows, rpc_delay=0.0):
+        self._rows = rows
+        self._position = 0
+        self._rpc_delay = rpc_delay
+        self.Columns = self
+        self.columns = []
+
+    # Columns collection
+    def RemoveAll(self):
+        self.columns = []
+
+    def Add(self, name):
+        self.columns.append(name)
+
+    @property
+    def EndOfTable(self):
+        return self._position >= len(self._rows)
+
+    def GetArray(self, max_rows):
+        if self._rpc_delay:
+            time.sleep(self._rpc_delay)   # one round trip per batch
+        chunk = self._rows[self._position:self._position + max_rows]
+        self._position += len(chunk)
+        indexes = [TABLE_COLUMNS.index(c) for c in self.columns]
+        return tuple(tuple(row[i] for i in indexes) for row in chunk)
+
+class FixtureItems(list):
+    IncludeRecurrences = False
+
+    def Sort(self, key):
+        pass
+
+    def Restrict(self, filter_text):
+        return self
+
+class FixtureFolder:
+    def __init__(self, rows, occurrences, rpc_delay=0.0):
+        self._rows = rows
+        self._occurrences = occurrences
+        self._rpc_delay = rpc_delay
+
+    def GetTable(self, filter_text, table_contents=OL_USER_ITEMS):
+        return FixtureTable(self._rows, self._rpc_delay)
+
+    @property
+    def Items(self):
+        # Filter text isn't parsed; like the recording, these are already the
+        # window's recurring occurrences
+        return FixtureItems(FixtureItem(row, self._rpc_delay) for row in self._occurrences)
+
+class FixtureNamespace:
+    """
+    Replays a fixture recorded by calendar_table.record_fixture through the
+    same calls read_calendar_table makes. rpc_delay simulates the cost of each cross-process call.
+    """
+    def __init__(self, path=None, rows=None, occurrences=None, rpc_delay=0.0):
+        if path:
+            rows, occurrences = load_fixture(path)
+        self.folder = FixtureFolder(rows or [], occurrences or [], rpc_delay)
+
+    def GetDefaultFolder(self, folder_id):
+        return self.folder
+
+
+# ----------------------------
+# Word (word_pool)
+# ----------------------------
+
+class FakeDocument:
+    def __init__(self, word, path):
+        self.word = word
+        self.path = path
+        self.closed = False
+        self.exports = []
+
+    def Activate(self):
+        pass
+
+    def ExportAsFixedFormat(self, path, fmt):
+        self.word._touch()
+        self.exports.append((path, fmt))
+        with open(path, "wb") as f:
+            f.write(b"%PDF-1.4\n% fake export\n")
+
+    def Close(self, save_changes=0):
+        self.closed = True
+        self.word._open_docs.remove(self)
+
+class FakeDocuments:
+    def __init__(self, word):
+        self._word = word
+
+    @property
+    def Count(self):
+        return len(self._word._open_docs)
+
+    def __call__(self, index):
+        return self._word._open_docs[index - 1]
+
+    def Open(self, path):
+        self._word._touch()
+        if not os.path.exists(path):
+            raise FileNotFoundError(path)
+        doc = FakeDocument(self._word, path)
+        self._word._open_docs.append(doc)
+        return doc
+
+class FakeWord:
+    """
+    Stand-in for Word.Application.
+    startup_delay simulates Word's cold start; fail_on_open makes the next
+    Documents.Open calls raise, like a wedged instance.
+    """
+    instances = 0
+
+    def __init__(self, startup_delay=0.0):
+        time.sleep(startup_delay)
+        FakeWord.instances += 1
+        self.Visible = False
+        self.DisplayAlerts = 1
+        self.quit_called = False
+        self.fail_on_open = 0
+        self._open_docs = []
+        self.Documents = FakeDocuments(self)
+
+    def _touch(self):
+        if self.quit_called:
+            raise RuntimeError("Word has quit")
+        if self.fail_on_open:
+            self.fail_on_open -= 1
+            raise RuntimeError("Call was rejected by callee.")
+
+    def Activate(self):
+        pass
+
+    def Quit(self):
+        self.quit_called = True
+
+
+# ----------------------------
+# PCLaw windows on a simulated clock (wait_engine)
+# ----------------------------
+
+class SimulatedClock:
+    """ Manual time: sleep() just moves now() forward. """
+    def __init__(self, start=0.0):
+        self.now = float(start)
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += max(0.0, seconds)
+
+    def advance(self, seconds):
+        self.sleep(seconds)
+
+class FakeWindow:
+    def __init__(self, handle, title, opens_at, closes_at=None, enabled_at=None,
+                 settles_at=None, controls=None):
+        self.handle = handle
+        self.title = title
+        self.opens_at = opens_at
+        self.closes_at = closes_at
+        self.enabled_at = opens_at if enabled_at is None else enabled_at
+        self.settles_at = opens_at if settles_at is None else settles_at
+        self.controls = controls or {}   # name -> time it becomes enabled
+
+class FakeUI:
+    """
+    Scripted windows on a SimulatedClock, for exercising pclaw sequences on
+    Linux: each window opens, enables, stops redrawing and closes at given
+    times. Offsets are relative to now() when the window is added.
+    """
+    def __init__(self, clock):
+        self.clock = clock
+        self.windows = []
+        self.focus = None
+        self._next_handle = 100
+
+    def add_window(self, title, after=0.0, lasts=None, enabled_after=None, settles_after=None,
+                   controls=None, focus=True):
+        now = self.clock()
+        handle = self._next_handle
+        self._next_handle += 1
+        window = FakeWindow(
+            handle, title, now + after,
+            closes_at=None if lasts is None else now + after + lasts,
+            enabled_at=None if enabled_after is None else now + enabled_after,
+            settles_at=None if settles_after is None else now + settles_after,
+            controls={name: now + t for name, t in (controls or {}).items()},
+        )
+        self.windows.append(window)
+        if focus:
+            self.focus = handle
+        return handle
+
+    def close_window(self, handle, after=0.0):
+        window = self._get(handle)
+        if window:
+            window.closes_at = self.clock() + after
+
+    def _open(self):
+        now = self.clock()
+        return [w for w in self.windows if w.opens_at <= now and (w.closes_at is None or now < w.closes_at)]
+
+    def _get(self, handle):
+        return next((w for w in self.windows if w.handle == handle), None)
+
+    def find(self, title_re):
+        return [w.handle for w in self._open() if re.match(title_re, w.title)]
+
+    def top_windows(self):
+        return {w.handle for w in self._open()}
+
+    def foreground(self):
+        if self.focus in self.top_windows():
+            return self.focus
+        open_windows = self._open()
+        return open_windows[-1].handle if open_windows else None
+
+    def exists(self, handle):
+        return handle in self.top_windows()
+
+    def is_enabled(self, handle):
+        window = self._get(handle)
+        return window is not None and self.clock() >= window.enabled_at
+
+    def control_enabled(self, handle, title_re, control_type):
+        window = self._get(handle)
+        now = self.clock()
+        return window is not None and any(re.match(title_re, name) and now >= at
+                                          for name, at in window.controls.items())
+
+    def fingerprint(self, handle, box):
+        window = self._get(handle)
+        if window is None or not self.exists(handle):
+            return None
+        now = self.clock()
+        # Still drawing: the picture changes every 100 ms
+        return f"{handle}-final" if now >= window.settles_at else f"{handle}-{int(now * 10)}"
+
+
+# ----------------------------
+# PCLaw main window (pclaw_connection)
+# ----------------------------
+
+class FakeWindowProvider:
+    """
+    Scripted windows for Linux: open() and close() change what's on screen,
+    and the counters show how often the slow calls (enumerating every window,
+    connecting) really happened.
+    """
+    def __init__(self, find_cost=0.0, connect_cost=0.0):
+        self.windows = {}   # handle -> title
+        self.find_cost = find_cost
+        self.connect_cost = connect_cost
+        self.finds = 0
+        self.connects = 0
+        self._next_handle = 1000
+
+    def open(self, title="PCLaw® Enterprise - Main"):
+        self._next_handle += 4
+        self.windows[self._next_handle] = title
+        return self._next_handle
+
+    def close(self, handle):
+        self.windows.pop(handle, None)
+
+    def find(self, title_re):
+        self.finds += 1
+        if self.find_cost:
+            time.sleep(self.find_cost)
+        return [h for h, title in self.windows.items() if re.match(title_re, title)]
+
+    def is_valid(self, handle, title_re):
+        return handle in self.windows and re.match(title_re, self.windows[handle]) is not None
+
+    def connect(self, handle):
+        self.connects += 1
+        if self.connect_cost:
+            time.sleep(self.connect_cost)
+        provider = self
+
+        class FakeWrapper:
+            def __init__(self):
+                self.handle = handle
+
+            def exists(self):
+                return handle in provider.windows
+
+            def set_focus(self):
+                if handle not in provider.windows:
+                    raise RuntimeError("window is gone")
+                return self
+
+        return FakeWrapper()
+
+
+# ----------------------------
+# OCR backend (ocr_engine)
+# ----------------------------
+
+class StubBackend:
+    """
+    Returns canned text: a string for every image, a list consumed in
+    order, or a callable taking the image. delay simulates OCR time.
+    configs records the Tesseract config of every call.
+    """
+    name = "stub"
+
+    def __init__(self, text="", delay=0.0):
+        self.text = text
+        self.delay = delay
+        self.calls = 0
+        self.configs = []
+
+    def read(self, image, config=DEFAULT_CONFIG):
+        self.calls += 1
+        self.configs.append(config)
+        if self.delay:
+            time.sleep(self.delay)
+        if callable(self.text):
+            return self.text(image)
+        if isinstance(self.text, list):
+            return self.text.pop(0) if self.text else ""
+        return self.text
+
+    def read_many(self, images, config=DEFAULT_CONFIG):
+        return [self.read(image, config) for image in images]
+
+    def close(self):
+        pass
+
+# ----------------------------
+# PCLaw dialog controls (uia_extract)
+# ----------------------------
+
+class FakeControl:
+    """ One UIA control as a pywinauto wrapper shows it. """
+    def __init__(self, name="", control_type="Text", value=None, rect=(0, 0, 0, 0)):
+        left, top, right, bottom = rect
+        self.element_info = _FakeObject(
+            name=name, control_type=control_type,
+            rectangle=_FakeObject(left=left, top=top, right=right, bottom=bottom))
+        if value is not None:
+            self.get_value = lambda: value
+
+class FakeDialog:
+    """
+    A dialog wrapper with no COM element behind it, so uia_extract walks
+    its descendants() instead of the cached tree.
+    """
+    def __init__(self, controls):
+        self.controls = list(controls)
+        self.element_info = _FakeObject()
+
+    def descendants(self):
+        return list(self.controls)
@@ -0,0 +1,285 @@
+from config import *
+from module_registry import run_module
+import itertools
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Optional
+
+# Job states
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+CANCELLED = "cancelled"
+FINISHED_STATES = (SUCCEEDED, FAILED, CANCELLED)
+
+# Modules that drive the same desktop application must not run side by side:
+# they all send keystrokes to whatever PCLaw window has focus.
+EXCLUSIVE_LANES = {
+    "new_matter": "pclaw",
+    "close_matter": "pclaw",
+    "batch_close_matter": "pclaw",
+    "bill_matter": "pclaw",
+    "batch_bill_matter": "pclaw",
+    "time_entries": "pclaw",
+}
+
+class JobCancelled(Exception):
+    """ Raised inside a job when cancellation was requested. """
+
+@dataclass
+class Job:
+    id: str
+    script_name: str
+    lane: Optional[str] = None
+    status: str = QUEUED
+    progress: float = 0.0
+    message: str = ""
+    result: Any = None
+    error: Optional[str] = None
+    created_at: float = field(default_factory=time.time)
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    cancel_event: threading.Event = field(default_factory=threading.Event, repr=False)
+
+    @property
+    def finished(self):
+        return self.status in FINISHED_STATES
+
+    def to_dict(self, include_result=False):
+        """ JSON-friendly snapshot of the job for the bridge. """
+        info = {
+            "job_id": self.id,
+            "script": self.script_name,
+            "status": self.status,
+            "progress": round(self.progress, 3),
+            "message": self.message,
+            "error": self.error,
+            "cancel_requested": self.cancel_event.is_set(),
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+        }
+        if self.started_at:
+            end = self.finished_at or time.time()
+            info["elapsed_ms"] = round((end - self.started_at) * 1000, 1)
+        if include_result:
+            info["result"] = self.result
+        return info
+
+# The job running on the current worker thread, if any
+_local = threading.local()
+
+def current_job():
+    """ Returns the Job running on this thread, or None outside the engine. """
+    return getattr(_local, "job", None)
+
+def report_progress(progress, message=""):
+    """
+    Records progress (0.0 to 1.0) for the current job.
+    Does nothing when called outside a job, e.g. in standalone runs.
+    """
+    job = current_job()
+    if job is None:
+        return
+    job.progress = max(0.0, min(1.0, float(progress)))
+    if message:
+        job.message = message
+
+def cancel_requested():
+    """ True if the current job has been asked to stop. """
+    job = current_job()
+    return job is not None and job.cancel_event.is_set()
+
+def check_cancelled():
+    """ Raises JobCancelled if the current job has been asked to stop. """
+    if cancel_requested():
+        raise JobCancelled(f"Job {current_job().id} cancelled")
+
+def _init_worker_thread():
+    """ Worker threads may talk to Office, so give each one a COM apartment. """
+    try:
+        import pythoncom
+        pythoncom.CoInitialize()
+    except ImportError:
+        pass
+
+class JobEngine:
+    """
+    Runs modules on a managed thread pool so the pywebview bridge thread
+    returns immediately. Jobs are polled by ID for status, progress and
+    results, and can be cancelled cooperatively.
+
+    Jobs on an exclusive lane wait in that lane's queue, not on a pool
+    thread: one dispatcher per busy lane runs them in order, so a long
+    PCLaw batch holds a single worker and email / Word jobs keep going.
+    """
+    def __init__(self, max_workers=2, runner=run_module, history=50):
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers,
+            thread_name_prefix="AdminHubJob",
+            initializer=_init_worker_thread,
+        )
+        self._runner = runner
+        self._history = history
+        self._jobs = {}
+        self._lock = threading.Lock()
+        self._lanes = {}          # lane -> deque of (job, func, args) waiting
+        self._busy_lanes = set()  # lanes with a dispatcher running
+        self._ids = itertools.count(1)
+
+    def submit(self, script_name, data):
+        """ Queues a registered module and returns the new job ID. """
+        return self.submit_call(script_name, self._runner, script_name, data,
+                                lane=EXCLUSIVE_LANES.get(script_name))
+
+    def submit_call(self, name, func, *args, lane=None):
+        """
+        Queues an arbitrary callable as a job and returns its ID.
+        Jobs sharing a lane run one at a time.
+        """
+        job = Job(id=f"job-{next(self._ids)}", script_name=name, lane=lane)
+        start_dispatcher = False
+        with self._lock:
+            self._jobs[job.id] = job
+            self._prune()
+            if lane is not None:
+                self._lanes.setdefault(lane, deque()).append((job, func, args))
+                if lane not in self._busy_lanes:
+                    self._busy_lanes.add(lane)
+                    start_dispatcher = True
+        if lane is None:
+            self._executor.submit(self._execute, job, func, args)
+        elif start_dispatcher:
+            self._executor.submit(self._dispatch_lane, lane)
+        log(f"Queued {job.id} ({name})")
+        return job.id
+
+    def get(self, job_id):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def status(self, job_id):
+        job = self.get(job_id)
+        if job is None:
+            return {"error": f"Unknown job: {job_id}"}
+        return job.to_dict(include_result=job.finished)
+
+    def result(self, job_id, timeout=None):
+        """
+        Returns the finished job's snapshot including its result.
+        With a timeout, waits up to that many seconds for the job to finish.
+        """
+        job = self.get(job_id)
+        if job is None:
+            return {"error": f"Unknown job: {job_id}"}
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while not job.finished and deadline is not None and time.monotonic() < deadline:
+            time.sleep(0.05)
+        return job.to_dict(include_result=True)
+
+    def cancel(self, job_id):
+        """ Asks a job to stop. Queued jobs never start; running ones stop at their next check. """
+        job = self.get(job_id)
+        if job is None:
+            return {"error": f"Unknown job: {job_id}"}
+        if not job.finished:
+            job.cancel_event.set()
+            log(f"Cancellation requested for {job.id}")
+            if self._dequeue(job):
+                self._finish(job, CANCELLED, error="Cancelled before start")
+        return job.to_dict()
+
+    def list_jobs(self):
+        with self._lock:
+            jobs = list(self._jobs.values())
+        return [job.to_dict() for job in jobs]
+
+    def shutdown(self, wait=False):
+        """ Cancels outstanding jobs and stops the pool. """
+        with self._lock:
+            for job in self._jobs.values():
+                if not job.finished:
+                    job.cancel_event.set()
+        self._executor.shutdown(wait=wait)
+
+    def _prune(self):
+        """ Drops the oldest finished jobs beyond the history size. Caller holds the lock. """
+        finished = [job for job in self._jobs.values() if job.finished]
+        for job in finished[:max(0, len(finished) - self._history)]:
+            del self._jobs[job.id]
+
+    def _dequeue(self, job):
+        """ Takes a job out of its lane queue; False if it already left it. """
+        if job.lane is None:
+            return False
+        with self._lock:
+            waiting = self._lanes.get(job.lane, ())
+            for entry in waiting:
+                if entry[0] is job:
+                    waiting.remove(entry)
+                    return True
+        return False
+
+    def _dispatch_lane(self, lane):
+        """ Runs the lane's queued jobs one after another, then lets the lane go idle. """
+        while True:
+            with self._lock:
+                waiting = self._lanes.get(lane)
+                if not waiting:
+                    self._busy_lanes.discard(lane)
+                    return
+                job, func, args = waiting.popleft()
+            self._execute(job, func, args)
+
+    def _execute(self, job, func, args):
+        if job.cancel_event.is_set():
+            if not job.finished:
+                self._finish(job, CANCELLED, error="Cancelled before start")
+            return
+
+        job.status = RUNNING
+        job.started_at = time.time()
+        _local.job = job
+        try:
+            result = func(*args)
+        except JobCancelled as e:
+            self._finish(job, CANCELLED, error=str(e))
+            return
+        except Exception as e:
+            log(f"{job.id} ({job.script_name}) raised: {str(e)}")
+            status = CANCELLED if job.cancel_event.is_set() else FAILED
+            self._finish(job, status, error=str(e))
+            return
+        finally:
+            _local.job = None
+
+        # Modules report failure by returning {"error": ...}
+        error = result.get("error") if isinstance(result, dict) else None
+        if error:
+            status = CANCELLED if job.cancel_event.is_set() else FAILED
+            self._finish(job, status, result=result, error=str(error))
+        else:
+            job.progress = 1.0
+            self._finish(job, SUCCEEDED, result=result)
+
+    def _finish(self, job, status, result=None, error=None):
+        job.result = result
+        job.error = error
+        job.finished_at = time.time()
+        job.status = status
+        log(f"{job.id} ({job.script_name}) {status}")
+
+_engine = None
+_engine_lock = threading.Lock()
+
+def get_job_engine():
+    """ Returns the shared JobEngine, creating it on first use. """
+    global _engine
+    with _engine_lock:
+        if _engine is None:
+            _engine = JobEngine(max_workers=JOB_WORKERS)
+        return _engine
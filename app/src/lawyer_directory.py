@@ -0,0 +1,84 @@
+from config import *
+import json
+import threading
+
+class LawyerDirectory:
+    """
+    In-memory copy of lawyers.json, indexed by id and by specialty.
+    The file is only re-read when its modification time changes.
+    """
+    def __init__(self, path=LAWYERS_JSON):
+        self.path = path
+        self._lock = threading.Lock()
+        self._stamp = None
+        self._lawyers = []
+        self._by_id = {}
+        self._by_specialty = {}
+        self.loads = 0
+
+    def _refresh(self):
+        stat = os.stat(self.path)
+        stamp = (stat.st_mtime_ns, stat.st_size)
+        if stamp == self._stamp:
+            return
+        with self._lock:
+            if stamp == self._stamp:
+                return
+            with open(self.path, "r", encoding="utf-8") as f:
+                lawyers = json.load(f)["lawyers"]
+
+            by_id = {}
+            by_specialty = {}
+            for lawyer in lawyers:
+                by_id[lawyer["id"]] = lawyer
+                for specialty in lawyer.get("specialties", []):
+                    by_specialty.setdefault(specialty.lower(), []).append(lawyer)
+
+            self._lawyers = lawyers
+            self._by_id = by_id
+            self._by_specialty = by_specialty
+            self._stamp = stamp
+            self.loads += 1
+            log(f"Loaded {len(lawyers)} lawyers from {self.path}")
+
+    def all(self):
+        """ Returns every lawyer, in file order. """
+        self._refresh()
+        return self._lawyers
+
+    def get(self, lawyer_id):
+        """ Returns the lawyer with this id, or None. """
+        self._refresh()
+        return self._by_id.get(lawyer_id)
+
+    def by_specialty(self, specialty):
+        """ Returns the lawyers listing this specialty (case type). """
+        self._refresh()
+        return self._by_specialty.get((specialty or "").lower(), [])
+
+    def resolve(self, lawyer, lawyer_id=None):
+        """
+        Returns the directory record for a lawyer sent by the client, falling
+        back to the client's copy when the id isn't known.
+        """
+        lawyer_id = lawyer_id or (lawyer or {}).get("id")
+        record = self.get(lawyer_id) if lawyer_id else None
+        return record if record is not None else (lawyer or {})
+
+    def responsible_lawyer(self, lawyer_id, default="JR"):
+        """ PCLaw responsible lawyer for matters handled by this lawyer. """
+        record = self.get(lawyer_id)
+        if record is None:
+            return default
+        return record.get("responsibleLawyer") or default
+
+_directory = None
+_directory_lock = threading.Lock()
+
+def get_lawyer_directory():
+    """ Returns the shared LawyerDirectory. """
+    global _directory
+    with _directory_lock:
+        if _directory is None:
+            _directory = LawyerDirectory()
+        return _directory
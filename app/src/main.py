@@ -1,15 +1,65 @@
 from config import *
-from module_registry import run_module, MODULE_REGISTRY
+from module_registry import prewarm_modules, MODULE_REGISTRY
+from job_engine import get_job_engine
+from lawyer_directory import get_lawyer_directory
+from parse_json import FormRequest, FormCache, build_form_request
+from pipeline import normalize_steps, pipeline_lane, run_pipeline
+from worker_pool import get_worker_pool, shutdown_worker_pool, WORKER_FLAG
+from outlook_session import shutdown_outlook_session
+from word_pool import get_word_pool, shutdown_word_pool
+from cleanTempDoc import get_temp_reaper, shutdown_temp_reaper
+from ocr_engine import get_ocr_engine, shutdown_ocr_engine
 import json
-import subprocess
-import webview
+
+def ask_path(kind, **options):
+    """
+    Shows a tk file ("open") or folder ("folder") dialog on top of the hub
+    window and returns the chosen path, or None when cancelled.
+    """
+    try:
+        import tkinter as tk
+        from tkinter import filedialog
+
+        root = tk.Tk()
+        root.withdraw()  # Hide the main window
+        root.attributes('-topmost', True)  # Bring dialog to front
+        try:
+            if kind == "folder":
+                path = filedialog.askdirectory(**options)
+            else:
+                path = filedialog.askopenfilename(**options)
+        finally:
+            root.destroy()
+        return path if path else None
+
+    except Exception as e:
+        log(f"Error in {options.get('title', 'file selection')}: {e}")
+        return None
 
 class HubAPI:
     """ API for the Amlex Admin Hub.
     This class provides methods to interact with the hub from JavaScript.
     """
+    def __init__(self, job_engine=None):
+        # Underscored so pywebview doesn't expose the engine to JavaScript
+        self._jobs = job_engine or get_job_engine()
+        self._forms = FormCache(FORM_CACHE_SIZE)
+
+    def prepare_form(self, form, case, lwy):
+        """
+        Validates the form objects and caches them under a revision ID.
+        Pass the revision to run / run_pipeline instead of a JSON string;
+        submitting the same form again returns the same revision.
+        """
+        try:
+            request = build_form_request(form, case, lwy)
+            return { "revision": self._forms.store(request) }
+        except Exception as e:
+            log(f"Error preparing form data: {str(e)}")
+            return { "error": str(e) }
+
     def format_form(self, form, case, lwy):
-        """ Returns structured JSON. """
+        """ Returns structured JSON. Kept for callers that still send JSON strings. """
         try:
             data = {
                 "form": form,
@@ -22,119 +72,233 @@ class HubAPI:
             return { "error": str(e) }
 
     def get_lawyers(self):
-        """ Retrieves the list of lawyers from a JSON file.
+        """ Retrieves the list of lawyers from the cached lawyer directory.
         """
-        lawyers_path = os.path.join(WEB_DIR, "js", "lawyers.json")
         try:
-            with open(lawyers_path, "r", encoding="utf-8") as f:
-                data = json.load(f)
-                return data["lawyers"]
+            return get_lawyer_directory().all()
         except Exception as e:
             return {"error": str(e)}
         
     def select_timesheet_file(self):
         """Open a file dialog to select timesheet file and return the full path."""
-        try:
-            import tkinter as tk
-            from tkinter import filedialog
-            
-            root = tk.Tk()
-            root.withdraw()  # Hide the main window
-            root.attributes('-topmost', True)  # Bring dialog to front
-            
-            file_path = filedialog.askopenfilename(
-                title="Select Timesheet File",
+        return ask_path(
+            "open",
+            title="Select Timesheet File",
+            filetypes=[
+                ("Excel files", "*.xlsx *.xls"),
+                ("All files", "*.*")
+            ],
+            initialdir=r"\\AMNAS\amlex\Admin"  # Start in your admin directory
+        )
+
+    def select_batch_manifest(self):
+        """Open a file dialog to select a batch manifest (CSV or JSON) and return its path."""
+        return ask_path(
+            "open",
+            title="Select Batch Manifest",
+            filetypes=[
+                ("Manifest files", "*.csv *.json"),
+                ("All files", "*.*")
+            ]
+        )
+
+    def select_matter_list(self, resume=False):
+        """
+        Open a file dialog for a PCLaw batch: a matter list (CSV, JSON or text,
+        one matter per line), or the checkpoint of a stopped batch when resuming.
+        """
+        if resume:
+            return ask_path(
+                "open",
+                title="Select Batch Checkpoint",
                 filetypes=[
-                    ("Excel files", "*.xlsx *.xls"),
+                    ("Checkpoints", "*.checkpoint.json"),
                     ("All files", "*.*")
-                ],
-                initialdir=r"\\AMNAS\amlex\Admin"  # Start in your admin directory
+                ]
             )
-            
-            root.destroy()
-            return file_path if file_path else None
-            
-        except Exception as e:
-            print(f"Error in file selection: {e}")
-            return None    
+        return ask_path(
+            "open",
+            title="Select Matter List",
+            filetypes=[
+                ("Matter lists", "*.csv *.json *.txt"),
+                ("All files", "*.*")
+            ]
+        )
+
+    def select_output_folder(self):
+        """Open a folder dialog for batch output and return its path."""
+        return ask_path("folder", title="Select Output Folder")
     
     def run(self, script_name, json_data):
         """ 
-        Runs a specified module with the provided JSON input.
-        Now uses direct function calls instead of subprocess for speed.
+        Queues a specified module with the provided JSON input.
+        Returns a job ID right away; poll job_status / job_result for the outcome.
         """
         log(f"run() called with script_name: {script_name}")
         
         try:
-            # Parse the JSON blob once
-            data = json.loads(json_data)
+            # Resolve the form revision, or parse the JSON blob once
+            data = self._resolve_request(json_data)
             
             # Check if we have this module in our registry
             if script_name in MODULE_REGISTRY:
                 # Use the fast module registry approach
-                return run_module(script_name, data)
+                job_id = self._jobs.submit(script_name, data)
             else:
-                # Fall back to subprocess for any modules not yet converted
-                log(f"Module {script_name} not in registry, falling back to subprocess")
-                return self._run_subprocess(script_name, json_data)
+                # Fall back to the worker pool for any modules not yet converted
+                log(f"Module {script_name} not in registry, falling back to worker pool")
+                job_id = self._jobs.submit_call(script_name, self._run_in_worker, script_name, data)
+
+            return {"job_id": job_id, "status": "queued"}
                 
         except json.JSONDecodeError as e:
             return {"error": f"Invalid JSON: {str(e)}"}
         except Exception as e:
             return {"error": str(e)}
 
-    def _run_subprocess(self, script_name, json_data):
+    def run_pipeline(self, steps, json_data, stop_on_error=True):
         """
-        Legacy subprocess method for backward compatibility.
-        This is the old implementation, kept for modules not yet converted.
+        Queues several modules that share one parsed form, in a single call.
+        Steps are module names or dicts (see pipeline.normalize_steps).
+        Returns a job ID; the job result holds per-step results and timings.
         """
+        log(f"run_pipeline() called with steps: {steps}")
+
         try:
-            path = os.path.join(SRC_DIR, script_name + ".py")
-            if not os.path.exists(path):
-                return { "error": f"Script not found: {path}" }
-            
-            proc = subprocess.run(
-                [sys.executable, path],
-                input=json_data.encode("utf-8"),
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                check=True
-            )
-    
-            output = proc.stdout.decode("utf-8").strip()
-            
-            # Try to parse as JSON - look for the last complete JSON object in output
-            try:
-                # If there are multiple lines, try to find the JSON line
-                lines = output.split('\n')
-                json_line = None
-                
-                # Look for a line that starts with { or [
-                for line in reversed(lines):  # Start from the end
-                    line = line.strip()
-                    if line.startswith('{') or line.startswith('['):
-                        json_line = line
-                        break
-                    
-                if json_line:
-                    return json.loads(json_line)
-                else:
-                    # Try parsing the whole output
-                    return json.loads(output)
-                    
-            except json.JSONDecodeError:
-                # Not JSON, return as text
-                return { "output": output }
-    
-        except subprocess.CalledProcessError as e:
-            error_output = e.stderr.decode("utf-8").strip()
-            return { "error": f"Script failed: {error_output}" }
+            steps = normalize_steps(steps)
+            request = self._resolve_request(json_data)
+            job_id = self._jobs.submit_call(
+                "pipeline", run_pipeline, steps, request, stop_on_error,
+                lane=pipeline_lane(steps))
+            return {"job_id": job_id, "status": "queued"}
+
+        except json.JSONDecodeError as e:
+            return {"error": f"Invalid JSON: {str(e)}"}
         except Exception as e:
-            return { "error": str(e) }
+            return {"error": str(e)}
+
+    def find_availability(self, lawyer_ids, start_date, end_date, duration_minutes=60):
+        """
+        Queues a search for every free slot of the given lawyers between two
+        dates (YYYY-MM-DD). Returns a job ID; the job result maps lawyer IDs
+        to slots.
+        """
+        try:
+            data = {
+                "lawyerIds": lawyer_ids,
+                "startDate": start_date,
+                "endDate": end_date,
+                "durationMinutes": duration_minutes,
+            }
+            job_id = self._jobs.submit("availability", data)
+            return {"job_id": job_id, "status": "queued"}
+        except Exception as e:
+            return {"error": str(e)}
+
+    def find_earliest_availability(self, case_type, location, start_date, end_date,
+                                   duration_minutes=60, limit=10):
+        """
+        Queues a search for the earliest slots across every lawyer handling
+        case_type, honouring per-location unavailability. Returns a job ID;
+        the job result holds the ranked slots.
+        """
+        try:
+            data = {
+                "caseType": case_type,
+                "location": location,
+                "startDate": start_date,
+                "endDate": end_date,
+                "durationMinutes": duration_minutes,
+                "limit": limit,
+            }
+            job_id = self._jobs.submit("earliest_availability", data)
+            return {"job_id": job_id, "status": "queued"}
+        except Exception as e:
+            return {"error": str(e)}
+
+    def _resolve_request(self, payload):
+        """
+        Turns what the bridge received into a FormRequest: a revision ID from
+        prepare_form, an already-structured object, or a legacy JSON string.
+        """
+        if FormCache.is_revision(payload):
+            request = self._forms.get(payload)
+            if request is None:
+                raise ValueError(f"Unknown or expired form revision: {payload}")
+            return request
+        if isinstance(payload, FormRequest):
+            return payload
+        if isinstance(payload, dict):
+            return FormRequest(payload)
+        data = json.loads(payload)
+        return FormRequest(data) if isinstance(data, dict) else data
+
+    def job_status(self, job_id):
+        """ Returns status and progress of a job, plus its result once finished. """
+        return self._jobs.status(job_id)
+
+    def job_result(self, job_id, timeout=0):
+        """ Returns the job's result, waiting up to timeout seconds for it to finish. """
+        return self._jobs.result(job_id, timeout=timeout)
+
+    def cancel_job(self, job_id):
+        """ Requests cooperative cancellation of a job. """
+        return self._jobs.cancel(job_id)
+
+    def list_jobs(self):
+        """ Returns a snapshot of recent jobs. """
+        return self._jobs.list_jobs()
+
+    def ocr_stats(self):
+        """
+        OCR counters for the session: engine calls and time, result cache
+        hits and hit rate, and how many PCLaw values came from UIA vs OCR
+        (all of them OCR while PCLAW_UIA_FIRST is off).
+        """
+        try:
+            from uia_extract import get_extraction_stats
+            return {
+                "engine": get_ocr_engine().summary(),
+                "extraction": get_extraction_stats().summary(),
+            }
+        except Exception as e:
+            return {"error": str(e)}
+
+    def pclaw_stats(self):
+        """
+        PCLaw connection counters for the session: cached handle hits, window
+        scans, stale handles, connects and invalidations after failed matters.
+        """
+        try:
+            from pclaw_connection import get_pclaw_connection
+            return get_pclaw_connection().summary()
+        except Exception as e:
+            return {"error": str(e)}
+
+    def _run_in_worker(self, script_name, data):
+        """
+        Runs a script that isn't in the registry on a warm worker process.
+        Replaces the old one-interpreter-per-call subprocess fallback.
+        """
+        path = os.path.join(SRC_DIR, script_name + ".py")
+        if not os.path.exists(path):
+            return { "error": f"Script not found: {path}" }
+        return get_worker_pool().call(script_name, data)
+
+def on_started():
+    """ Runs in the background once the window is up. """
+    # Sweep temp documents left behind by earlier sessions
+    get_temp_reaper()
+    if PREWARM_MODULES:
+        prewarm_modules()
+    if WORD_POOL_PREWARM:
+        get_word_pool().warm()
 
 def main():
     """ Main function to start the webview application.
     """
+    import webview
+
     api = HubAPI()
     webview.create_window(
         "Amlex Admin Hub",
@@ -144,7 +308,20 @@ def main():
         height=700,
         x = 875,
         y = 0)
-    webview.start(debug=False, gui='edgechromium')
+    # Heavy automation modules and Word are started lazily; optionally warm
+    # them up in the background once the window is up
+    webview.start(on_started, debug=False, gui='edgechromium')
+    get_job_engine().shutdown()
+    shutdown_worker_pool()
+    shutdown_outlook_session()
+    shutdown_word_pool()
+    shutdown_temp_reaper()
+    shutdown_ocr_engine()
 
 if __name__ == '__main__':
-    main()
\ No newline at end of file
+    if WORKER_FLAG in sys.argv:
+        # Frozen builds start their worker processes through this entry point
+        from worker_pool import serve
+        serve()
+    else:
+        main()
\ No newline at end of file
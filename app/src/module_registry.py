@@ -1,47 +1,91 @@
 from config import log
-# Import all converted modules
-from emailConfirmation import process_email_confirmation
-from emailContract import process_email_contract
-from emailFollowup import process_email_followup
-from emailReply import process_email_reply
-from emailReview import process_email_review
-from scheduler import process_scheduler
-from new_matter import process_new_matter
-from close_matter import process_close_matter
-from bill_matter import process_bill_matter
-from wordContract import process_word_contract
-from wordReceipt import process_word_receipt
-from time_entries import process_time_entries
+import importlib
+import threading
 
+# Each entry maps a script name to (module name, entry function name).
+# Modules are only imported the first time they are dispatched to, so the hub
+# window can open before pywinauto, pytesseract, win32com & co. are loaded.
+# A plain callable is also accepted, which is handy for stubs.
 MODULE_REGISTRY = {
-    "emailConfirmation": process_email_confirmation,
-    "emailContract": process_email_contract,
-    "emailFollowup": process_email_followup,
-    "emailReply": process_email_reply,
-    "emailReview": process_email_review,
-    "scheduler": process_scheduler,
-    "new_matter": process_new_matter,
-    "close_matter": process_close_matter,
-    "bill_matter": process_bill_matter,
-    "wordContract": process_word_contract,
-    "wordReceipt": process_word_receipt,
-    "time_entries": process_time_entries,
+    "emailConfirmation": ("emailConfirmation", "process_email_confirmation"),
+    "emailContract": ("emailContract", "process_email_contract"),
+    "emailFollowup": ("emailFollowup", "process_email_followup"),
+    "emailReply": ("emailReply", "process_email_reply"),
+    "emailReview": ("emailReview", "process_email_review"),
+    "scheduler": ("scheduler", "process_scheduler"),
+    "new_matter": ("new_matter", "process_new_matter"),
+    "close_matter": ("close_matter", "process_close_matter"),
+    "batch_close_matter": ("close_matter", "process_batch_close_matter"),
+    "bill_matter": ("bill_matter", "process_bill_matter"),
+    "batch_bill_matter": ("bill_matter", "process_batch_bill_matter"),
+    "wordContract": ("wordContract", "process_word_contract"),
+    "wordReceipt": ("wordReceipt", "process_word_receipt"),
+    "time_entries": ("time_entries", "process_time_entries"),
+    "batch_documents": ("batch_documents", "process_batch_documents"),
+    "availability": ("availability", "process_availability"),
+    "earliest_availability": ("availability", "process_earliest_availability"),
 }
 
+# Resolved (descriptor, function) pairs, filled lazily by get_module_function.
+# Keeping the descriptor means re-registering a name picks up the new target.
+_resolved = {}
+_resolve_lock = threading.Lock()
+
+def get_module_function(script_name):
+    """
+    Returns the entry function for a registered script, importing its module
+    on first use.
+    """
+    entry = MODULE_REGISTRY[script_name]
+    if callable(entry):
+        return entry
+
+    cached = _resolved.get(script_name)
+    if cached and cached[0] == entry:
+        return cached[1]
+
+    # Imports are serialized so a pre-warm and a dispatch don't race on the
+    # same module
+    with _resolve_lock:
+        cached = _resolved.get(script_name)
+        if cached and cached[0] == entry:
+            return cached[1]
+        module_name, function_name = entry
+        module = importlib.import_module(module_name)
+        func = getattr(module, function_name)
+        _resolved[script_name] = (entry, func)
+        return func
+
+def prewarm_modules(script_names=None):
+    """
+    Imports registered modules ahead of time.
+    Meant to run in the background once the UI is shown; failures are only
+    logged since the module will be retried on dispatch anyway.
+    """
+    names = script_names or list(MODULE_REGISTRY)
+    for script_name in names:
+        if script_name not in MODULE_REGISTRY:
+            continue
+        try:
+            get_module_function(script_name)
+        except Exception as e:
+            log(f"Pre-warm failed for {script_name}: {str(e)}")
+    log(f"Pre-warmed {len(names)} module(s)")
+
 def run_module(script_name, json_data):
     """
     Run a module function directly instead of as a subprocess.
     """
     log(f"Running module: {script_name}")
-    
+
     if script_name not in MODULE_REGISTRY:
         return {"error": f"Module not found: {script_name}"}
-    
+
     try:
-        module_function = MODULE_REGISTRY[script_name]
+        module_function = get_module_function(script_name)
         result = module_function(json_data)
         return result
-        
+
     except Exception as e:
         log(f"Error running module {script_name}: {str(e)}")
-        return {"error": str(e)}
\ No newline at end of file
+        return {"error": str(e)}
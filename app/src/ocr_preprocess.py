@@ -0,0 +1,336 @@
+from config import *
+from ocr_engine import get_ocr_engine, OcrEngine, make_backend, DEFAULT_CONFIG
+import re
+import json
+import time
+import numpy as np
+
+# ----------------------------
+# OCR preprocessing for PCLaw screens
+# ----------------------------
+# Screenshots of PCLaw are small, anti-aliased colour text on grey. Tesseract
+# does much better on large black-on-white text with tight margins, and much
+# faster on small images, so every crop goes through:
+#   grayscale -> adaptive threshold -> trim blank margins -> integer upscale
+# (thresholding before upscaling gives the same binary image, 9x cheaper).
+# Each kind of field then gets its own Tesseract profile: a single line and a
+# character whitelist for amounts and dates, a text block for the rest.
+# All of this is behind OCR_PREPROCESS in config, off because benchmark()
+# says so (see config): at PCLaw's 11 px the threshold breaks thin strokes
+# (0.00 reads ".)", 9 reads 5) and the raw crop is both right and faster.
+# With it off, read_text / read_regions send the raw crop with the original
+# "--oem 3 --psm 6" config.
+
+LUMA = np.array([0.299, 0.587, 0.114], dtype=np.float32)
+
+class OcrProfile:
+    """ How one kind of field is prepared, recognized and parsed. """
+    __slots__ = ("name", "psm", "whitelist", "scale", "window", "offset", "border", "parse")
+
+    def __init__(self, name, psm, whitelist=None, scale=3, window=15, offset=10, border=8, parse=None):
+        self.name = name
+        self.psm = psm
+        self.whitelist = whitelist
+        self.scale = scale
+        self.window = window
+        self.offset = offset
+        self.border = border
+        self.parse = parse or (lambda text: " ".join(text.split()))
+
+    @property
+    def config(self):
+        config = f"--oem 3 --psm {self.psm}"
+        if self.whitelist:
+            config += f" -c tessedit_char_whitelist={self.whitelist}"
+        return config
+
+def parse_amount(text):
+    """ 1,234.56 / -12.00 / (12.00) / $0.00 as a float, None when unreadable. """
+    cleaned = text.strip().replace(",", "").replace("$", "").replace(" ", "")
+    negative = cleaned.startswith("(") and cleaned.endswith(")")
+    match = re.search(r"-?\d+(?:\.\d{1,2})?", cleaned)
+    if not match:
+        return None
+    value = float(match.group(0))
+    return -abs(value) if negative else value
+
+def parse_date(text):
+    """ First YYYY/MM/DD (or YYYY-MM-DD) as YYYY/MM/DD, None when unreadable. """
+    match = re.search(r"(20\d{2})[/-](\d{1,2})[/-](\d{1,2})", text.replace(" ", ""))
+    if not match:
+        return None
+    y, m, d = (int(g) for g in match.groups())
+    if not (1 <= m <= 12 and 1 <= d <= 31):
+        return None
+    return f"{y:04d}/{m:02d}/{d:02d}"
+
+PROFILES = {
+    # psm 7: the crop is one line of text
+    "amount": OcrProfile("amount", psm=7, whitelist="0123456789.,-()$", parse=parse_amount),
+    "date": OcrProfile("date", psm=7, whitelist="0123456789/-", parse=parse_date),
+    # psm 6: a block of lines, e.g. the whole balance area
+    "text": OcrProfile("text", psm=6, scale=2),
+}
+
+# ----------------------------
+# Vectorized steps
+# ----------------------------
+
+def to_gray(image):
+    """ float32 luminance (0-255) of a PIL image or an RGB/gray array. """
+    pixels = np.asarray(image.convert("RGB") if hasattr(image, "convert") else image, dtype=np.float32)
+    if pixels.ndim == 3:
+        pixels = pixels[..., :3] @ LUMA
+    return pixels
+
+def adaptive_threshold(gray, window=15, offset=10):
+    """
+    Ink mask: pixels darker than the mean of their window x window
+    neighbourhood by more than offset. Window sums come from an integral
+    image, so the cost doesn't depend on the window size. Light text on a
+    dark background is inverted first.
+    """
+    if np.median(gray) < 128:
+        gray = 255.0 - gray
+    pad = window // 2
+    padded = np.pad(gray, pad, mode="edge")
+    integral = np.pad(padded, ((1, 0), (1, 0))).cumsum(0).cumsum(1)
+    sums = (integral[window:, window:] - integral[:-window, window:]
+            - integral[window:, :-window] + integral[:-window, :-window])
+    mean = sums / (window * window)
+    return gray < mean - offset
+
+def trim(mask):
+    """ The mask cropped to its inked rows and columns; empty when there is no ink. """
+    rows = np.flatnonzero(mask.any(axis=1))
+    cols = np.flatnonzero(mask.any(axis=0))
+    if rows.size == 0:
+        return mask[:0, :0]
+    return mask[rows[0]:rows[-1] + 1, cols[0]:cols[-1] + 1]
+
+def upscale(mask, factor):
+    """ Integer nearest-neighbour upscaling. """
+    if factor <= 1:
+        return mask
+    return mask.repeat(factor, axis=0).repeat(factor, axis=1)
+
+def to_image(mask, border=8):
+    """ Black-on-white 8-bit PIL image of the mask with a white border. """
+    from PIL import Image
+    pixels = np.where(mask, 0, 255).astype(np.uint8)
+    pixels = np.pad(pixels, border, constant_values=255)
+    return Image.fromarray(pixels, mode="L")
+
+def prepare(image, profile):
+    """ Runs the whole pipeline; returns None when the crop has no text. """
+    mask = trim(adaptive_threshold(to_gray(image), profile.window, profile.offset))
+    if mask.size == 0:
+        return None
+    return to_image(upscale(mask, profile.scale), profile.border * profile.scale)
+
+def crop_box(image, box):
+    """ Crops (left, top, right, bottom) fractions of a PIL image. """
+    width, height = image.size
+    return image.crop((int(width * box[0]), int(height * box[1]),
+                       int(width * box[2]), int(height * box[3])))
+
+# ----------------------------
+# Reading fields
+# ----------------------------
+
+def for_ocr(image, profile, preprocess=None):
+    """
+    (image, config) to send to Tesseract: the preprocessed crop and the
+    profile's config when preprocessing is on (image is None when the crop
+    has no ink), else the raw crop and the default config.
+    """
+    if preprocess is None:
+        # Explicit preprocess=False reads are re-reads of a crop already saved
+        capture(image, profile.name)
+    if not (OCR_PREPROCESS if preprocess is None else preprocess):
+        return image, DEFAULT_CONFIG
+    return prepare(image, profile), profile.config
+
+def read_text(image, profile="text", engine=None, preprocess=None):
+    """ OCR of a whole region, as raw text (see for_ocr). """
+    profile = PROFILES[profile] if isinstance(profile, str) else profile
+    image, config = for_ocr(image, profile, preprocess)
+    if image is None:
+        return ""
+    return (engine or get_ocr_engine()).read(image, config=config)
+
+def read_regions(image, regions, engine=None, preprocess=None):
+    """
+    OCRs several independent regions of one screenshot at once, on the
+    engine's worker pool. regions maps a name to (box, profile name), box
+    being fractions of the image. Returns {"values": {name: parsed value},
+    "texts": {name: raw text}, "ms": {name: OCR ms}, "wall_ms": total}.
+    A preprocessed region with no ink is None / "" without going to Tesseract.
+    """
+    engine = engine or get_ocr_engine()
+    started = time.perf_counter()
+    prepared = {name: for_ocr(crop_box(image, box), PROFILES[profile_name], preprocess)
+                for name, (box, profile_name) in regions.items()}
+    names = [name for name, (img, _) in prepared.items() if img is not None]
+    results = engine.read_parallel([prepared[name] for name in names])
+
+    texts = {name: "" for name in regions}
+    ms = {name: 0.0 for name in regions}
+    for name, (text, elapsed) in zip(names, results):
+        texts[name] = text
+        ms[name] = round(elapsed, 1)
+    values = {name: PROFILES[regions[name][1]].parse(texts[name]) if texts[name] else None for name in regions}
+    return {"values": values, "texts": texts, "ms": ms,
+            "wall_ms": round((time.perf_counter() - started) * 1000, 1)}
+
+# ----------------------------
+# Fixture corpus
+# ----------------------------
+# A corpus folder holds PNG crops and corpus.json: [{"file", "profile",
+# "expected"}]. With OCR_CAPTURE_DIR set, every crop PCLaw sends to OCR is
+# saved there with expected None, to be filled in by hand; entries still
+# unlabelled are left out of the benchmark. OCR_CORPUS_DIR holds a labelled
+# corpus from make_synthetic_corpus(): amounts and dates drawn the way
+# PCLaw's dialogs draw them, in Tahoma where it is installed (the committed
+# one was rendered on Linux, in DejaVu Sans at the same 11 px). Captured
+# crops, once labelled, take precedence over it.
+
+OCR_CORPUS_DIR = os.path.join(SRC_DIR, "ocr_corpus")
+
+def load_corpus(folder=OCR_CORPUS_DIR):
+    with open(os.path.join(folder, "corpus.json"), "r", encoding="utf-8") as f:
+        return json.load(f)
+
+def save_fixture(image, profile, expected, folder=OCR_CORPUS_DIR, name=None):
+    """ Adds one captured crop and its true value to the corpus. """
+    os.makedirs(folder, exist_ok=True)
+    path = os.path.join(folder, "corpus.json")
+    entries = load_corpus(folder) if os.path.exists(path) else []
+    name = name or f"{profile}_{len(entries) + 1:04d}.png"
+    image.save(os.path.join(folder, name))
+    entries.append({"file": name, "profile": profile, "expected": expected})
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(entries, f, indent=1)
+    return name
+
+def capture(image, profile):
+    """ Saves a crop about to be OCR'd to OCR_CAPTURE_DIR, when set. """
+    if not OCR_CAPTURE_DIR:
+        return
+    try:
+        save_fixture(image, profile, None, folder=OCR_CAPTURE_DIR,
+                     name=f"{profile}_{time.strftime('%Y%m%d_%H%M%S')}_{time.perf_counter_ns() % 10**6:06d}.png")
+    except Exception as e:
+        log(f"Could not save OCR crop: {e}")
+
+def pclaw_font(size=11):
+    """
+    The font PCLaw draws its fields in (Tahoma 8pt, 11 px at 96 dpi), else
+    the closest sans serif there is.
+    """
+    from PIL import ImageFont
+    for name in ("tahoma.ttf", "Tahoma.ttf", "DejaVuSans.ttf"):
+        try:
+            return ImageFont.truetype(name, size)
+        except OSError:
+            continue
+    return ImageFont.load_default()
+
+def make_synthetic_corpus(folder, count=80, seed=7):
+    """
+    Renders amounts and dates the way PCLaw shows them: dark anti-aliased
+    text in PCLaw's font, amounts right-aligned and dates left-aligned in a
+    field on the grey dialog background, slightly blurred like ClearType.
+    """
+    import random
+    from PIL import Image, ImageDraw, ImageFilter
+    rng = random.Random(seed)
+    font = pclaw_font()
+    os.makedirs(folder, exist_ok=True)
+    entries = []
+    for index in range(count):
+        if index % 2:
+            expected = f"20{rng.randint(19, 26)}/{rng.randint(1, 12):02d}/{rng.randint(1, 28):02d}"
+            profile = "date"
+        else:
+            amount = rng.choice([0.0, 0.0, rng.uniform(-500, 500), rng.uniform(0, 25000)])
+            expected = f"({abs(amount):,.2f})" if amount < 0 and rng.random() < 0.5 else f"{amount:,.2f}"
+            profile = "amount"
+        background = tuple(rng.randint(212, 240) for _ in range(3))
+        ink = tuple(rng.randint(0, 60) for _ in range(3))
+        image = Image.new("RGB", (rng.randint(84, 110), rng.randint(17, 21)), background)
+        draw = ImageDraw.Draw(image)
+        width = draw.textlength(expected, font=font)
+        left = image.size[0] - width - rng.randint(2, 6) if profile == "amount" else rng.randint(2, 6)
+        draw.text((left, rng.randint(1, 4)), expected, fill=ink, font=font)
+        image = image.filter(ImageFilter.GaussianBlur(rng.uniform(0.2, 0.5)))
+        name = f"{profile}_{index:04d}.png"
+        image.save(os.path.join(folder, name))
+        entries.append({"file": name, "profile": profile, "expected": expected})
+    with open(os.path.join(folder, "corpus.json"), "w", encoding="utf-8") as f:
+        json.dump(entries, f, indent=1)
+    return entries
+
+def benchmark(folder=None, engine=None):
+    """
+    Per kind of field: the old path (raw colour crop, "--oem 3 --psm 6",
+    regex) against preprocessing plus the field's profile. Prints and
+    returns {profile: {path: {"correct", "total", "accuracy", "ms"}}}, ms
+    per field including preprocessing. Uses the captured corpus when there
+    is one, else the labelled synthetic one in OCR_CORPUS_DIR; without a
+    Tesseract backend only preprocessing is timed.
+    """
+    from PIL import Image
+    folder = folder or (OCR_CAPTURE_DIR if OCR_CAPTURE_DIR and os.path.exists(
+        os.path.join(OCR_CAPTURE_DIR, "corpus.json")) else OCR_CORPUS_DIR)
+    entries = load_corpus(folder)
+    unlabelled = sum(1 for e in entries if e["expected"] is None)
+    entries = [e for e in entries if e["expected"] is not None]
+    if unlabelled:
+        print(f"{unlabelled} captured crops have no expected value yet and are left out")
+    if not entries:
+        print("No labelled crops to measure.")
+        return {}
+    images = [Image.open(os.path.join(folder, e["file"])).convert("RGB") for e in entries]
+    print(f"{len(entries)} labelled fields from {folder}")
+
+    if engine is None:
+        try:
+            engine = OcrEngine(make_backend(OCR_BACKEND), cache_size=0)
+        except Exception as e:
+            engine = None
+            print(f"No Tesseract backend here ({e}); only preprocessing is timed.")
+
+    def raw(image, profile):
+        return profile.parse(engine.read(image))
+
+    def preprocessed(image, profile):
+        prepared = prepare(image, profile)
+        return profile.parse(engine.read(prepared, config=profile.config)) if prepared else None
+
+    results = {}
+    for profile_name in sorted({e["profile"] for e in entries}):
+        profile = PROFILES[profile_name]
+        fields = [(image, profile.parse(e["expected"])) for image, e in zip(images, entries)
+                  if e["profile"] == profile_name]
+        paths = (("raw", raw), ("preprocessed", preprocessed)) if engine else \
+            (("preprocessed", lambda image, profile: prepare(image, profile)),)
+        results[profile_name] = {}
+        for label, run in paths:
+            correct = 0
+            started = time.perf_counter()
+            for image, expected in fields:
+                correct += run(image, profile) == expected
+            ms = (time.perf_counter() - started) * 1000 / len(fields)
+            row = {"total": len(fields), "ms": round(ms, 2)}
+            if engine:
+                row.update(correct=correct, accuracy=round(correct / len(fields), 3))
+                print(f"  {profile_name:<7} {label:<13} accuracy {correct}/{len(fields)} "
+                      f"({correct / len(fields):.0%}), {ms:.1f} ms/field")
+            else:
+                print(f"  {profile_name:<7} {label:<13} {ms:.2f} ms/field")
+            results[profile_name][label] = row
+    return results
+
+if __name__ == "__main__":
+    benchmark()
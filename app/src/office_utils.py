@@ -2,10 +2,16 @@ from config import *
 import re
 import locale
 from time import sleep
-import win32clipboard as clipboard
-from win32com import client as COM
-from pywinauto.application import Application
-from pywinauto.findwindows import find_windows
+try:
+    # Windows only: the Outlook, Word, clipboard and window helpers need
+    # these, the formatting helpers (add_taxes, format_date...) don't
+    import win32clipboard as clipboard
+    from win32com import client as COM
+    from pywinauto.application import Application
+    from pywinauto.findwindows import find_windows
+except ImportError:
+    clipboard = COM = Application = find_windows = None
+from outlook_session import get_outlook_session
 
 # ----------------------------
 # Various Utilities
@@ -66,6 +72,25 @@ def focus_office_window(item):
         return False
 
 
+# ----------------------------
+# Outlook Drafts
+# ----------------------------
+
+def create_mail_draft(to, subject, html_body, attachments=()):
+    """ Opens an email draft through the shared Outlook session. """
+    def draft(outlook, namespace):
+        mail = outlook.CreateItem(0)  # 0 = olMailItem
+        mail.To = to
+        mail.Subject = subject
+        mail.HTMLBody = html_body
+        for path in attachments:
+            mail.Attachments.Add(path)
+        mail.Display()
+        focus_office_window(mail)
+
+    get_outlook_session().run(draft)
+
+
 # ----------------------------
 # Teams Meeting Block
 # ----------------------------
@@ -254,6 +279,29 @@ def word_hyperlink_email(doc, placeholder: str, email: str):
     else:
         log(f"[Error] Could not find placeholder for email: {placeholder}")
 
+def template_language(client_language: str) -> str:
+    """Template folder ("fr" or "en") for a client language like "Français" or "english"."""
+    return "fr" if (client_language or "").strip().lower().startswith("fr") else "en"
+
+def sanitize_pdf_path(pdf_path: str) -> str:
+    """Normalizes a chosen PDF path, creates its folder and strips invalid filename characters."""
+    pdf_path = os.path.normpath(pdf_path)  # Normalize path separators
+    pdf_dir = os.path.dirname(pdf_path)
+
+    # Check if directory exists, create if it doesn't
+    if not os.path.exists(pdf_dir):
+        os.makedirs(pdf_dir, exist_ok=True)
+
+    # Check if we can write to the directory
+    if not os.access(pdf_dir, os.W_OK):
+        raise Exception(f"No write permission to directory: {pdf_dir}")
+
+    # Ensure the filename doesn't have invalid characters
+    filename = os.path.basename(pdf_path)
+    for char in '<>:"/\\|?*':
+        filename = filename.replace(char, '_')
+    return os.path.join(pdf_dir, filename)
+
 
 # ----------------------------
 # Temp Cleanup
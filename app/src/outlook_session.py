@@ -0,0 +1,142 @@
+from config import log
+from com_thread import ComThread
+import threading
+import time
+
+def dispatch_outlook():
+    """ Connects to Outlook and logs on to MAPI. Returns (application, namespace). """
+    from win32com import client as COM
+    try:
+        outlook = COM.gencache.EnsureDispatch("Outlook.Application")
+    except Exception:
+        # The gen_py cache can be unusable in frozen builds; late binding works too
+        outlook = COM.Dispatch("Outlook.Application")
+    namespace = outlook.GetNamespace("MAPI")
+    namespace.Logon()
+    return outlook, namespace
+
+class OutlookSession:
+    """
+    Owns one Outlook application/namespace on a dedicated COM thread.
+    Work is passed in as func(outlook, namespace, *args) and runs on that
+    thread. The connection is health-checked and re-created when Outlook was
+    closed or restarted underneath us.
+    """
+    def __init__(self, factory=dispatch_outlook, health_interval=30.0, thread=None):
+        self._factory = factory
+        self.health_interval = health_interval
+        self._thread = thread or ComThread("OutlookSession")
+        self._outlook = None
+        self._namespace = None
+        self._checked_at = 0.0
+        self.stats = {"calls": 0, "connects": 0, "reconnects": 0, "health_checks": 0}
+
+    def run(self, func, *args, retries=1, timeout=None):
+        """ Runs func(outlook, namespace, *args) on the session thread and returns its result. """
+        return self._thread.call(self._run, func, args, retries, timeout=timeout)
+
+    def healthy(self):
+        """ Checks the connection from any thread. """
+        return self._thread.call(self._check)
+
+    def close(self):
+        """ Drops the COM references (Outlook itself keeps running) and stops the thread. """
+        if self._thread.running:
+            self._thread.call(self._disconnect)
+        self._thread.stop()
+
+    # --- Runs on the session thread ---
+
+    def _run(self, func, args, retries):
+        self.stats["calls"] += 1
+        outlook, namespace = self._ensure_connected()
+        try:
+            return func(outlook, namespace, *args)
+        except Exception as e:
+            # Only retry when the connection itself went bad; an error inside
+            # func with a healthy Outlook is a real error
+            if retries <= 0 or self._check():
+                raise
+            log(f"Outlook connection lost ({e}), reconnecting")
+            self.stats["reconnects"] += 1
+            self._disconnect()
+            return self._run(func, args, retries - 1)
+
+    def _ensure_connected(self):
+        if self._outlook is None:
+            self._connect()
+        elif time.monotonic() - self._checked_at > self.health_interval and not self._check():
+            log("Outlook health check failed, reconnecting")
+            self.stats["reconnects"] += 1
+            self._disconnect()
+            self._connect()
+        return self._outlook, self._namespace
+
+    def _connect(self):
+        self._outlook, self._namespace = self._factory()
+        self._checked_at = time.monotonic()
+        self.stats["connects"] += 1
+
+    def _check(self):
+        if self._outlook is None:
+            return False
+        self.stats["health_checks"] += 1
+        try:
+            # Any cross-process property read fails once Outlook is gone
+            self._namespace.CurrentUser.Name
+            self._checked_at = time.monotonic()
+            return True
+        except Exception:
+            return False
+
+    def _disconnect(self):
+        self._outlook = None
+        self._namespace = None
+
+_session = None
+_session_lock = threading.Lock()
+
+def get_outlook_session():
+    """ Returns the shared OutlookSession. """
+    global _session
+    with _session_lock:
+        if _session is None:
+            _session = OutlookSession()
+        return _session
+
+def shutdown_outlook_session():
+    with _session_lock:
+        if _session is not None:
+            _session.close()
+
+
+def benchmark(drafts=50, dispatch_delay=0.05):
+    """ Compares a Dispatch per email with one shared session, on FakeOutlook. """
+    from fakes import fake_outlook_factory
+    def make_draft(outlook, namespace, index):
+        mail = outlook.CreateItem(0)
+        mail.To = f"client{index}@example.com"
+        mail.Subject = "Benchmark"
+        mail.HTMLBody = "<p>Hello</p>"
+        mail.Display()
+        return mail.To
+
+    factory = fake_outlook_factory(dispatch_delay)
+    start = time.perf_counter()
+    for i in range(drafts):
+        outlook, namespace = factory()
+        make_draft(outlook, namespace, i)
+    per_call = (time.perf_counter() - start) / drafts * 1000
+
+    session = OutlookSession(factory=factory)
+    start = time.perf_counter()
+    for i in range(drafts):
+        session.run(make_draft, i)
+    shared = (time.perf_counter() - start) / drafts * 1000
+    session.close()
+
+    print(f"Dispatch per draft: {per_call:.2f} ms/draft")
+    print(f"Shared session:     {shared:.2f} ms/draft ({session.stats})")
+
+if __name__ == "__main__":
+    benchmark()
@@ -1,5 +1,9 @@
 from config import *
+from lawyer_directory import get_lawyer_directory
 import json
+import itertools
+import threading
+from collections import OrderedDict
 
 def read_json(file_path=None):
     """Reads JSON data from a file or standard input."""
@@ -21,9 +25,97 @@ def read_json(file_path=None):
         alert_error(f"Error reading JSON: {str(e)}")
         raise ValueError(f"Error reading JSON: {str(e)}") from e
 
+class FormRequest(dict):
+    """
+    Parsed form payload shared by several modules in one run.
+    Behaves like the plain dict the modules already expect, but caches the
+    split sections and client language so each step doesn't redo them.
+    """
+    __slots__ = ("_sections", "_language")
+
+    def __init__(self, data):
+        super().__init__(data)
+        self._sections = None
+        self._language = None
+
+    def sections(self):
+        if self._sections is None:
+            self._sections = (self["form"], self["case"], self["lawyer"])
+        return self._sections
+
+    def language(self):
+        if self._language is None:
+            self._language = self["form"].get("clientLanguage", "English").lower()
+        return self._language
+
+    def with_form_updates(self, updates):
+        """ Returns a new request whose form section has the given fields set. """
+        data = dict(self)
+        data["form"] = {**self.get("form", {}), **updates}
+        return FormRequest(data)
+
+def build_form_request(form, case, lawyer):
+    """
+    Validates the form, case and lawyer objects sent by the bridge and wraps
+    them in a FormRequest, without a JSON round trip.
+    """
+    if not isinstance(form, dict):
+        raise ValueError(f"Form must be an object, got {type(form).__name__}")
+    if case is not None and not isinstance(case, dict):
+        raise ValueError(f"Case details must be an object, got {type(case).__name__}")
+    if lawyer is not None and not isinstance(lawyer, dict):
+        raise ValueError(f"Lawyer must be an object, got {type(lawyer).__name__}")
+    # Prefer the directory's record over the copy the client sent
+    lawyer = get_lawyer_directory().resolve(lawyer, form.get("lawyerId"))
+    return FormRequest({
+        "form": form,
+        "case": case or {},
+        "lawyer": lawyer,
+    })
+
+class FormCache:
+    """
+    Keeps the most recent FormRequests by revision ID, so follow-up actions on
+    the same form only send a short ID over the bridge.
+    Submitting a form identical to the latest one returns its revision.
+    """
+    PREFIX = "rev-"
+
+    def __init__(self, size=16):
+        self.size = size
+        self._entries = OrderedDict()
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def store(self, request):
+        """ Caches a FormRequest and returns its revision ID. """
+        with self._lock:
+            if self._entries:
+                latest_id, latest = next(reversed(self._entries.items()))
+                if latest == request:
+                    return latest_id
+            revision = f"{self.PREFIX}{next(self._ids)}"
+            self._entries[revision] = request
+            while len(self._entries) > self.size:
+                self._entries.popitem(last=False)
+            return revision
+
+    def get(self, revision):
+        with self._lock:
+            request = self._entries.get(revision)
+            if request is not None:
+                self._entries.move_to_end(revision)
+            return request
+
+    @classmethod
+    def is_revision(cls, value):
+        return isinstance(value, str) and value.startswith(cls.PREFIX)
+
 def split_data(data):
     """Splits JSON data into form, case, and lawyer sections."""
     try:
+        if isinstance(data, FormRequest):
+            return data.sections()
         form = data["form"]
         case = data["case"]
         lawyer = data["lawyer"]
@@ -89,11 +181,8 @@ def load_consultation_fields(data):
         else:
             default_rate = "A"
 
-        # Determine Responsible Lawyer: if not MM, DH, or TG, use "JR"
-        if lawyer_id not in ("MM", "DH", "TG"):
-            responsible_lawyer = "JR"
-        else:
-            responsible_lawyer = lawyer_id
+        # Determine Responsible Lawyer from the directory, "JR" by default
+        responsible_lawyer = get_lawyer_directory().responsible_lawyer(lawyer_id)
 
         law_types = {
             "divorce": "mat",
@@ -139,6 +228,8 @@ def load_consultation_fields(data):
 
 def get_language(data):
     """ Returns the client language from the JSON data. """
+    if isinstance(data, FormRequest) and "form" in data:
+        return data.language()
     form, _, _ = split_data(data)
     return form.get("clientLanguage", "English").lower()
 
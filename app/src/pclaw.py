@@ -1,22 +1,30 @@
 from config import *
 from parse_json import read_json
+from pclaw_connection import get_pclaw_connection
+from ocr_preprocess import read_text, read_regions, crop_box
+from uia_extract import extract_values, record_ocr
+from job_engine import JobCancelled
+from wait_engine import wait_for, get_waiter, new_window, window_gone, window_closed, region_stable, close_matter_loaded, preview_ready
 from datetime import datetime
-from time import sleep
+from time import sleep, perf_counter
 import re
-import pytesseract
 from pyperclip import copy
 from pyautogui import screenshot
-from pywinauto.application import Application
 from pywinauto.controls.uiawrapper import UIAWrapper
-from pywinauto.findwindows import find_windows
 from pywinauto.keyboard import send_keys
 
+CLOSE_MATTER_TITLE = "Close Matter"
+REGISTER_TITLE = "Register.*"
+REGISTER_DIALOG = "Register..."
+# Bottom of the Close Matter dialog, where the balances are drawn (left, top, right, bottom)
+BALANCE_BOX = (0.05, 0.70, 0.95, 0.98)
+
 def connect_to_pclaw():
-    """ Connects to the PCLaw Enterprise application and returns the main window. """
-    hwnds = find_windows(title_re=".*PCLaw® Enterprise.*")
-    app = Application(backend="uia").connect(handle=hwnds[0])
-    main_win = app.window(handle=hwnds[0])
-    return main_win
+    """
+    Returns the PCLaw Enterprise main window. The handle and connection are
+    cached and only looked up again once the window is gone.
+    """
+    return get_pclaw_connection().window()
 
 def startup():
     """ Connects to PCLaw and sets focus. """
@@ -89,15 +97,76 @@ def register_matter(matter_number: str):
     sleep(0.5)
     send_keys("{ENTER}")
 
-def bill_matter(app, matter_number: str, options: bool = False):
-    """ Opens the Bill Matter dialog and fill with matter number and date. """
+class StepTimer:
+    """ Seconds spent in each named step of a PCLaw sequence. """
+    def __init__(self):
+        self.timings = {}
+        self._last = perf_counter()
+
+    def mark(self, step):
+        now = perf_counter()
+        self.timings[step] = round(now - self._last, 2)
+        self._last = now
+
+# The steps of bill_matter in order; StepTimer marks each one as it ends, so
+# the first unmarked step is the one that failed
+BILL_STEPS = ("register", "read", "bill_dialog", "settings", "preview", "print", "refresh")
+
+def bill_matter(app, matter_number: str, options: bool = False, notify: bool = True):
+    """
+    Opens the Bill Matter dialog and fill with matter number and date.
+    Returns {"status": "billed", "skipped" or "needs_review", "reason",
+    "step", "date", "trust", "retainer", "timings"}. With notify=False no
+    message box is shown and a skipped matter has its Register closed, so
+    billing runs can carry on.
+    A failure before the bill dialog's OK is raised with the step it happened
+    in; the matter can safely be billed again. Once OK is clicked the bill
+    exists, so a later failure returns "needs_review" instead of raising: the
+    bill must be checked by hand, never created a second time.
+    """
+    timer = StepTimer()
+    result = {"status": "skipped", "reason": "", "step": "", "date": None,
+              "trust": None, "retainer": None, "timings": timer.timings}
+    try:
+        _bill_matter(app, matter_number, options, notify, timer, result)
+    except JobCancelled:
+        if "bill_dialog" not in timer.timings:
+            raise
+        result.update(status="needs_review", step=failed_step(timer),
+                      reason=f"cancelled at {failed_step(timer)} after the bill was created")
+    except Exception as e:
+        step = failed_step(timer)
+        if "bill_dialog" not in timer.timings:
+            raise RuntimeError(f"failed at {step}: {e}") from e
+        log(f"Matter {matter_number} billed but failed at {step}: {e}")
+        result.update(status="needs_review", step=step, reason=f"failed at {step} after the bill was created: {e}")
+    return result
+
+def failed_step(timer):
+    """ The bill step that was running when timer stopped being marked. """
+    return next((step for step in BILL_STEPS if step not in timer.timings), BILL_STEPS[-1])
+
+def _bill_matter(app, matter_number, options, notify, timer, result):
+    """ The bill_matter sequence; fills result as it goes. """
     register_matter(matter_number)
     sleep(3)
-
-    date = ocr_get_latest_date()
+    timer.mark("register")
+
+    register = read_register()
+    timer.mark("read")
+    result.update(
+        reason=register["reason"],
+        date=register["date"],
+        trust=register["trust"],
+        retainer=register["retainer"],
+    )
+    date = register["date"]
     if not date:
-        print("[Error] No date found for billing. Aborting.")
-        alert_error("No date found for billing. Aborting.")
+        print(f"[Error] No date found for billing ({register['reason']}). Aborting.")
+        if notify:
+            alert_error("No date found for billing. Aborting.")
+        else:
+            close_register()
         return
 
     # Fill basic fields
@@ -117,26 +186,35 @@ def bill_matter(app, matter_number: str, options: bool = False):
 
     # Potential extra logic here: what if they want to use options?
     # If the dialog has options, we can handle them here.
+    ui = get_waiter().ui
+    before = ui.top_windows()
     if(options):
         pass
     else:
         # Click OK
         app.child_window(title="OK", control_type="Button").click_input()
 
-    # Wait for new dialog to appear: pclaw piece of junk
-    sleep(15)
+    # From here on the bill exists: see bill_matter
+    timer.mark("bill_dialog")
+
+    # Wait for the bill settings dialog to appear: pclaw piece of junk
+    wait_for("bill_matter.settings", new_window(before), timeout=15)
+    timer.mark("settings")
     # Validate default bill settings
+    before = ui.top_windows()
     send_keys("%m")
     send_keys("{ENTER}")
 
-    # Wait for the preview dialog to appear
-    sleep(6)
+    # Wait for the preview to open and finish drawing
+    wait_for("bill_matter.preview", preview_ready(before), timeout=6)
+    timer.mark("preview")
     # print: send that shortcut enough times to trigger
     for _ in range(5):
         send_keys("%p")
 
     # Wait for the print to complete
     sleep(2)
+    timer.mark("print")
 
     # Refresh
     send_keys("{ENTER}")
@@ -148,12 +226,23 @@ def bill_matter(app, matter_number: str, options: bool = False):
     
     # Final confirmation
     sleep(4)
-    alert_info(f"Successfully billed matter {matter_number} in PCLaw.")
+    timer.mark("refresh")
+    if notify:
+        alert_info(f"Successfully billed matter {matter_number} in PCLaw.")
+    result.update(status="billed", reason="")
 
-def close_matter(matter_number: str):
+def close_register():
+    """ Escapes out of the Register and waits for it to go away. """
+    send_keys("{ESC}")
+    wait_for("register.close", window_gone(REGISTER_TITLE), timeout=5, required=False)
+
+def close_matter(matter_number: str, notify: bool = True):
     """
     Opens the Close Matter dialog for the chosen matter.
-    Also checks visually if closable or not
+    Also checks visually if closable or not.
+    Returns {"status": "closed" or "skipped", "balances": {...}}; with
+    notify=False no message box is shown and a matter with a balance has
+    its dialog cancelled, so batches can carry on.
     """
     close_matter_dialog()
     sleep(0.5)
@@ -164,13 +253,15 @@ def close_matter(matter_number: str):
     send_keys('^v')
     send_keys("{TAB}")
 
-    # Let PCLaw load like the atrocious software it is
-    sleep(36)
+    # Let PCLaw load like the atrocious software it is: OK enabled again
+    # and the balances no longer redrawing
+    wait_for("close_matter.load", close_matter_loaded(CLOSE_MATTER_TITLE, BALANCE_BOX), timeout=36)
     send_keys("{ENTER}")
 
     # Run OCR to check balances
     # Before closing, we need to confirm balances are zero
-    balance = ocr_has_balance()
+    balances = read_balances() or {}
+    balance = not balances_are_zero(balances)
 
     if not balance:
         # Fill window, assume "No physical file"
@@ -191,23 +282,67 @@ def close_matter(matter_number: str):
         sleep(0.5)
         send_keys("{ENTER}")
         sleep(1.5)
-        alert_info(f"Successfully closed matter {matter_number} in PCLaw.")
+        if notify:
+            alert_info(f"Successfully closed matter {matter_number} in PCLaw.")
+        return {"status": "closed", "balances": balances}
     else:
-        alert_warning("[Error] Remaining balance is not zero. Matter should not be closed until all balances are cleared.")
+        if notify:
+            alert_warning("[Error] Remaining balance is not zero. Matter should not be closed until all balances are cleared.")
+        else:
+            cancel_close_matter_dialog()
+        return {"status": "skipped", "balances": balances}
 
-def ocr_has_balance():
-    """ Uses OCR to determine financial data from the Close Matter dialog."""
-    pytesseract.pytesseract.tesseract_cmd = os.path.join(SRC_DIR, "tesseract", "tesseract.exe")
+def cancel_close_matter_dialog():
+    """ Escapes out of the Close Matter dialog and waits for it to go away. """
+    send_keys("{ESC}")
+    wait_for("close_matter.cancel", window_gone(CLOSE_MATTER_TITLE), timeout=5)
+
+BALANCE_LABELS = ["Unbd D", "A/R", "Gen Rtnr", "Trust"]
+# How each label reads in the UIA tree
+BALANCE_LABEL_PATTERNS = {"Unbd D": r"^Unbd\s*D", "A/R": r"^A\S?R\b", "Gen Rtnr": r"^Gen\b", "Trust": r"^Trust\b"}
+REGISTER_LABEL_PATTERNS = {"trust": r"^Trust\b", "retainer": r"^Gen\b"}
 
-    LABELS = ["Unbd D", "A/R", "Gen Rtnr", "Trust"]
+def balances_are_zero(amounts):
+    """ True only when every balance was read and is zero. """
+    return bool(amounts) and all(value == 0 for value in amounts.values())
 
+def read_balances():
+    """
+    Close Matter balances from the UIA tree, with OCR only for the values
+    the tree doesn't expose. Returns {label: amount or None}, or None when
+    the dialog can't be found. OCR only unless PCLAW_UIA_FIRST is on.
+    """
+    if not PCLAW_UIA_FIRST:
+        started = perf_counter()
+        values = ocr_read_balances()
+        if values is not None:
+            record_ocr("close_matter", values, (perf_counter() - started) * 1000)
+        return values
+    try:
+        close_win = get_dialog(connect_to_pclaw(), CLOSE_MATTER_TITLE)
+    except Exception as e:
+        print("[Error] Failed to locate Close Matter window:", e)
+        return None
+    values, _ = extract_values("close_matter", close_win.wrapper_object(), BALANCE_LABEL_PATTERNS,
+                               lambda missing: ocr_read_balances())
+    return values
+
+def ocr_read_balances():
+    """
+    Uses OCR to read the financial data from the Close Matter dialog.
+    Returns {label: amount or None when unreadable}, or None when the
+    dialog can't be found. The balances are one crop, read in one OCR call.
+    Reading Unbd D, A/R, Gen Rtnr and Trust from crops of their own through
+    read_regions was not done: their boxes can only be measured on the real
+    dialog, so Close Matter OCR doesn't run in parallel.
+    """
     # === Find the Close Matter Window ===
     try:
-        close_win = get_dialog(connect_to_pclaw(), "Close Matter")
+        close_win = get_dialog(connect_to_pclaw(), CLOSE_MATTER_TITLE)
         close_win.set_focus()
     except Exception as e:
         print("[Error] Failed to locate Close Matter window:", e)
-        return False
+        return None
 
     # Get window bounds
     rect = close_win.rectangle()
@@ -215,10 +350,10 @@ def ocr_has_balance():
     width, height = right - left, bottom - top
 
     # Crop region = bottom ~25% of window where the financial data lives
-    crop_left = int(left + width * 0.05)
-    crop_right = int(left + width * 0.95)
-    crop_top = int(top + height * 0.70)
-    crop_bottom = int(top + height * 0.98)
+    crop_left = int(left + width * BALANCE_BOX[0])
+    crop_right = int(left + width * BALANCE_BOX[2])
+    crop_top = int(top + height * BALANCE_BOX[1])
+    crop_bottom = int(top + height * BALANCE_BOX[3])
     crop_width = crop_right - crop_left
     crop_height = crop_bottom - crop_top
 
@@ -229,11 +364,6 @@ def ocr_has_balance():
     # sc.save("debug_crop.png")
 
     # === OCR ===
-    custom_config = r'--oem 3 --psm 6'
-    text = pytesseract.image_to_string(sc, config=custom_config)
-    # print("==== OCR Text ====")
-    # print(text)
-
     # Extract function
     def extract_label_value(label, text):
         if label == "A/R":
@@ -256,68 +386,95 @@ def ocr_has_balance():
 
         return None
 
-    # Final result dictionary
-    amounts = {label: extract_label_value(label, text) for label in LABELS}
+    # Raw crop unless OCR_PREPROCESS is on
+    text = read_text(sc, "text")
+    # print("==== OCR Text ====")
+    # print(text)
+    amounts = {label: extract_label_value(label, text) for label in BALANCE_LABELS}
+    if OCR_PREPROCESS:
+        # A binarized 8.00 can read as 0.00 and pass as closable: keep only
+        # the amounts the raw crop reads the same
+        raw_text = read_text(sc, "text", preprocess=False)
+        for label, value in amounts.items():
+            if value != extract_label_value(label, raw_text):
+                amounts[label] = None
+    return amounts
+
+def ocr_has_balance():
+    """ Reads the Close Matter balances (UIA, then OCR) and reports any left."""
+    amounts = read_balances()
+    if amounts is None:
+        return False
 
     # === Check and Display ===
-    all_zero = True
     print("==== Extracted Amounts ====")
     for label, value in amounts.items():
         if value is None:
             print(f"{label}: Not found")
-            all_zero = False
         else:
             print(f"{label}: {value:.2f}")
-            if value != 0:
-                all_zero = False
 
-    if all_zero:
+    if balances_are_zero(amounts):
         print("\n[OK] All values are zero. Proceed.")
     else:
         print("\n[ERROR] Not all values are zero. Abort.")
 
-    balance = not all_zero
+    balance = not balances_are_zero(amounts)
     return balance
 
-def ocr_get_latest_date():
+EXPECTED_RETAINERS = (143.72, 402.41)
+
+def register_verdict(trust, retainer, latest_date):
     """
-    Uses OCR to determine latest date on the Register,
-    aborting if there is a trust balance.
+    Whether a matter can be billed from its Register values. Returns
+    {"date", "trust", "retainer", "reason"}; date is None and reason says
+    why when it can't ("trust_balance", "unexpected_gen_rtnr", "no_date").
     You need manual user checking when it comes to trusts.
     """
-    pytesseract.pytesseract.tesseract_cmd = os.path.join(SRC_DIR, "tesseract", "tesseract.exe")
+    result = {"date": None, "trust": trust, "retainer": retainer, "reason": balance_problem(trust, retainer)}
+    if result["reason"]:
+        return result
+    if not latest_date:
+        print("[Error] No valid dates found.")
+        result["reason"] = "no_date"
+    else:
+        print("[OK] Latest Date:", latest_date)
+        result["date"] = latest_date
+    return result
 
-    # === Locate Register window ===
+def balance_problem(trust, retainer):
+    """ Why trust / Gen Rtnr block billing, or "" when they don't. """
+    if trust is None or trust > 0:
+        print("[Error] Trust balance is not zero. Abort.")
+        return "trust_balance"
+    if retainer is None or retainer not in EXPECTED_RETAINERS:
+        print(f"[Error] Gen Rtnr is {retainer}, requiring manual verification. Abort.")
+        return "unexpected_gen_rtnr"
+    return ""
+
+def register_screenshot():
+    """ Screenshot of the whole Register window, or None if it can't be found. """
     try:
-        register_win = get_dialog(connect_to_pclaw(), "Register...")
+        register_win = get_dialog(connect_to_pclaw(), REGISTER_DIALOG)
         register_win.set_focus()
     except Exception as e:
         print("[Error] Failed to locate Register window:", e)
         return None
 
-    # === Screenshot bottom-left where "Trust" balance appears ===
     rect = register_win.rectangle()
     left, top, right, bottom = rect.left, rect.top, rect.right, rect.bottom
     width, height = right - left, bottom - top
+    return screenshot(region=(left, top, width, height))
 
-    # Take full Register window screenshot
-    full_screenshot = screenshot(region=(left, top, width, height))
-
-    # Crop
-    trust_crop = full_screenshot.crop((
-        0,                      # start from left
-        int(height * 0.75),     # lower 25%
-        int(width * 0.5),       # to middle
-        height                  # to bottom
-    ))
-
-    # Save for debugging
-    # trust_crop.save("debug_trust_crop.png")
-
-    trust_text = pytesseract.image_to_string(trust_crop, config='--oem 3 --psm 6')
-    # print("==== TRUST TEXT ====")
-    # print(trust_text)
+# Register crops, as fractions of the window: Trust / Gen Rtnr at the
+# bottom-left, the entry table in the upper half
+REGISTER_REGIONS = {
+    "balances": ((0, 0.75, 0.5, 1.0), "text"),
+    "dates": ((0, 0, 0.5, 0.5), "text"),
+}
 
+def register_balances_in(trust_text):
+    """ (trust, Gen Rtnr) found in the OCR text of the balances crop. """
     # Match for "Trust"
     trust_match = re.search(r"Trust[:\s]*(-?\d+(?:\.\d{1,2})?)", trust_text, re.IGNORECASE)
     trust_val = float(trust_match.group(1)) if trust_match else None
@@ -328,46 +485,98 @@ def ocr_get_latest_date():
 
     print("Trust Balance:", trust_val)
     print("Gen Rtnr :", retainer_val)
+    return trust_val, retainer_val
 
-    if trust_val is None or trust_val > 0:
-        print("[Error] Trust balance is not zero. Abort.")
-        return None
-    
-    if retainer_val is None or retainer_val not in (143.72, 402.41):
-        print(f"[Error] Gen Rtnr is {retainer_val}, requiring manual verification. Abort.")
-        return None
-
-    # === Screenshot top half (table rows) ===
-
-    # Just upper half, starting from left
-    table_crop = full_screenshot.crop((
-        0, 0,
-        int(width * 0.5), int(height * 0.5)
-    ))
-
-    # Save for debugging
-    # table_crop.save("debug_table_crop.png")
-
-    table_text = pytesseract.image_to_string(table_crop, config='--oem 3 --psm 6')
-    # print("==== TABLE TEXT ====")
-    # print(table_text)
-
-    # === Extract dates ===
+def register_dates_in(table_text):
+    """ Dates (YYYY/MM/DD) found in the OCR text of the table crop. """
     date_matches = re.findall(r"\b(20\d{2})[/-](\d{1,2})[/-](\d{1,2})\b", table_text)
     dates = []
     for y, m, d in date_matches:
         try:
-            dates.append(datetime(int(y), int(m), int(d)))
-        except:
+            dates.append(datetime(int(y), int(m), int(d)).strftime("%Y/%m/%d"))
+        except ValueError:
             continue
+    return dates
 
-    if not dates:
-        print("[Error] No valid dates found.")
-        return None
+def ocr_register(full_screenshot, regions=("balances", "dates")):
+    """
+    OCRs the requested Register crops at once (see REGISTER_REGIONS).
+    Returns {"trust", "retainer"} and/or {"dates"} for what was read.
+    """
+    read = read_regions(full_screenshot, {name: REGISTER_REGIONS[name] for name in regions})
+    # print("==== REGISTER TEXT ====")
+    # print(read["texts"])
+    log(f"Register OCR: {read['ms']} ms per region, {read['wall_ms']} ms in all")
+    values = {}
+    if "balances" in regions:
+        values["trust"], values["retainer"] = register_balances_in(read["texts"]["balances"])
+        if OCR_PREPROCESS:
+            # Only trust trust / Gen Rtnr where the raw crop reads the same
+            box = REGISTER_REGIONS["balances"][0]
+            raw_trust, raw_retainer = register_balances_in(read_text(crop_box(full_screenshot, box), preprocess=False))
+            if values["trust"] != raw_trust:
+                values["trust"] = None
+            if values["retainer"] != raw_retainer:
+                values["retainer"] = None
+    if "dates" in regions:
+        values["dates"] = register_dates_in(read["texts"]["dates"])
+    return values
+
+def ocr_read_register():
+    """
+    Uses OCR to read the Register: trust balance, Gen Rtnr and the latest
+    entry date, as register_verdict() reports them ("register_not_found"
+    when the window is missing). Both crops are read at once, on two OCR
+    workers.
+    """
+    full_screenshot = register_screenshot()
+    if full_screenshot is None:
+        return {"date": None, "trust": None, "retainer": None, "reason": "register_not_found"}
 
-    latest = max(dates)
-    print("[OK] Latest Date:", latest.strftime("%Y/%m/%d"))
-    return latest.strftime("%Y/%m/%d")
+    # Save for debugging
+    # full_screenshot.save("debug_register.png")
+
+    started = perf_counter()
+    values = ocr_register(full_screenshot)
+    record_ocr("register", values, (perf_counter() - started) * 1000)
+    dates = values["dates"]
+    return register_verdict(values["trust"], values["retainer"], max(dates) if dates else None)
+
+def read_register():
+    """
+    Register values from the UIA tree, with OCR only for what the tree
+    doesn't expose (the date grid, typically). Same result as
+    ocr_read_register(), which is all that runs unless PCLAW_UIA_FIRST is on.
+    """
+    if not PCLAW_UIA_FIRST:
+        return ocr_read_register()
+    try:
+        register_win = get_dialog(connect_to_pclaw(), REGISTER_DIALOG)
+    except Exception as e:
+        print("[Error] Failed to locate Register window:", e)
+        return {"date": None, "trust": None, "retainer": None, "reason": "register_not_found"}
+
+    def ocr_fallback(missing):
+        full_screenshot = register_screenshot()
+        if full_screenshot is None:
+            return {}
+        regions = []
+        if "trust" in missing or "retainer" in missing:
+            regions.append("balances")
+        if "dates" in missing:
+            regions.append("dates")
+        return ocr_register(full_screenshot, regions)
+
+    values, _ = extract_values("register", register_win.wrapper_object(), REGISTER_LABEL_PATTERNS, ocr_fallback, want_dates=True)
+    dates = values["dates"] or []
+    return register_verdict(values["trust"], values["retainer"], max(dates) if dates else None)
+
+def ocr_get_latest_date():
+    """
+    Uses OCR to determine latest date on the Register,
+    aborting if there is a trust balance.
+    """
+    return read_register()["date"]
 
 def send_ctrl_arrow(direction: str = "right"):
     """
@@ -456,14 +665,16 @@ def find_matter_from_name(name: str):
     # Open Pop-Up Help
     send_keys('^({F1})')
     sleep(2)
+    popup = get_waiter().ui.foreground()
 
     copy(search_string)
     send_keys('^v')
-    sleep(5)
+    # Results are in once the popup stops redrawing
+    wait_for("find_matter.results", region_stable(), timeout=5, required=False)
     # How to check if the matter is found? OCR?
     # Press Enter to select result
     send_keys('{ENTER}')
-    sleep(5)
+    wait_for("find_matter.select", window_closed(popup), timeout=5, required=False)
 
 def move_tab(dlg, repeat=1, direction="right"):
     """
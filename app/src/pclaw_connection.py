@@ -0,0 +1,147 @@
+from config import *
+import re
+import time
+import threading
+
+PCLAW_TITLE_RE = ".*PCLaw® Enterprise.*"
+
+class PclawNotRunning(RuntimeError):
+    """ No PCLaw main window could be found. """
+
+# ----------------------------
+# Window providers
+# ----------------------------
+
+class DesktopWindowProvider:
+    """ Finds and checks real windows through pywinauto and user32. """
+    def find(self, title_re):
+        from pywinauto.findwindows import find_windows
+        return find_windows(title_re=title_re)
+
+    def is_valid(self, handle, title_re):
+        # IsWindow alone isn't enough: Windows reuses handles, so also
+        # check it's still a PCLaw window
+        user32 = ctypes.windll.user32
+        if not user32.IsWindow(handle):
+            return False
+        length = user32.GetWindowTextLengthW(handle)
+        buffer = ctypes.create_unicode_buffer(length + 1)
+        user32.GetWindowTextW(handle, buffer, length + 1)
+        return re.match(title_re, buffer.value) is not None
+
+    def connect(self, handle):
+        from pywinauto.application import Application
+        app = Application(backend="uia").connect(handle=handle)
+        return app.window(handle=handle)
+
+# ----------------------------
+# Connection cache
+# ----------------------------
+
+class PclawConnection:
+    """
+    Keeps the PCLaw main window handle and its pywinauto wrapper between
+    calls. The handle is re-checked (cheap) on every call and re-resolved
+    with find_windows (slow, enumerates every top-level window) only when
+    PCLaw was closed or restarted.
+
+    Wrappers are kept per thread: UIA elements belong to the COM apartment
+    of the thread that created them, and jobs run on different workers.
+    """
+    def __init__(self, provider=None, title_re=PCLAW_TITLE_RE):
+        self.provider = provider or DesktopWindowProvider()
+        self.title_re = title_re
+        self._lock = threading.Lock()
+        self._handle = None
+        self._wrappers = {}   # thread id -> (handle, wrapper)
+        self.stats = {"hits": 0, "misses": 0, "stale": 0, "connects": 0, "invalidated": 0}
+
+    def handle(self):
+        """ The main window handle, found again only if the cached one is gone. """
+        with self._lock:
+            if self._handle is not None and self.provider.is_valid(self._handle, self.title_re):
+                self.stats["hits"] += 1
+                return self._handle
+            if self._handle is not None:
+                self.stats["stale"] += 1
+            self.stats["misses"] += 1
+            handles = self.provider.find(self.title_re)
+            if not handles:
+                self._handle = None
+                raise PclawNotRunning("PCLaw is not running (no PCLaw Enterprise window found).")
+            self._handle = handles[0]
+            return self._handle
+
+    def window(self):
+        """ pywinauto wrapper for the main window, connected once per thread and handle. """
+        handle = self.handle()
+        thread_id = threading.get_ident()
+        with self._lock:
+            cached = self._wrappers.get(thread_id)
+        if cached and cached[0] == handle:
+            return cached[1]
+
+        wrapper = self.provider.connect(handle)
+        with self._lock:
+            self.stats["connects"] += 1
+            self._wrappers[thread_id] = (handle, wrapper)
+        return wrapper
+
+    def invalidate(self):
+        """ Forgets the handle and wrappers, e.g. after PCLaw stopped responding. """
+        with self._lock:
+            self._handle = None
+            self._wrappers.clear()
+            self.stats["invalidated"] += 1
+
+    def summary(self):
+        """ Counters plus the handle hit rate, for pclaw_stats and batch summaries. """
+        with self._lock:
+            stats = dict(self.stats)
+            lookups = stats["hits"] + stats["misses"]
+            stats["hit_rate"] = round(stats["hits"] / lookups, 3) if lookups else 0.0
+            stats["connected"] = self._handle is not None
+            return stats
+
+_connection = None
+_connection_lock = threading.Lock()
+
+def get_pclaw_connection():
+    """ Returns the shared PclawConnection. """
+    global _connection
+    with _connection_lock:
+        if _connection is None:
+            _connection = PclawConnection()
+        return _connection
+
+def benchmark(calls=200, find_cost=0.004, connect_cost=0.03):
+    """
+    Compares resolving PCLaw on every call with the cached connection,
+    using a fake provider where enumerating windows and connecting cost
+    roughly what they do on a busy desktop. PCLaw is restarted halfway.
+    """
+    from fakes import FakeWindowProvider
+    provider = FakeWindowProvider(find_cost, connect_cost)
+    provider.open()
+
+    started = time.perf_counter()
+    for _ in range(calls):
+        provider.connect(provider.find(PCLAW_TITLE_RE)[0])
+    uncached_ms = (time.perf_counter() - started) * 1000
+
+    provider.finds = provider.connects = 0
+    connection = PclawConnection(provider)
+    started = time.perf_counter()
+    for i in range(calls):
+        if i == calls // 2:
+            provider.close(next(iter(provider.windows)))
+            provider.open()   # PCLaw restarted: new handle
+        connection.window().set_focus()
+    cached_ms = (time.perf_counter() - started) * 1000
+
+    print(f"{calls} connects, uncached: {uncached_ms:.0f} ms")
+    print(f"{calls} connects, cached:   {cached_ms:.0f} ms "
+          f"({provider.finds} window scans, {provider.connects} connects, stats {connection.stats})")
+
+if __name__ == "__main__":
+    benchmark()
@@ -0,0 +1,108 @@
+from config import log
+from module_registry import run_module, MODULE_REGISTRY
+from job_engine import EXCLUSIVE_LANES, check_cancelled, report_progress
+from parse_json import FormRequest
+import time
+
+def normalize_steps(steps):
+    """
+    Accepts step names or dicts and returns a list of step dicts:
+        {"script": "emailContract",
+         "continueOnError": False,
+         "requires": ["pdf_path"],            # keys the previous result must have
+         "resultToForm": {"pdf_path": "pdfPath"}}  # copy previous result into the form
+    """
+    normalized = []
+    for step in steps:
+        if isinstance(step, str):
+            step = {"script": step}
+        if not isinstance(step, dict) or not step.get("script"):
+            raise ValueError(f"Invalid pipeline step: {step!r}")
+        if step["script"] not in MODULE_REGISTRY:
+            raise ValueError(f"Module not found: {step['script']}")
+        normalized.append({
+            "script": step["script"],
+            "continueOnError": bool(step.get("continueOnError", False)),
+            "requires": list(step.get("requires", [])),
+            "resultToForm": dict(step.get("resultToForm", {})),
+        })
+    return normalized
+
+def pipeline_lane(steps):
+    """ Exclusive lane the pipeline must hold, if any of its steps needs one. """
+    for step in steps:
+        lane = EXCLUSIVE_LANES.get(step["script"])
+        if lane:
+            return lane
+    return None
+
+def step_failed(result):
+    return isinstance(result, dict) and (bool(result.get("error")) or result.get("status") == "error")
+
+def run_pipeline(steps, request, stop_on_error=True, runner=run_module):
+    """
+    Runs registered modules in order against one shared FormRequest.
+    Args:
+        steps (list): normalized step dicts, see normalize_steps
+        request (FormRequest): the parsed form, shared by every step
+        stop_on_error (bool): default for steps without continueOnError
+    Returns:
+        dict: overall status plus per-step results and timings
+    """
+    if not isinstance(request, FormRequest):
+        request = FormRequest(request)
+
+    results = []
+    previous = None
+    status = "success"
+    started = time.perf_counter()
+
+    for index, step in enumerate(steps):
+        check_cancelled()
+        report_progress(index / len(steps), f"Running {step['script']}")
+
+        missing = [key for key in step["requires"] if not (isinstance(previous, dict) and previous.get(key))]
+        if missing:
+            log(f"Skipping {step['script']}: previous step did not return {', '.join(missing)}")
+            results.append({"script": step["script"], "status": "skipped", "missing": missing, "elapsed_ms": 0.0})
+            continue
+
+        if step["resultToForm"] and isinstance(previous, dict):
+            updates = {field: previous[key] for key, field in step["resultToForm"].items() if key in previous}
+            if updates:
+                request = request.with_form_updates(updates)
+
+        step_started = time.perf_counter()
+        try:
+            result = runner(step["script"], request)
+        except Exception as e:
+            result = {"error": str(e)}
+        elapsed_ms = round((time.perf_counter() - step_started) * 1000, 1)
+
+        failed = step_failed(result)
+        results.append({
+            "script": step["script"],
+            "status": "error" if failed else "success",
+            "result": result,
+            "elapsed_ms": elapsed_ms,
+        })
+        log(f"Pipeline step {step['script']} {'failed' if failed else 'done'} in {elapsed_ms} ms")
+        previous = result
+
+        if failed:
+            if stop_on_error and not step["continueOnError"]:
+                status = "failed"
+                results.extend({"script": rest["script"], "status": "not_run", "elapsed_ms": 0.0}
+                               for rest in steps[index + 1:])
+                break
+            status = "partial"
+
+    summary = {
+        "status": status,
+        "steps": results,
+        "elapsed_ms": round((time.perf_counter() - started) * 1000, 1),
+    }
+    if status == "failed":
+        failed_step = next(r for r in reversed(results) if r["status"] == "error")
+        summary["error"] = f"{failed_step['script']}: {failed_step['result'].get('error', 'failed')}"
+    return summary
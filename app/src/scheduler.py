@@ -1,5 +1,8 @@
 from office_utils import *
 from parse_json import *
+from lawyer_directory import get_lawyer_directory
+from outlook_session import get_outlook_session
+from calendar_cache import get_calendar_cache, read_calendar, category_key
 from datetime import datetime, timedelta
 
 def process_scheduler(data):
@@ -34,7 +37,8 @@ def process_scheduler(data):
             'case_details': case_details or {}
         }
         
-        # Parse lawyer data
+        # Parse lawyer data, trusting the directory over the client's copy
+        lawyer = get_lawyer_directory().resolve(lawyer, form.get("lawyerId"))
         lawyer_data = {
             'id': lawyer.get("id", ""),
             'name': lawyer.get("name", ""),
@@ -57,9 +61,8 @@ def process_scheduler(data):
         
         print(f"Scheduling appointment from {start_datetime_str} to {end_datetime_str}")
         
-        # Fetch calendar events and validate the slot
-        events = fetch_calendar_events(temp_datetime)
-        if not is_valid_time_slot(temp_datetime, end_datetime, events, lawyer_data):
+        # Validate the slot against the cached calendar
+        if not slot_is_free(temp_datetime, end_datetime, lawyer_data):
             raise Exception("The selected time slot conflicts with existing appointments.")
         
         # Create meeting draft
@@ -80,14 +83,12 @@ def process_scheduler(data):
         raise
 
 def create_meeting_draft(form_data, lawyer_data, start_time, end_time):
-    """Create an Outlook meeting draft."""
-    try:
-        # Initialize Outlook
-        outlook = COM.gencache.EnsureDispatch("Outlook.Application")
-        
-        namespace = outlook.GetNamespace("MAPI")
-        namespace.Logon()
+    """Create an Outlook meeting draft through the shared Outlook session."""
+    get_outlook_session().run(build_meeting_draft, form_data, lawyer_data, start_time, end_time)
 
+def build_meeting_draft(outlook, namespace, form_data, lawyer_data, start_time, end_time):
+    """Builds the meeting draft. Runs on the Outlook session thread."""
+    try:
         olAppointmentItem = 1
         # olMeeting = 1
         
@@ -242,49 +243,43 @@ def build_appointment_content(word_doc, form_data):
         if notes_range.Find.Execute():
             notes_range.Font.Italic = True
 
-def fetch_calendar_events(appointment_datetime):
+def slot_is_free(start_time, end_time, lawyer_data):
+    """
+    Checks the slot against the in-memory calendar cache, falling back to
+    reading the day straight from Outlook if the cache can't be loaded.
+    """
+    try:
+        return get_calendar_cache().is_free(lawyer_data['name'], start_time, end_time, lawyer_data['break_minutes'])
+    except Exception as e:
+        log(f"Calendar cache unavailable, checking Outlook directly: {e}")
+        return get_outlook_session().run(check_time_slot, start_time, end_time, lawyer_data)
+
+def check_time_slot(outlook, namespace, start_time, end_time, lawyer_data):
+    """
+    Fetches the day's events and checks the slot in one go, on the Outlook
+    session thread.
+    """
+    events = fetch_calendar_events(start_time, namespace)
+    return is_valid_time_slot(start_time, end_time, events, lawyer_data)
+
+def fetch_calendar_events(appointment_datetime, namespace=None):
     """
     Fetch calendar events for the specific day of the appointment.
-    Returns only events that overlap with that day.
+    Returns CalendarEvent records (not COM items) for timed events that overlap that day.
     """
     print(f"Fetching calendar events for {appointment_datetime.strftime('%Y-%m-%d')}...")
-    events = []
 
     try:
-        outlook_app = COM.Dispatch("Outlook.Application")
-        namespace = outlook_app.GetNamespace("MAPI")
-        calendar = namespace.GetDefaultFolder(9)  # olFolderCalendar
-        items = calendar.Items
-
-        # Ensure recurring events are included and sorted properly
-        items.IncludeRecurrences = True
-        items.Sort("[Start]")
+        if namespace is None:
+            namespace = COM.Dispatch("Outlook.Application").GetNamespace("MAPI")
 
         # Create start and end of the day
         day_start = appointment_datetime.replace(hour=0, minute=0, second=0, microsecond=0)
         day_end = appointment_datetime.replace(hour=23, minute=59, second=59, microsecond=999999)
 
-        fmt = "%B %d, %Y %I:%M %p"
-        ds = day_start.strftime(fmt)
-        de = day_end.strftime(fmt)
-
-        # Overlap filter (start <= day_end AND end >= day_start)
-        filter_str = (
-            f"[Start] <= '{de}' AND "
-            f"[End]   >= '{ds}'"
-        )
-
-        restricted = items.Restrict(filter_str)
-
-        # Now parse the final list
-        for item in restricted:
-            if item and not getattr(item, 'AllDayEvent', True):
-                try:
-                    events.append(item)
-                    print(f"Found appointment: {item.Subject} from {item.Start} to {item.End}")
-                except Exception as e:
-                    print(f"Warning: Could not process calendar item: {e}")
-                    continue
+        events = [event for event in read_calendar(namespace, day_start, day_end) if not event.all_day]
+        for event in events:
+            print(f"Found appointment: {event.subject} from {event.start} to {event.end}")
 
         print(f"Found {len(events)} relevant appointments on {appointment_datetime.strftime('%Y-%m-%d')}")
         return events
@@ -295,40 +290,23 @@ def fetch_calendar_events(appointment_datetime):
 
 def is_valid_time_slot(start_time, end_time, events, lawyer_data):
     """Check if the requested time slot is valid (no conflicts)."""
-    # Check for null events
-    if any(event is None for event in events):
-        error_msg = "Warning: Null calendar items found in events list!"
-        print(error_msg)
-        alert_error(error_msg)
-        return False
-        
+    buffer = timedelta(minutes=lawyer_data['break_minutes'])
+    category = category_key(lawyer_data['name'])
+
     # Check for overlaps with lawyer's appointments
     for event in events:
-        if not event:
+        # Check if this is the lawyer's appointment, matched like the cache does
+        if category not in map(category_key, event.categories):
             continue
-            
-        try:
-            # Check if this is the lawyer's appointment
-            categories = getattr(event, 'Categories', '')
-            if not categories or lawyer_data['name'] not in categories:
-                continue
-                
-            event_start = event.Start
-            event_end = event.End
-            
-            # Apply break buffer
-            buffer_start = event_start - timedelta(minutes=lawyer_data['break_minutes'])
-            buffer_end = event_end + timedelta(minutes=lawyer_data['break_minutes'])
-            
-            # Check for overlap
-            if not (end_time <= buffer_start or start_time >= buffer_end):
-                return False
-            
-            # TODO
-                
-        except:
-            continue
-            
+
+        # Apply break buffer
+        buffer_start = event.start - buffer
+        buffer_end = event.end + buffer
+
+        # Check for overlap
+        if not (end_time <= buffer_start or start_time >= buffer_end):
+            return False
+
     return True
 
 # Backward compatibility
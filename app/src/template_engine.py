@@ -0,0 +1,129 @@
+from config import *
+import re
+import threading
+import time
+
+# {{name}} placeholders in the HTML email templates
+PLACEHOLDER_RE = re.compile(r"\{\{\s*(\w+)\s*\}\}")
+
+class Template:
+    """
+    An HTML template split once into literal and placeholder segments.
+    Rendering fills the placeholder slots and joins everything in one pass,
+    instead of copying the whole body once per str.replace.
+    """
+    __slots__ = ("path", "_parts", "_slots", "placeholders")
+
+    def __init__(self, text, path=None):
+        self.path = path
+        self._parts = []   # literals, with each placeholder's raw text in its slot
+        self._slots = []   # (index in _parts, placeholder name)
+        position = 0
+        for match in PLACEHOLDER_RE.finditer(text):
+            self._parts.append(text[position:match.start()])
+            self._slots.append((len(self._parts), match.group(1)))
+            self._parts.append(match.group(0))
+            position = match.end()
+        self._parts.append(text[position:])
+        self.placeholders = frozenset(name for _, name in self._slots)
+
+    def report(self, context):
+        """ Returns placeholders without a value and values without a placeholder. """
+        return {
+            "missing": sorted(self.placeholders - context.keys()),
+            "unknown": sorted(context.keys() - self.placeholders),
+        }
+
+    def render(self, context):
+        """
+        Fills the placeholders from context. Missing ones are left as-is, like
+        the str.replace chains did; None renders as an empty string.
+        """
+        parts = self._parts.copy()
+        for index, name in self._slots:
+            if name in context:
+                value = context[name]
+                parts[index] = "" if value is None else str(value)
+        return "".join(parts)
+
+# path -> ((mtime, size), Template)
+_cache = {}
+_cache_lock = threading.Lock()
+
+def load_template(path):
+    """ Returns the compiled template for a file, re-reading it only after it changes. """
+    stat = os.stat(path)
+    stamp = (stat.st_mtime_ns, stat.st_size)
+    cached = _cache.get(path)
+    if cached and cached[0] == stamp:
+        return cached[1]
+
+    with open(path, "r", encoding="utf-8") as f:
+        template = Template(f.read(), path)
+    with _cache_lock:
+        _cache[path] = (stamp, template)
+    return template
+
+def template_path(lang, name):
+    return os.path.join(TEMPLATES_DIR, lang, name)
+
+def render_template(lang, name, context=None, strict=False):
+    """
+    Renders templates/<lang>/<name> with the given values.
+    Missing or unknown placeholders are logged, or raised with strict=True.
+    """
+    path = template_path(lang, name)
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"Template not found: {path}")
+
+    context = context or {}
+    template = load_template(path)
+    report = template.report(context)
+    if report["missing"] or report["unknown"]:
+        message = (f"Template {lang}/{name}: missing {report['missing'] or 'none'}, "
+                   f"unknown {report['unknown'] or 'none'}")
+        if strict:
+            raise KeyError(message)
+        log(message)
+    return template.render(context)
+
+def benchmark(iterations=2000):
+    """ Compares engine rendering with the old chained str.replace, per template. """
+    sample = {
+        "date": "Tuesday July 22nd, 2025",
+        "time": "2:30 PM",
+        "rates": "125",
+        "totalRates": "143.72",
+        "teamsMeeting": "<a href='https://teams.example.com'>Join</a><br>" * 4,
+        "lawyerName": "Me Lawyer 1",
+        "depositAmount": "1500",
+        "totalAmount": "1824.63",
+    }
+    print(f"{'template':<22}{'replace (us)':>14}{'engine (us)':>14}{'speedup':>10}")
+    for lang in ("en", "fr"):
+        folder = os.path.join(TEMPLATES_DIR, lang)
+        for name in sorted(os.listdir(folder)):
+            if not name.endswith(".html"):
+                continue
+            path = os.path.join(folder, name)
+            template = load_template(path)
+            context = {key: value for key, value in sample.items() if key in template.placeholders}
+
+            start = time.perf_counter()
+            for _ in range(iterations):
+                with open(path, "r", encoding="utf-8") as f:
+                    html = f.read()
+                for key, value in context.items():
+                    html = html.replace("{{" + key + "}}", value)
+            replace_us = (time.perf_counter() - start) / iterations * 1e6
+
+            start = time.perf_counter()
+            for _ in range(iterations):
+                rendered = load_template(path).render(context)
+            engine_us = (time.perf_counter() - start) / iterations * 1e6
+
+            assert rendered == html, f"Output differs for {lang}/{name}"
+            print(f"{lang + '/' + name:<22}{replace_us:>14.1f}{engine_us:>14.1f}{replace_us / engine_us:>9.1f}x")
+
+if __name__ == "__main__":
+    benchmark()
@@ -1,5 +1,6 @@
 from parse_timesheets import DH_parse_timesheet, DH_record_time_entry, safe_correct
 from pclaw import *
+from job_engine import JobCancelled, check_cancelled, report_progress
 
 def process_time_entries(data):
     """ Main function to parse and record time entries from the time sheet. """
@@ -28,10 +29,14 @@ def process_time_entries(data):
                 return
 
             continue_loop = True
-            for entry in entries:
+            for done, entry in enumerate(entries):
                 if not continue_loop:
                     break
 
+                # Stop between entries if the job was cancelled from the UI
+                check_cancelled()
+                report_progress(done / len(entries), f"Entry {done + 1} of {len(entries)}")
+
                 if not entry.recorded:
                     saved = DH_record_time_entry(entry, path)
                     if not saved:
@@ -49,6 +54,9 @@ def process_time_entries(data):
             "file_path": path
         }
         
+    except JobCancelled:
+        log("Time entries cancelled")
+        raise
     except Exception as e:
         log(f"Error recording time entries: {str(e)}")
         return {"error": str(e)}    
@@ -0,0 +1,299 @@
+from config import *
+from ocr_preprocess import parse_amount, parse_date
+import re
+import time
+import threading
+
+# ----------------------------
+# Reading PCLaw values from the UI Automation tree
+# ----------------------------
+# pywinauto is already attached to the Close Matter and Register dialogs, and
+# many of their values are exposed as UIA names or Value patterns. One cached
+# tree walk (FindAllBuildCache) copies every control's name, type, value and
+# rectangle in a single cross-process call; values are then matched to their
+# labels by position. OCR is only run for what the tree doesn't expose, and
+# every value records which path produced it (see get_extraction_stats).
+# pclaw only reads the tree when PCLAW_UIA_FIRST is on in config; while it
+# is off every value is recorded as OCR (record_ocr) and nothing here can
+# save OCR time.
+
+# UIA property IDs
+UIA_BOUNDING_RECTANGLE = 30001
+UIA_CONTROL_TYPE = 30003
+UIA_NAME = 30005
+UIA_VALUE_VALUE = 30045
+UIA_LEGACY_VALUE = 30093
+TREE_SCOPE_DESCENDANTS = 4
+
+AMOUNT_TEXT = re.compile(r"^\(?-?\$?\s*[\d,]*\d(?:\.\d{1,2})?\)?$")
+
+class UiaNode:
+    """ Plain copy of one control: no COM reference survives the walk. """
+    __slots__ = ("name", "control_type", "value", "rect")
+
+    def __init__(self, name="", control_type="", value="", rect=(0, 0, 0, 0)):
+        self.name = (name or "").strip()
+        self.control_type = control_type or ""
+        self.value = (value or "").strip()
+        self.rect = tuple(rect)   # left, top, right, bottom
+
+    @property
+    def texts(self):
+        return [t for t in (self.value, self.name) if t]
+
+    def __repr__(self):
+        return f"UiaNode({self.control_type}, {self.name!r}, {self.value!r}, {self.rect})"
+
+# ----------------------------
+# Tree walk
+# ----------------------------
+
+def walk_tree(wrapper):
+    """
+    Every descendant of a pywinauto UIA wrapper as UiaNode records, through
+    one FindAllBuildCache call; falls back to walking wrappers one by one.
+    """
+    try:
+        return _walk_cached(wrapper.element_info.element)
+    except Exception as e:
+        log(f"Cached UIA walk failed, walking wrappers instead: {e}")
+        return _walk_wrappers(wrapper)
+
+def _walk_cached(element):
+    from pywinauto.uia_defines import IUIA
+    uia = IUIA()
+    request = uia.iuia.CreateCacheRequest()
+    for prop in (UIA_BOUNDING_RECTANGLE, UIA_CONTROL_TYPE, UIA_NAME, UIA_VALUE_VALUE, UIA_LEGACY_VALUE):
+        request.AddProperty(prop)
+    found = element.FindAllBuildCache(TREE_SCOPE_DESCENDANTS, uia.true_condition, request)
+    type_names = getattr(uia, "known_control_type_ids", {})
+
+    nodes = []
+    for index in range(found.Length):
+        item = found.GetElement(index)
+        rect = item.CachedBoundingRectangle
+        value = item.GetCachedPropertyValue(UIA_VALUE_VALUE) or item.GetCachedPropertyValue(UIA_LEGACY_VALUE)
+        nodes.append(UiaNode(
+            item.CachedName,
+            type_names.get(item.CachedControlType, str(item.CachedControlType)),
+            value if isinstance(value, str) else "",
+            (rect.left, rect.top, rect.right, rect.bottom),
+        ))
+    return nodes
+
+def _walk_wrappers(wrapper):
+    nodes = []
+    for control in wrapper.descendants():
+        info = control.element_info
+        try:
+            value = control.get_value() if hasattr(control, "get_value") else ""
+        except Exception:
+            value = ""
+        rect = info.rectangle
+        nodes.append(UiaNode(info.name, info.control_type, value if isinstance(value, str) else "",
+                             (rect.left, rect.top, rect.right, rect.bottom)))
+    return nodes
+
+# ----------------------------
+# Matching values to labels
+# ----------------------------
+
+def _center_y(rect):
+    return (rect[1] + rect[3]) / 2
+
+def _center_x(rect):
+    return (rect[0] + rect[2]) / 2
+
+def amount_in(text):
+    """ The amount when text is just a number (0.00, 1,234.56, (12.00)), else None. """
+    text = text.strip()
+    return parse_amount(text) if AMOUNT_TEXT.match(text) else None
+
+def value_beside(nodes, label_re):
+    """
+    The amount belonging to the first label matching label_re: inside the
+    label itself ("Trust: 0.00"), else the nearest number to its right on
+    the same row. Nothing is guessed from other rows.
+    """
+    pattern = re.compile(label_re, re.IGNORECASE)
+    for label in nodes:
+        text = next((t for t in label.texts if pattern.search(t)), None)
+        if text is None:
+            continue
+        inline = amount_in(pattern.split(text, maxsplit=1)[-1].strip(" :"))
+        if inline is not None:
+            return inline
+
+        height = max(1, label.rect[3] - label.rect[1])
+        right = []
+        for node in nodes:
+            if node is label:
+                continue
+            amount = next((a for a in map(amount_in, node.texts) if a is not None), None)
+            if amount is None:
+                continue
+            if abs(_center_y(node.rect) - _center_y(label.rect)) <= height / 2 and node.rect[0] >= label.rect[2] - 2:
+                right.append((node.rect[0] - label.rect[2], amount))
+        if right:
+            return min(right)[1]
+    return None
+
+def dates_in(nodes, header_re=r"^Date$"):
+    """
+    Dates (YYYY/MM/DD) in the cells of the register grid's date column:
+    below the header matching header_re and centred within its width.
+    Dates elsewhere in the dialog (e.g. a period filter) are ignored, and
+    without the header nothing is returned.
+    """
+    pattern = re.compile(header_re, re.IGNORECASE)
+    header = next((node for node in nodes if any(pattern.search(t) for t in node.texts)), None)
+    if header is None:
+        return []
+    dates = []
+    for node in nodes:
+        if node is header or node.rect[1] < header.rect[3] - 2:
+            continue
+        if not header.rect[0] - 2 <= _center_x(node.rect) <= header.rect[2] + 2:
+            continue
+        for text in node.texts:
+            if len(text) <= 12:
+                date = parse_date(text)
+                if date:
+                    dates.append(date)
+    return dates
+
+# ----------------------------
+# Extraction with OCR fallback
+# ----------------------------
+
+class ExtractionStats:
+    """ Which path produced each value, and what each path cost. """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.fields = {}   # "dialog.field" -> {"uia": n, "ocr": n, "missing": n}
+        self.ms = {"uia": 0.0, "ocr": 0.0}
+        self.ocr_runs = 0
+
+    def record(self, kind, sources, uia_ms, ocr_ms=None):
+        with self._lock:
+            for field, source in sources.items():
+                entry = self.fields.setdefault(f"{kind}.{field}", {"uia": 0, "ocr": 0, "missing": 0})
+                entry[source] += 1
+            self.ms["uia"] += uia_ms
+            if ocr_ms is not None:
+                self.ms["ocr"] += ocr_ms
+                self.ocr_runs += 1
+
+    def summary(self):
+        with self._lock:
+            uia = sum(e["uia"] for e in self.fields.values())
+            ocr = sum(e["ocr"] for e in self.fields.values())
+            mean_ocr = self.ms["ocr"] / self.ocr_runs if self.ocr_runs else None
+            return {
+                "uia_first": PCLAW_UIA_FIRST,
+                "fields": {k: dict(v) for k, v in self.fields.items()},
+                "uia_values": uia,
+                "ocr_values": ocr,
+                "uia_ms": round(self.ms["uia"], 1),
+                "ocr_ms": round(self.ms["ocr"], 1),
+                "ocr_runs": self.ocr_runs,
+                "mean_ocr_run_ms": None if mean_ocr is None else round(mean_ocr, 1),
+            }
+
+_stats = ExtractionStats()
+
+def get_extraction_stats():
+    return _stats
+
+def record_ocr(kind, values, ocr_ms, stats=None):
+    """ Records a read that went straight to OCR (PCLAW_UIA_FIRST off). """
+    sources = {field: "missing" if value in (None, []) else "ocr" for field, value in values.items()}
+    (stats or _stats).record(kind, sources, 0.0, ocr_ms)
+
+def extract_values(kind, nodes_or_wrapper, labels, ocr_fallback, want_dates=False, stats=None):
+    """
+    Reads labels ({field: label regex}) and optionally the date column from
+    the tree. When something is missing, ocr_fallback(missing) is called
+    once with the missing field names and returns {field: value} ("dates"
+    being a list); only the missing fields are taken from it.
+    Returns (values, sources) with sources[field] in "uia", "ocr", "missing".
+    """
+    stats = stats or _stats
+    started = time.perf_counter()
+    nodes = nodes_or_wrapper if isinstance(nodes_or_wrapper, list) else walk_tree(nodes_or_wrapper)
+    values = {field: value_beside(nodes, label_re) for field, label_re in labels.items()}
+    if want_dates:
+        values["dates"] = dates_in(nodes)
+    uia_ms = (time.perf_counter() - started) * 1000
+
+    sources = {field: "uia" for field, value in values.items() if value not in (None, [])}
+    missing = [field for field in values if field not in sources]
+    ocr_ms = None
+    if missing:
+        started = time.perf_counter()
+        try:
+            fallback = ocr_fallback(missing) or {}
+        except Exception as e:
+            log(f"OCR fallback for {kind} failed: {e}")
+            fallback = {}
+        ocr_ms = (time.perf_counter() - started) * 1000
+        for field in missing:
+            value = fallback.get(field)
+            if value not in (None, []):
+                values[field] = value
+                sources[field] = "ocr"
+            else:
+                sources[field] = "missing"
+
+    stats.record(kind, sources, uia_ms, ocr_ms)
+    log(f"{kind}: {sum(1 for s in sources.values() if s == 'uia')} value(s) from UIA, "
+        f"{sum(1 for s in sources.values() if s == 'ocr')} from OCR"
+        + (f" ({ocr_ms:.0f} ms)" if ocr_ms is not None else ""))
+    return values, sources
+
+
+def benchmark(matters=50, ocr_ms=400.0):
+    """
+    Close Matter balances and Register values for a run of matters, from a
+    fake tree where the balance labels are exposed but the register grid
+    is custom-drawn (no UIA text), so only dates need OCR. ocr_ms is what
+    one OCR pass costs. This only checks the matching and bookkeeping:
+    which PCLaw controls expose text is unknown until it is tried on the
+    real dialogs, so no OCR saving is claimed from it.
+    """
+    def row(label, amount, top):
+        return [UiaNode(label, "Text", "", (10, top, 70, top + 16)),
+                UiaNode("", "Edit", amount, (80, top, 160, top + 16))]
+
+    close_tree = (row("Unbd D", "0.00", 300) + row("A/R", "0.00", 320)
+                  + row("Gen Rtnr", "0.00", 340) + row("Trust", "0.00", 360)
+                  + [UiaNode("OK", "Button", "", (200, 400, 260, 420))])
+    register_tree = (row("Trust:", "0.00", 500) + row("Gen Rtnr", "143.72", 520)
+                     + [UiaNode("", "Pane", "", (0, 40, 600, 480))])   # the grid, drawn by hand
+
+    def fake_ocr(result):
+        def run(missing):
+            time.sleep(ocr_ms / 1000)
+            return result
+        return run
+
+    stats = ExtractionStats()
+    started = time.perf_counter()
+    for _ in range(matters):
+        extract_values("close_matter", close_tree,
+                       {"Unbd D": r"^Unbd D", "A/R": r"^A\S?R", "Gen Rtnr": r"^Gen", "Trust": r"^Trust"},
+                       fake_ocr({}), stats=stats)
+        extract_values("register", register_tree, {"trust": r"^Trust", "retainer": r"^Gen"},
+                       fake_ocr({"dates": ["2025/07/31"]}), want_dates=True, stats=stats)
+    elapsed = time.perf_counter() - started
+    summary = stats.summary()
+    print(f"{matters} matters on a fake tree: {elapsed:.1f}s")
+    print(f"{summary['uia_values']} values from UIA ({summary['uia_ms']} ms), "
+          f"{summary['ocr_values']} from OCR in {summary['ocr_runs']} runs ({summary['ocr_ms']:.0f} ms)")
+    for field, counts in summary["fields"].items():
+        print(f"  {field:<22} {counts}")
+    if not PCLAW_UIA_FIRST:
+        print("PCLAW_UIA_FIRST is off: the app reads every value with OCR.")
+
+if __name__ == "__main__":
+    benchmark(matters=10, ocr_ms=100)
@@ -0,0 +1,383 @@
+from config import *
+from job_engine import check_cancelled
+import json
+import time
+import hashlib
+import tempfile
+import threading
+
+# ----------------------------
+# Wait engine for PCLaw automation
+# ----------------------------
+# Each pause is a named step waiting on a condition (a window appearing, a
+# control enabled, a screen region that stopped redrawing) instead of a
+# fixed sleep. Steps return as soon as the condition holds. Timeouts start
+# at the old sleep and grow with the durations seen on this machine, which
+# are kept in a small JSON file between runs. A timed-out step is recorded
+# at its limit, so a PCLaw slower than the old sleep gets a longer timeout
+# on the next run instead of failing forever.
+
+HISTORY_SIZE = 20          # durations kept per step
+TIMEOUT_FACTOR = 2.0       # timeout = max(base, factor x slowest recent run)
+TIMEOUT_CEILING = 4.0      # ... but never more than ceiling x base
+FIRST_POLL = 0.05
+MAX_POLL = 0.5
+
+class WaitTimeout(TimeoutError):
+    """ Raised when a required step's condition never held. """
+    def __init__(self, step, description, timeout):
+        super().__init__(f"Timed out after {timeout:.0f}s waiting for {description} ({step})")
+        self.step = step
+        self.timeout = timeout
+
+class Condition:
+    """
+    check(ui, now) returns a truthy value once the condition holds; that
+    value is what Waiter.until returns. Conditions may keep state between
+    polls, so build a new one for each wait.
+    """
+    def __init__(self, description, check):
+        self.description = description
+        self.check = check
+
+    def __call__(self, ui, now):
+        return self.check(ui, now)
+
+    def __and__(self, other):
+        return all_of(self, other)
+
+    def __repr__(self):
+        return f"Condition({self.description})"
+
+def all_of(*conditions):
+    """ Holds when every condition holds; returns the last one's value. """
+    def check(ui, now):
+        value = None
+        for condition in conditions:
+            value = condition(ui, now)
+            if not value:
+                return None
+        return value
+    return Condition(" and ".join(c.description for c in conditions), check)
+
+def window_appears(title_re):
+    """ An enabled window whose title matches title_re; returns its handle. """
+    def check(ui, now):
+        for handle in ui.find(title_re):
+            if ui.is_enabled(handle):
+                return handle
+        return None
+    return Condition(f"window '{title_re}'", check)
+
+def new_window(before):
+    """
+    An enabled top-level window that wasn't in before (a set of handles from
+    ui.top_windows() taken just before the action); returns its handle.
+    For dialogs whose title varies between PCLaw versions.
+    """
+    before = set(before)
+    def check(ui, now):
+        for handle in ui.top_windows():
+            if handle not in before and ui.is_enabled(handle):
+                return handle
+        return None
+    return Condition("a new window", check)
+
+def window_closed(handle):
+    def check(ui, now):
+        return not ui.exists(handle)
+    return Condition(f"window {handle} to close", check)
+
+def window_gone(title_re):
+    """ No window left whose title matches title_re. """
+    def check(ui, now):
+        return not ui.find(title_re)
+    return Condition(f"window '{title_re}' to close", check)
+
+def control_enabled(title_re, control, control_type="Button"):
+    """ A control (e.g. the OK button) enabled inside the window matching title_re. """
+    def check(ui, now):
+        for handle in ui.find(title_re):
+            if ui.control_enabled(handle, control, control_type):
+                return handle
+        return None
+    return Condition(f"'{control}' enabled in '{title_re}'", check)
+
+def region_stable(title_re=None, box=(0.0, 0.0, 1.0, 1.0), quiet=1.0):
+    """
+    The part of a window given by box (fractions of its width and height)
+    unchanged for quiet seconds, i.e. PCLaw stopped redrawing it. With no
+    title_re the foreground window is watched.
+    """
+    state = {"print": None, "since": None}
+
+    def check(ui, now):
+        if title_re is None:
+            handle = ui.foreground()
+        else:
+            handles = ui.find(title_re)
+            handle = handles[0] if handles else None
+        fingerprint = ui.fingerprint(handle, box) if handle else None
+        if fingerprint is None or fingerprint != state["print"]:
+            state["print"], state["since"] = fingerprint, now
+            return None
+        return handle if now - state["since"] >= quiet else None
+
+    return Condition(f"{title_re or 'foreground window'} to settle", check)
+
+
+# ----------------------------
+# PCLaw step conditions
+# ----------------------------
+# Built in one place so pclaw.py and benchmark() wait on the same thing.
+
+def close_matter_loaded(title_re, box):
+    """
+    Close Matter ready for ENTER: its OK button enabled again and the
+    balances no longer redrawing. The button matters: a dialog busy loading
+    stops repainting too, so a quiet region alone looks ready too early.
+    """
+    return control_enabled(title_re, "OK") & region_stable(title_re, box)
+
+def preview_ready(before):
+    """ The bill preview opened (a window not in before) and stopped drawing. """
+    return new_window(before) & region_stable()
+
+
+# ----------------------------
+# Timing history
+# ----------------------------
+
+class WaitHistory:
+    """ Recent durations per step, saved to path so timeouts adapt across runs. """
+    def __init__(self, path=None, size=HISTORY_SIZE):
+        self.path = path
+        self.size = size
+        self._lock = threading.Lock()
+        self._durations = {}
+        if path:
+            self._read()
+
+    def durations(self, step):
+        with self._lock:
+            return list(self._durations.get(step, ()))
+
+    def add(self, step, seconds):
+        with self._lock:
+            recent = self._durations.setdefault(step, [])
+            recent.append(round(seconds, 3))
+            del recent[:-self.size]
+            if self.path:
+                self._write()
+
+    def timeout_for(self, step, base):
+        recent = self.durations(step)
+        if not recent:
+            return base
+        return min(base * TIMEOUT_CEILING, max(base, max(recent) * TIMEOUT_FACTOR))
+
+    def _read(self):
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                self._durations = {k: list(v) for k, v in json.load(f).items()}
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError) as e:
+            log(f"Ignoring unreadable wait history {self.path}: {e}")
+
+    def _write(self):
+        temp_path = self.path + ".tmp"
+        try:
+            with open(temp_path, "w", encoding="utf-8") as f:
+                json.dump(self._durations, f, indent=1)
+            os.replace(temp_path, self.path)
+        except OSError as e:
+            log(f"Could not write wait history: {e}")
+
+
+# ----------------------------
+# Waiter
+# ----------------------------
+
+class Waiter:
+    """
+    Polls conditions against a UI backend. clock/sleep default to real time;
+    fakes.SimulatedClock swaps both so whole PCLaw sequences run instantly.
+    Every step is recorded in records: name, status, seconds, polls, timeout.
+    """
+    def __init__(self, ui=None, clock=time.monotonic, sleep=time.sleep, history=None,
+                 first_poll=FIRST_POLL, max_poll=MAX_POLL):
+        self._ui = ui
+        self.clock = clock
+        self.sleep = sleep
+        self.history = history if history is not None else WaitHistory()
+        self.first_poll = first_poll
+        self.max_poll = max_poll
+        self.records = []
+
+    @property
+    def ui(self):
+        if self._ui is None:
+            self._ui = DesktopUI()
+        return self._ui
+
+    def until(self, step, condition, timeout, required=True):
+        """
+        Waits for condition and returns its value. timeout is the baseline in
+        seconds (usually the old fixed sleep); slower history raises it.
+        On timeout raises WaitTimeout, or returns None when not required,
+        which behaves like the old sleep.
+        """
+        limit = self.history.timeout_for(step, timeout)
+        started = self.clock()
+        poll = self.first_poll
+        polls = 0
+        while True:
+            check_cancelled()
+            now = self.clock()
+            polls += 1
+            try:
+                value = condition(self.ui, now)
+            except Exception as e:
+                # Windows come and go mid-query; treat it as not yet
+                log(f"Wait {step}: check failed, retrying ({e})")
+                value = None
+            elapsed = now - started
+            if value:
+                self._record(step, "ok", elapsed, polls, limit)
+                self.history.add(step, elapsed)
+                return value
+            if elapsed >= limit:
+                self._record(step, "timeout", elapsed, polls, limit)
+                # The step took at least this long: next run gets a longer timeout
+                self.history.add(step, elapsed)
+                if required:
+                    raise WaitTimeout(step, condition.description, limit)
+                return None
+            self.sleep(min(poll, limit - elapsed))
+            poll = min(poll * 1.5, self.max_poll)
+
+    def _record(self, step, status, elapsed, polls, limit):
+        record = {"step": step, "status": status, "seconds": round(elapsed, 3),
+                  "polls": polls, "timeout": round(limit, 1)}
+        self.records.append(record)
+        del self.records[:-200]
+        log(f"Wait {step}: {status} after {elapsed:.2f}s ({polls} polls, timeout {limit:.0f}s)")
+
+    def summary(self):
+        """ {step: {"runs", "mean", "max", "timeouts"}} over the recorded steps. """
+        result = {}
+        for record in self.records:
+            entry = result.setdefault(record["step"], {"runs": 0, "total": 0.0, "max": 0.0, "timeouts": 0})
+            entry["runs"] += 1
+            entry["total"] += record["seconds"]
+            entry["max"] = max(entry["max"], record["seconds"])
+            entry["timeouts"] += record["status"] == "timeout"
+        for entry in result.values():
+            entry["mean"] = round(entry.pop("total") / entry["runs"], 3)
+        return result
+
+_waiter = None
+_waiter_lock = threading.Lock()
+
+def get_waiter():
+    """ Returns the shared Waiter, with history kept in the temp folder. """
+    global _waiter
+    with _waiter_lock:
+        if _waiter is None:
+            path = os.path.join(tempfile.gettempdir(), "adminhub_wait_history.json")
+            _waiter = Waiter(history=WaitHistory(path))
+        return _waiter
+
+def wait_for(step, condition, timeout, required=True):
+    """ Shortcut for get_waiter().until(...). """
+    return get_waiter().until(step, condition, timeout, required)
+
+
+# ----------------------------
+# UI backends
+# ----------------------------
+
+class DesktopUI:
+    """ Real windows through user32 and pywinauto. Handles are HWNDs. """
+    def __init__(self):
+        from ctypes import wintypes
+        self._user32 = ctypes.windll.user32
+        self._wintypes = wintypes
+
+    def find(self, title_re):
+        from pywinauto.findwindows import find_windows
+        return find_windows(title_re=title_re, visible_only=True)
+
+    def top_windows(self):
+        from pywinauto.findwindows import find_windows
+        return set(find_windows(visible_only=True))
+
+    def foreground(self):
+        return self._user32.GetForegroundWindow() or None
+
+    def exists(self, handle):
+        return bool(self._user32.IsWindow(handle)) and bool(self._user32.IsWindowVisible(handle))
+
+    def is_enabled(self, handle):
+        return bool(self._user32.IsWindowEnabled(handle))
+
+    def control_enabled(self, handle, title_re, control_type):
+        from pywinauto.application import Application
+        window = Application(backend="uia").connect(handle=handle).window(handle=handle)
+        control = window.child_window(title_re=title_re, control_type=control_type)
+        return control.exists(timeout=0) and control.is_enabled()
+
+    def fingerprint(self, handle, box):
+        from pyautogui import screenshot
+        rect = self._wintypes.RECT()
+        if not self._user32.GetWindowRect(handle, ctypes.byref(rect)):
+            return None
+        width, height = rect.right - rect.left, rect.bottom - rect.top
+        left, top = rect.left + int(width * box[0]), rect.top + int(height * box[1])
+        region = (left, top, max(1, int(width * (box[2] - box[0]))), max(1, int(height * (box[3] - box[1]))))
+        return hashlib.md5(screenshot(region=region).tobytes()).hexdigest()
+
+
+def benchmark():
+    """
+    Replays the close and bill sequences on a FakeUI at three PCLaw speeds,
+    sharing one history, and compares against the old fixed sleeps (36 s to
+    close, 15 + 6 s to bill, 5 + 5 s in the matter search). The slowest run
+    would overrun the fixed preview sleep; by then the timeouts have grown.
+    """
+    from fakes import SimulatedClock, FakeUI
+    fixed = {"close_matter.load": 36, "bill_matter.settings": 15, "bill_matter.preview": 6,
+             "find_matter.results": 5, "find_matter.select": 5}
+    history = WaitHistory()
+
+    def run(speed):
+        clock = SimulatedClock()
+        ui = FakeUI(clock)
+        waiter = Waiter(ui=ui, clock=clock, sleep=clock.sleep, history=history)
+
+        ui.add_window("Close Matter", enabled_after=0.5, settles_after=8 * speed, controls={"OK": 7 * speed})
+        waiter.until("close_matter.load", close_matter_loaded("Close Matter", (0.05, 0.70, 0.95, 0.98)), 36)
+
+        before = ui.top_windows()
+        ui.add_window("Bill Settings", after=4 * speed)
+        waiter.until("bill_matter.settings", new_window(before), 15)
+        before = ui.top_windows()
+        ui.add_window("Preview", after=2 * speed, settles_after=3 * speed)
+        waiter.until("bill_matter.preview", preview_ready(before), 6)
+
+        popup = ui.add_window("Pop-Up Help", settles_after=1.5 * speed)
+        waiter.until("find_matter.results", region_stable(), 5, required=False)
+        ui.close_window(popup, after=0.3 * speed)
+        waiter.until("find_matter.select", window_closed(popup), 5, required=False)
+        return clock(), waiter
+
+    for speed in (1.0, 2.0, 3.0):
+        total, waiter = run(speed)
+        print(f"PCLaw at {speed:.0f}x: waited {total:.1f}s (fixed sleeps: {sum(fixed.values())}s)")
+        for record in waiter.records:
+            print(f"  {record['step']:<22} {record['status']:<7} {record['seconds']:6.2f}s "
+                  f"of {record['timeout']:5.1f}s  (fixed {fixed[record['step']]}s)")
+
+if __name__ == "__main__":
+    benchmark()
@@ -1,8 +1,8 @@
 from office_utils import *
+from word_pool import get_word_pool
+from docx_render import prepare_docx
 from parse_json import *
-import shutil
 import tempfile
-import pythoncom
 from datetime import datetime
 from tkinter import Tk, filedialog
 
@@ -11,14 +11,7 @@ def process_word_receipt(data):
         form, _, lawyer = split_data(data)
 
         client_name = form.get("clientName", "")
-        client_language = get_language(data)
-        payment_method = form.get("paymentMethod", "")
-        deposit_amount = float(form.get("depositAmount", 0))
-        receipt_reason = form.get("receiptReason", "")
-        lawyer_id = lawyer.get("id", "")
-        lawyer_name = lawyer.get("name", "")
-
-        lang = "fr" if client_language.startswith("Français") else "en"
+        lang = template_language(get_language(data))
         template_path = os.path.join(TEMPLATES_DIR, lang, "Receipt.docx")
         if not os.path.exists(template_path):
             raise FileNotFoundError(f"Receipt template not found: {template_path}")
@@ -29,136 +22,77 @@ def process_word_receipt(data):
         
         # Ensure temp directory exists
         os.makedirs(temp_dir, exist_ok=True)
-        shutil.copy(template_path, temp_doc_path)
+
+        replacements = build_receipt_replacements(form, lawyer, lang)
         
+        # Fill the placeholders straight in the .docx; Word only shows and exports it
+        filled_offline = prepare_docx(template_path, temp_doc_path, replacements)
+
         # Verify the temp file was created
         if not os.path.exists(temp_doc_path):
             raise FileNotFoundError(f"Failed to create temporary file: {temp_doc_path}")
 
-        # Formatting
-        formatted_date = format_date(datetime.today(), lang)
-        formatted_amount = f"{deposit_amount:.2f}"
-        lawyer_string = get_lawyer_string(lawyer_name, lawyer_id)
-
-        # Prepare reason text
-        reason_text = {
-            "consultation": "une consultation juridique" if lang == "fr" else "a legal consultation",
-            "trust": "un paiement en fidéicommis" if lang == "fr" else "a trust payment"
-        }.get(receipt_reason, receipt_reason)
-
-        replacements = {
-            "{user}": "Michel Assi-Bodje",
-            "{reason}": reason_text,
-            "{clientName}": client_name,
-            "{paymentMethod}": payment_method,
-            "{depositAmount}": formatted_amount,
-            "{lawyerName}": lawyer_string,
-            "{date}": formatted_date
-        }
-        
-        # Init Word COM with better error handling
-        pythoncom.CoInitialize()
+        # Print and export through a warm, pooled Word instance
+        pdf_path = None
         try:
-            word = COM.DispatchEx("Word.Application")
-            word.Visible = False  # Keep hidden initially
-            doc = word.Documents.Open(temp_doc_path)
-        except Exception as word_error:
-            raise Exception(f"Failed to open Word document: {str(word_error)}")
+            with get_word_pool().document(temp_doc_path) as document:
+                try:
+                    if not filled_offline:
+                        document.call(fill_receipt, replacements)
+                except Exception as replace_error:
+                    raise Exception(f"Failed to process document replacements: {str(replace_error)}")
 
-        # Process replacements
-        try:
-            for placeholder, replacement in replacements.items():
-                word_replace_text(doc, placeholder, replacement)
-        except Exception as replace_error:
-            raise Exception(f"Failed to process document replacements: {str(replace_error)}")
+                # Show Word window after processing
+                document.show()
 
-        # Show Word window after processing
-        word.Visible = True
-        focus_office_window(doc.ActiveWindow)
+                # Print dialog (File > Print)
+                try:
+                    document.call(show_print_dialog)
+                except Exception as print_error:
+                    print(f"Warning: Print dialog failed: {print_error}", file=sys.stderr)
 
-        # Print dialog (File > Print)
-        try:
-            word.Dialogs(88).Show()  # 88 = wdDialogFilePrint
-        except Exception as print_error:
-            print(f"Warning: Print dialog failed: {print_error}", file=sys.stderr)
+                # Save as PDF dialog with better error handling
+                try:
+                    root = Tk()
+                    root.withdraw()
+                    root.lift()  # Bring to front
+                    root.attributes('-topmost', True)  # Keep on top
 
-        # Save as PDF dialog with better error handling
-        try:
-            root = Tk()
-            root.withdraw()
-            root.lift()  # Bring to front
-            root.attributes('-topmost', True)  # Keep on top
-            
-            default_filename = f"{datetime.today():%Y-%m-%d}_{client_name.replace(' ', '-')}.pdf"
-            
-            pdf_path = filedialog.asksaveasfilename(
-                defaultextension=".pdf",
-                filetypes=[("PDF files", "*.pdf")],
-                title="Save Receipt as PDF",
-                initialfile=default_filename
-            )
-            root.destroy()
-        except Exception as dialog_error:
-            raise Exception(f"Failed to show save dialog: {str(dialog_error)}")
+                    default_filename = receipt_pdf_name(client_name)
 
-        if pdf_path:
-            try:
-                # Validate and sanitize the PDF path (similar to contract)
-                pdf_path = os.path.normpath(pdf_path)
-                pdf_dir = os.path.dirname(pdf_path)
-                
-                # Check if directory exists, create if it doesn't
-                if not os.path.exists(pdf_dir):
-                    os.makedirs(pdf_dir, exist_ok=True)
-                
-                # Check if we can write to the directory
-                if not os.access(pdf_dir, os.W_OK):
-                    raise Exception(f"No write permission to directory: {pdf_dir}")
-                
-                # Sanitize filename
-                filename = os.path.basename(pdf_path)
-                invalid_chars = '<>:"/\\|?*'
-                for char in invalid_chars:
-                    if char in filename:
-                        filename = filename.replace(char, '_')
-                
-                pdf_path = os.path.join(pdf_dir, filename)
-                
-                print(f"Attempting to export PDF to: {pdf_path}", file=sys.stderr)
-                
-                doc.ExportAsFixedFormat(pdf_path, 17)  # 17 = wdExportFormatPDF
-                              
-            except Exception as export_error:
-                raise Exception(f"PDF export failed: {str(export_error)}")
-            finally:
-                # Always clean up Word
-                try:
-                    doc.Close(False)
-                    word.Quit()
-                
-                    return {
-                        "status": "success",
-                        "message": "Word receipt successfully created.",
-                        "pdf_path": pdf_path
-                    }
-                except:
-                    pass
-                # Clean up temp file
-                try:
-                    if os.path.exists(temp_doc_path):
-                        os.remove(temp_doc_path)
-                except:
-                    # If immediate cleanup fails, use the cleaner
-                    call_cleaner_async(temp_doc_path)
-        else:
-            # User cancelled - clean up
+                    pdf_path = filedialog.asksaveasfilename(
+                        defaultextension=".pdf",
+                        filetypes=[("PDF files", "*.pdf")],
+                        title="Save Receipt as PDF",
+                        initialfile=default_filename
+                    )
+                    root.destroy()
+                except Exception as dialog_error:
+                    raise Exception(f"Failed to show save dialog: {str(dialog_error)}")
+
+                if pdf_path:
+                    try:
+                        pdf_path = sanitize_pdf_path(pdf_path)
+                        print(f"Attempting to export PDF to: {pdf_path}", file=sys.stderr)
+                        document.export_pdf(pdf_path)
+                    except Exception as export_error:
+                        raise Exception(f"PDF export failed: {str(export_error)}")
+        finally:
+            # The document is closed by now (the pool keeps Word itself running)
             try:
-                doc.Close(False)
-                word.Quit()
+                if os.path.exists(temp_doc_path):
+                    os.remove(temp_doc_path)
             except:
-                pass
-            call_cleaner_async(temp_doc_path)
+                # If immediate cleanup fails, use the cleaner
+                call_cleaner_async(temp_doc_path)
 
+        if pdf_path:
+            return {
+                "status": "success",
+                "message": "Word receipt successfully created.",
+                "pdf_path": pdf_path
+            }
+        else:
             return {
                 "status": "cancelled",
                 "message": "User cancelled receipt export to PDF."
@@ -171,11 +105,43 @@ def process_word_receipt(data):
             "error": str(e),
             "message": f"Failed to create receipt: {str(e)}"
         }
-    finally:
-        try:
-            pythoncom.CoUninitialize()
-        except:
-            pass
+
+def build_receipt_replacements(form, lawyer, lang, date=None):
+    """ Returns the replacements for Receipt.docx. """
+    deposit_amount = float(form.get("depositAmount", 0) or 0)
+    receipt_reason = form.get("receiptReason", "")
+
+    # Formatting
+    formatted_date = format_date(date or datetime.today(), lang)
+    formatted_amount = f"{deposit_amount:.2f}"
+    lawyer_string = get_lawyer_string(lawyer.get("name", ""), lawyer.get("id", ""))
+
+    # Prepare reason text
+    reason_text = {
+        "consultation": "une consultation juridique" if lang == "fr" else "a legal consultation",
+        "trust": "un paiement en fidéicommis" if lang == "fr" else "a trust payment"
+    }.get(receipt_reason, receipt_reason)
+
+    return {
+        "{user}": "Michel Assi-Bodje",
+        "{reason}": reason_text,
+        "{clientName}": form.get("clientName", ""),
+        "{paymentMethod}": form.get("paymentMethod", ""),
+        "{depositAmount}": formatted_amount,
+        "{lawyerName}": lawyer_string,
+        "{date}": formatted_date
+    }
+
+def receipt_pdf_name(client_name, date=None):
+    return f"{date or datetime.today():%Y-%m-%d}_{client_name.replace(' ', '-')}.pdf"
+
+def fill_receipt(word, doc, replacements):
+    """ Runs on the Word instance thread. """
+    for placeholder, replacement in replacements.items():
+        word_replace_text(doc, placeholder, replacement)
+
+def show_print_dialog(word, doc):
+    word.Dialogs(88).Show()  # 88 = wdDialogFilePrint
 
 # Backward compatibility
 def main():
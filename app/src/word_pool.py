@@ -0,0 +1,295 @@
+from config import *
+from com_thread import ComThread
+from contextlib import contextmanager
+import itertools
+import queue
+import threading
+import time
+
+WD_EXPORT_FORMAT_PDF = 17
+WD_ALERTS_NONE = 0
+WD_DO_NOT_SAVE_CHANGES = 0
+
+def dispatch_word():
+    """ Starts a private, hidden Word process. """
+    from win32com import client as COM
+    word = COM.DispatchEx("Word.Application")
+    word.Visible = False
+    word.DisplayAlerts = WD_ALERTS_NONE
+    return word
+
+class WordInstance:
+    """
+    One hidden Word process, owned by its own COM thread.
+    Every call on the instance or its documents runs on that thread.
+    """
+    def __init__(self, index, factory):
+        self.index = index
+        self._factory = factory
+        self._thread = ComThread(f"WordInstance-{index}")
+        self.word = None
+        self.documents_served = 0
+        self.failed = False
+        self.detached = False
+
+    def call(self, func, *args):
+        """ Runs func(word, *args) on the instance thread, starting Word if needed. """
+        return self._thread.call(self._run, func, args)
+
+    def warm(self):
+        """ Starts Word in the background without waiting. """
+        return self._thread.submit(self._ensure_started)
+
+    def quit(self):
+        """ Closes any open documents without saving, quits Word and stops the thread. """
+        if self._thread.running:
+            self._thread.call(self._quit)
+        self._thread.stop()
+
+    def release(self):
+        """ Stops managing this Word process but leaves it open, e.g. for the user. """
+        if self._thread.running:
+            self._thread.call(self._forget)
+        self._thread.stop()
+
+    # --- Runs on the instance thread ---
+
+    def _ensure_started(self):
+        if self.word is None:
+            started = time.perf_counter()
+            self.word = self._factory()
+            log(f"Word instance {self.index} started in {time.perf_counter() - started:.1f}s")
+        return self.word
+
+    def _run(self, func, args):
+        word = self._ensure_started()
+        try:
+            return func(word, *args)
+        except Exception:
+            # Word may be in a bad state now; the pool recycles it
+            self.failed = True
+            raise
+
+    def _quit(self):
+        if self.word is None:
+            return
+        try:
+            for i in range(self.word.Documents.Count, 0, -1):
+                self.word.Documents(i).Close(WD_DO_NOT_SAVE_CHANGES)
+        except Exception as e:
+            log(f"Word instance {self.index}: could not close documents: {e}")
+        try:
+            self.word.Quit()
+        except Exception as e:
+            log(f"Word instance {self.index}: quit failed: {e}")
+        self.word = None
+
+    def _forget(self):
+        self.word = None
+
+class WordDocument:
+    """ A document opened in a pooled Word instance. """
+    def __init__(self, instance, path):
+        self.instance = instance
+        self.path = path
+        self.doc = None
+        self.detached = False
+
+    def call(self, func, *args):
+        """ Runs func(word, doc, *args) on the instance thread. """
+        return self.instance.call(lambda word: func(word, self.doc, *args))
+
+    def open(self):
+        def _open(word):
+            word.Visible = False
+            self.doc = word.Documents.Open(self.path)
+        self.instance.call(_open)
+
+    def show(self):
+        """ Makes Word visible and brings the document to the front. """
+        def _show(word, doc):
+            word.Visible = True
+            try:
+                doc.Activate()
+                word.Activate()
+            except Exception as e:
+                log(f"Failed to activate Word window: {e}")
+        self.call(_show)
+
+    def export_pdf(self, pdf_path):
+        self.call(lambda word, doc: doc.ExportAsFixedFormat(pdf_path, WD_EXPORT_FORMAT_PDF))
+
+    def close(self):
+        """ Closes the document without saving and hides Word again. """
+        if self.doc is None or self.detached:
+            return
+        def _close(word, doc):
+            try:
+                doc.Close(WD_DO_NOT_SAVE_CHANGES)
+            finally:
+                word.Visible = False
+        try:
+            self.call(_close)
+        finally:
+            self.doc = None
+
+    def detach(self):
+        """
+        Leaves the document open in Word for the user. The instance leaves the
+        pool with it and a fresh one takes its place.
+        """
+        self.detached = True
+
+class WordPool:
+    """
+    Keeps hidden Word instances warm for document generation.
+    An instance is recycled after max_documents documents or after an error.
+    """
+    def __init__(self, size=1, max_documents=20, factory=dispatch_word):
+        self.size = max(1, size)
+        self.max_documents = max_documents
+        self._factory = factory
+        self._ids = itertools.count()
+        self._idle = queue.Queue()
+        self._all = set()
+        self._lock = threading.Lock()
+        self._closed = False
+        self.stats = {"documents": 0, "recycled": 0, "detached": 0, "started": 0}
+        for _ in range(self.size):
+            self._idle.put(self._new_instance())
+
+    def _new_instance(self):
+        instance = WordInstance(next(self._ids), self._factory)
+        with self._lock:
+            self._all.add(instance)
+        self.stats["started"] += 1
+        return instance
+
+    def warm(self):
+        """ Starts Word in every idle instance in the background. """
+        with self._lock:
+            instances = list(self._all)
+        for instance in instances:
+            instance.warm()
+
+    @contextmanager
+    def lease(self, timeout=None):
+        """ Borrows an instance for the duration of the block. """
+        if self._closed:
+            raise RuntimeError("Word pool is shut down")
+        instance = self._idle.get(timeout=timeout)
+        try:
+            yield instance
+        finally:
+            self._give_back(instance)
+
+    @contextmanager
+    def document(self, path, timeout=None):
+        """
+        Opens path in a pooled instance and yields a WordDocument.
+        The document is closed without saving on exit unless detached.
+        """
+        with self.lease(timeout) as instance:
+            document = WordDocument(instance, path)
+            document.open()
+            try:
+                yield document
+            finally:
+                self.stats["documents"] += 1
+                instance.documents_served += 1
+                if document.detached:
+                    instance.detached = True
+                else:
+                    try:
+                        document.close()
+                    except Exception as e:
+                        log(f"Failed to close {path}: {e}")
+                        instance.failed = True
+
+    def _give_back(self, instance):
+        replacement = instance
+        if instance.detached:
+            self.stats["detached"] += 1
+            self._retire(instance, keep_open=True)
+            replacement = self._new_instance()
+        elif instance.failed or instance.documents_served >= self.max_documents:
+            reason = "error" if instance.failed else f"{instance.documents_served} documents"
+            log(f"Recycling Word instance {instance.index} after {reason}")
+            self.stats["recycled"] += 1
+            self._retire(instance)
+            replacement = self._new_instance()
+            if not self._closed:
+                replacement.warm()
+        self._idle.put(replacement)
+
+    def _retire(self, instance, keep_open=False):
+        with self._lock:
+            self._all.discard(instance)
+        try:
+            if keep_open:
+                instance.release()
+            else:
+                instance.quit()
+        except Exception as e:
+            log(f"Failed to retire Word instance {instance.index}: {e}")
+
+    def shutdown(self):
+        """ Quits every pooled Word instance. """
+        self._closed = True
+        with self._lock:
+            instances = list(self._all)
+            self._all.clear()
+        for instance in instances:
+            try:
+                instance.quit()
+            except Exception as e:
+                log(f"Failed to quit Word instance {instance.index}: {e}")
+
+_pool = None
+_pool_lock = threading.Lock()
+
+def get_word_pool():
+    """ Returns the shared WordPool. """
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = WordPool(size=WORD_POOL_SIZE, max_documents=WORD_POOL_MAX_DOCUMENTS)
+        return _pool
+
+def shutdown_word_pool():
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown()
+
+
+def benchmark(documents=20, startup_delay=0.3):
+    """ Compares a Word process per document with the pool, on FakeWord. """
+    from fakes import FakeWord
+    import tempfile
+    folder = tempfile.mkdtemp(prefix="wordpool_")
+    source = os.path.join(folder, "Receipt.docx")
+    with open(source, "wb") as f:
+        f.write(b"fake")
+
+    start = time.perf_counter()
+    for i in range(documents):
+        word = FakeWord(startup_delay)
+        doc = word.Documents.Open(source)
+        doc.ExportAsFixedFormat(os.path.join(folder, f"cold_{i}.pdf"), WD_EXPORT_FORMAT_PDF)
+        doc.Close()
+        word.Quit()
+    cold = (time.perf_counter() - start) / documents * 1000
+
+    pool = WordPool(size=1, max_documents=10, factory=lambda: FakeWord(startup_delay))
+    start = time.perf_counter()
+    for i in range(documents):
+        with pool.document(source) as document:
+            document.export_pdf(os.path.join(folder, f"pooled_{i}.pdf"))
+    pooled = (time.perf_counter() - start) / documents * 1000
+    pool.shutdown()
+
+    print(f"Word per document: {cold:.1f} ms/document")
+    print(f"Pooled Word:       {pooled:.1f} ms/document ({pool.stats})")
+
+if __name__ == "__main__":
+    benchmark()
@@ -0,0 +1,288 @@
+from config import *
+import io
+import json
+import importlib
+import itertools
+import queue
+import subprocess
+import threading
+from concurrent.futures import Future, TimeoutError as FutureTimeout
+from contextlib import redirect_stdout
+
+# Warm worker processes for scripts that are not in MODULE_REGISTRY yet.
+#
+# Protocol: one JSON object per line, in both directions.
+#     request:  {"id": 7, "script": "someScript", "data": {...}}
+#     response: {"id": 7, "ok": true, "result": {...}}
+#               {"id": 7, "ok": false, "error": "..."}
+# Inside a worker, stdout is rerouted to stderr, so anything a script prints
+# ends up in the log instead of corrupting the result channel.
+
+WORKER_FLAG = "--worker"
+
+def parse_script_output(output):
+    """
+    Parses what a legacy script printed: the last line that looks like JSON,
+    then the whole output, then plain text as {"output": ...}.
+    """
+    output = output.strip()
+    try:
+        for line in reversed(output.split('\n')):  # Start from the end
+            line = line.strip()
+            if line.startswith('{') or line.startswith('['):
+                return json.loads(line)
+        return json.loads(output)
+    except json.JSONDecodeError:
+        # Not JSON, return as text
+        return { "output": output }
+
+
+# ----------------------------
+# Worker side
+# ----------------------------
+
+# Scripts whose function takes the request data directly: script name ->
+# function name. Nothing is guessed from the module; every other script runs
+# through its main(), with the JSON on stdin as before.
+WORKER_ENTRIES = {}
+
+_entries = {}
+
+def _resolve_entry(script_name):
+    """ The script's module and its WORKER_ENTRIES function (None for main()). """
+    if script_name in _entries:
+        return _entries[script_name]
+
+    module = importlib.import_module(script_name)
+    entry = None
+    if script_name in WORKER_ENTRIES:
+        entry = getattr(module, WORKER_ENTRIES[script_name])
+
+    _entries[script_name] = (module, entry)
+    return _entries[script_name]
+
+def _run_script(script_name, data):
+    module, entry = _resolve_entry(script_name)
+    if entry is not None:
+        return entry(data)
+
+    # Legacy script: feed the JSON on stdin and read back what main() prints
+    if not hasattr(module, "main"):
+        raise AttributeError(f"Script {script_name} has no main() and no entry in WORKER_ENTRIES")
+    captured = io.StringIO()
+    saved_stdin = sys.stdin
+    sys.stdin = io.StringIO(json.dumps(data))
+    try:
+        with redirect_stdout(captured):
+            module.main()
+    finally:
+        sys.stdin = saved_stdin
+    return parse_script_output(captured.getvalue())
+
+def serve():
+    """ Worker loop: answers framed requests from stdin until it closes. """
+    # Keep a private handle on the real stdout for responses, and send every
+    # other write to stderr
+    channel = io.TextIOWrapper(os.fdopen(os.dup(1), "wb"), encoding="utf-8", newline="\n")
+    os.dup2(2, 1)
+    sys.stdout = sys.stderr
+
+    if SRC_DIR not in sys.path:
+        sys.path.insert(0, SRC_DIR)
+
+    requests = io.TextIOWrapper(sys.stdin.buffer, encoding="utf-8")
+    for line in requests:
+        line = line.strip()
+        if not line:
+            continue
+        request_id = None
+        try:
+            request = json.loads(line)
+            request_id = request.get("id")
+            result = _run_script(request["script"], request.get("data"))
+            response = {"id": request_id, "ok": True, "result": result}
+        except Exception as e:
+            response = {"id": request_id, "ok": False, "error": f"{type(e).__name__}: {e}"}
+
+        try:
+            payload = json.dumps(response, default=str)
+        except (TypeError, ValueError) as e:
+            payload = json.dumps({"id": request_id, "ok": False, "error": f"Unserializable result: {e}"})
+        channel.write(payload + "\n")
+        channel.flush()
+
+
+# ----------------------------
+# Hub side
+# ----------------------------
+
+class WorkerCrashed(Exception):
+    """ The worker process died or stopped answering. """
+
+def worker_command():
+    """ Command line that starts one worker, frozen or not. """
+    if getattr(sys, 'frozen', False):
+        # main.py dispatches to serve() when it sees the flag
+        return [sys.executable, WORKER_FLAG]
+    return [sys.executable, "-u", os.path.abspath(__file__), WORKER_FLAG]
+
+class Worker:
+    """ One long-lived worker process plus the thread reading its answers. """
+    def __init__(self, index, command):
+        self.index = index
+        self.command = command
+        self.proc = None
+        self.requests_served = 0
+        self._pending = {}
+        self._pending_lock = threading.Lock()
+        self._closed = True
+
+    def start(self):
+        self.proc = subprocess.Popen(
+            self.command,
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            cwd=SRC_DIR,
+            creationflags=getattr(subprocess, "CREATE_NO_WINDOW", 0),
+        )
+        self.requests_served = 0
+        self._closed = False
+        threading.Thread(target=self._read_responses, args=(self.proc,), daemon=True).start()
+        threading.Thread(target=self._drain_stderr, args=(self.proc,), daemon=True).start()
+        log(f"Started worker {self.index} (pid {self.proc.pid})")
+
+    @property
+    def alive(self):
+        return self.proc is not None and not self._closed and self.proc.poll() is None
+
+    def call(self, request_id, script_name, data, timeout=None):
+        future = Future()
+        with self._pending_lock:
+            if self._closed:
+                raise WorkerCrashed(f"Worker {self.index} is not running")
+            self._pending[request_id] = future
+        try:
+            line = json.dumps({"id": request_id, "script": script_name, "data": data}) + "\n"
+            self.proc.stdin.write(line.encode("utf-8"))
+            self.proc.stdin.flush()
+            response = future.result(timeout=timeout)
+        except FutureTimeout:
+            # A stuck worker can't be trusted with the next request
+            self.stop()
+            raise WorkerCrashed(f"Worker {self.index} timed out after {timeout}s on {script_name}")
+        except (OSError, ValueError) as e:
+            raise WorkerCrashed(f"Worker {self.index} is gone: {e}")
+        finally:
+            with self._pending_lock:
+                self._pending.pop(request_id, None)
+
+        self.requests_served += 1
+        if not response.get("ok"):
+            return {"error": response.get("error", "Unknown worker error")}
+        return response.get("result")
+
+    def stop(self):
+        if self.proc is None:
+            return
+        with self._pending_lock:
+            self._closed = True
+        try:
+            self.proc.stdin.close()
+        except Exception:
+            pass
+        try:
+            self.proc.wait(timeout=2)
+        except subprocess.TimeoutExpired:
+            self.proc.kill()
+            self.proc.wait()
+
+    def _read_responses(self, proc):
+        for raw in proc.stdout:
+            try:
+                response = json.loads(raw.decode("utf-8"))
+            except ValueError:
+                log(f"[worker {self.index}] Ignoring malformed frame: {raw[:200]!r}")
+                continue
+            with self._pending_lock:
+                future = self._pending.get(response.get("id"))
+            if future is not None and not future.done():
+                future.set_result(response)
+
+        # stdout closed: the process exited, fail whatever was in flight
+        with self._pending_lock:
+            if proc is not self.proc:
+                # A restarted worker already replaced this process
+                return
+            self._closed = True
+            pending = list(self._pending.values())
+        try:
+            code = proc.wait(timeout=5)
+        except subprocess.TimeoutExpired:
+            code = None
+        for future in pending:
+            if not future.done():
+                future.set_exception(WorkerCrashed(f"Worker {self.index} exited with code {code}"))
+
+    def _drain_stderr(self, proc):
+        for raw in proc.stderr:
+            line = raw.decode("utf-8", errors="replace").rstrip()
+            if line:
+                log(f"[worker {self.index}] {line}")
+
+class WorkerPool:
+    """
+    A fixed number of warm Python workers. Each worker runs one request at a
+    time; dead workers are restarted on their next use, and a worker that
+    doesn't answer within the timeout is stopped.
+    """
+    def __init__(self, size=2, command=None, timeout=WORKER_CALL_TIMEOUT):
+        self.size = max(1, size)
+        self.timeout = timeout
+        self._command = command or worker_command()
+        self._ids = itertools.count(1)
+        self._idle = queue.Queue()
+        self._workers = [Worker(i, self._command) for i in range(self.size)]
+        for worker in self._workers:
+            self._idle.put(worker)
+        self.restarts = 0
+
+    def call(self, script_name, data, timeout=None):
+        """ Runs a script in a free worker and returns its result. """
+        worker = self._idle.get()
+        try:
+            if not worker.alive:
+                if worker.proc is not None:
+                    worker.stop()
+                    self.restarts += 1
+                    log(f"Worker {worker.index} died, restarting")
+                worker.start()
+            return worker.call(next(self._ids), script_name, data, timeout or self.timeout)
+        except WorkerCrashed as e:
+            log(str(e))
+            return {"error": str(e)}
+        finally:
+            self._idle.put(worker)
+
+    def shutdown(self):
+        for worker in self._workers:
+            worker.stop()
+
+_pool = None
+_pool_lock = threading.Lock()
+
+def get_worker_pool():
+    """ Returns the shared pool, created on first use. """
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = WorkerPool(size=WORKER_POOL_SIZE)
+        return _pool
+
+def shutdown_worker_pool():
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown()
+
+if __name__ == "__main__":
+    serve()
@@ -0,0 +1,105 @@
+from datetime import date, datetime, time, timedelta
+
+import pytest
+
+from availability import (WEEKDAYS, earliest_slots, find_free_slots, lawyer_events, naive_free_slots,
+                          synthetic_calendar)
+from calendar_cache import CalendarCache
+from lawyer_directory import get_lawyer_directory
+
+START = date(2025, 1, 6)   # a Monday
+END = START + timedelta(days=27)
+DURATION = timedelta(minutes=60)
+STEP = timedelta(minutes=30)
+
+
+@pytest.fixture(scope="module")
+def calendar():
+    """ The lawyers of lawyers.json and four weeks of generated appointments, through the cache. """
+    lawyers = get_lawyer_directory().all()
+    cache = CalendarCache(loader=None, subscribe=None, max_age=None)
+    window = (datetime.combine(START, time.min), datetime.combine(END, time.max))
+    cache.load_events(synthetic_calendar(lawyers, START, 28, per_day=6), *window)
+    return lawyers, lawyer_events(lawyers, *window, cache), cache
+
+
+def reference(lawyer, events, location=None, now=None):
+    """ naive_free_slots plus the location rules and the not-before-now cut, checked one by one. """
+    blocked = (lawyer.get("unavailability") or {}).get(location or "", ())
+    return [(s, e) for s, e in naive_free_slots(lawyer, events, START, END, DURATION, STEP)
+            if WEEKDAYS[s.weekday()] not in blocked and (now is None or s >= now)]
+
+
+def test_sweep_matches_the_naive_reference(calendar):
+    lawyers, events, _ = calendar
+    found = find_free_slots(lawyers, events, START, END, 60, 30)
+
+    for lawyer in lawyers:
+        assert [(s.start, s.end) for s in found[lawyer["id"]]] == reference(lawyer, events[lawyer["id"]])
+    assert sum(len(slots) for slots in found.values()) > 0
+
+
+def test_daily_cap_and_remaining_count(calendar):
+    lawyers, events, _ = calendar
+    found = find_free_slots(lawyers, events, START, END, 60, 30)
+
+    for lawyer in lawyers:
+        cap = lawyer["maxDailyAppointments"]
+        booked = {}
+        for event in events[lawyer["id"]]:
+            booked[event.start.date()] = booked.get(event.start.date(), 0) + 1
+        for slot in found[lawyer["id"]]:
+            assert slot.remaining == cap - booked.get(slot.start.date(), 0) > 0
+        full_days = {day for day, count in booked.items() if count >= cap}
+        assert not {slot.start.date() for slot in found[lawyer["id"]]} & full_days
+
+
+def test_unavailability_rules_from_lawyers_json(calendar):
+    lawyers, events, _ = calendar
+    found = find_free_slots(lawyers, events, START, END, 60, 30, location="office")
+
+    rules = {l["id"]: l["unavailability"]["office"] for l in lawyers if l.get("unavailability", {}).get("office")}
+    assert rules, "lawyers.json has no office rule to test"
+    for lawyer in lawyers:
+        slots = found[lawyer["id"]]
+        assert [(s.start, s.end) for s in slots] == reference(lawyer, events[lawyer["id"]], "office")
+        for day in rules.get(lawyer["id"], ()):
+            assert all(WEEKDAYS[s.start.weekday()] != day for s in slots)
+
+
+def test_slots_before_now_are_skipped(calendar):
+    lawyers, events, _ = calendar
+    now = datetime.combine(START + timedelta(days=9), time(11, 10))
+    found = find_free_slots(lawyers, events, START, END, 60, 30, now=now)
+
+    for lawyer in lawyers:
+        assert [(s.start, s.end) for s in found[lawyer["id"]]] == reference(lawyer, events[lawyer["id"]], now=now)
+
+
+@pytest.mark.parametrize("case_type, location", [
+    ("common", "office"), ("estate", "office"), ("divorce", "phone"), ("DEFAMATIONS", "office"),
+])
+def test_earliest_slots_match_ranking_every_qualified_lawyer(calendar, case_type, location):
+    lawyers, events, cache = calendar
+    now = datetime.combine(START + timedelta(days=2), time(13, 45))
+    qualified = [l for l in lawyers if case_type.lower() in l["specialties"]]
+
+    expected = []
+    for lawyer in qualified:
+        booked = {}
+        for event in events[lawyer["id"]]:
+            booked[event.start.date()] = booked.get(event.start.date(), 0) + 1
+        for start, end in reference(lawyer, events[lawyer["id"]], location, now):
+            remaining = lawyer["maxDailyAppointments"] - booked.get(start.date(), 0)
+            expected.append((start, -remaining, lawyer["id"]))
+    expected.sort()
+
+    best = earliest_slots(case_type, location, START, END, limit=12, cache=cache, now=now)
+    assert [(s.start, -s.remaining, s.lawyer_id) for s in best] == expected[:12]
+    assert {s.lawyer_id for s in best} <= {l["id"] for l in qualified}
+
+
+def test_earliest_slots_need_a_qualified_lawyer(calendar):
+    _, _, cache = calendar
+    with pytest.raises(ValueError, match="No lawyer handles case type"):
+        earliest_slots("maritime", "office", START, END, cache=cache)
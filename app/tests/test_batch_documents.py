@@ -0,0 +1,114 @@
+import csv
+import json
+import os
+
+import pytest
+
+from batch_documents import load_manifest, plan_document, run_batch
+from docx_render import make_sample_docx
+
+
+@pytest.fixture
+def templates(tmp_path):
+    """ Contract.docx in en/ and fr/, plus an en/Receipt.docx lacking the receipt placeholders. """
+    folder = tmp_path / "templates"
+    for lang in ("en", "fr"):
+        os.makedirs(folder / lang)
+        make_sample_docx(str(folder / lang / "Contract.docx"), paragraphs=2)
+    make_sample_docx(str(folder / "en" / "Receipt.docx"), paragraphs=2)
+    return str(folder)
+
+
+def contract(name, **fields):
+    record = {"type": "contract", "clientName": name, "clientEmail": "client@example.com",
+              "depositAmount": "1500", "contractTitle": "divorce", "date": "2025-07-31"}
+    record.update(fields)
+    return record
+
+
+def test_csv_manifest_drops_bom_blank_columns_and_padding(tmp_path):
+    path = tmp_path / "batch.csv"
+    path.write_bytes(b"\xef\xbb\xbftype, clientName ,\ncontract,  Jean Tremblay ,x\n")
+
+    assert load_manifest(str(path)) == [{"type": "contract", "clientName": "Jean Tremblay"}]
+
+
+def test_json_manifest_is_a_list_or_records(tmp_path):
+    listed, wrapped = tmp_path / "a.json", tmp_path / "b.json"
+    listed.write_text(json.dumps([{"clientName": " A "}]), encoding="utf-8")
+    wrapped.write_text(json.dumps({"records": [{"clientName": "B"}]}), encoding="utf-8")
+
+    assert load_manifest(str(listed)) == [{"clientName": "A"}]
+    assert load_manifest(str(wrapped)) == [{"clientName": "B"}]
+
+
+@pytest.mark.parametrize("record, message", [
+    ({"type": "invoice", "clientName": "A"}, "Unknown document type: invoice"),
+    ({"clientName": "A"}, "Unknown document type: (none)"),
+    ({"type": "contract"}, "Missing clientName"),
+    (contract("A", fileName="..\\out.pdf"), "fileName must be a plain file name"),
+    (contract("A", fileName="sub/out"), "fileName must be a plain file name"),
+])
+def test_unusable_records_are_rejected(templates, record, message):
+    with pytest.raises(ValueError, match=message.replace("(", r"\(").replace(")", r"\)")):
+        plan_document(record, templates_dir=templates)
+
+
+def test_plan_picks_template_and_file_name(templates):
+    plan = plan_document(contract("A", fileName="Mandate"), templates_dir=templates)
+    assert plan["template"] == os.path.join(templates, "en", "Contract.docx")
+    assert plan["pdf_name"] == "Mandate.pdf"
+    assert plan["replacements"]["{clientName}"] == "A"
+
+
+def test_each_row_succeeds_or_fails_on_its_own(templates, tmp_path):
+    output = str(tmp_path / "out")
+    records = [
+        contract("Jean Tremblay"),
+        {"type": "invoice", "clientName": "Bad type"},
+        contract("Jean Tremblay"),
+        {"type": "receipt", "clientName": "No placeholders", "depositAmount": "50"},
+        contract("", fileName="x"),
+    ]
+    summary = run_batch(records, output, pdf=False, templates_dir=templates)
+
+    assert (summary["status"], summary["succeeded"], summary["failed"]) == ("partial", 2, 3)
+    results = summary["results"]
+    assert [r["status"] for r in results] == ["success", "error", "success", "error", "error"]
+    assert "Unknown document type" in results[1]["error"]
+    assert results[3]["error"].startswith("Placeholders not found in Receipt.docx: ")
+    assert "Missing clientName" in results[4]["error"]
+
+    # Same client twice gets a second name; failed rows leave no file behind
+    first, second = results[0]["file"], results[2]["file"]
+    assert os.path.exists(first) and os.path.exists(second) and first != second
+    assert os.path.splitext(second)[0].endswith("_2")
+    assert sorted(f for f in os.listdir(output) if f.endswith(".docx")) == \
+        sorted(os.path.basename(f) for f in (first, second))
+
+    with open(summary["report"], encoding="utf-8-sig", newline="") as f:
+        report = list(csv.DictReader(f))
+    assert [row["status"] for row in report] == [r["status"] for r in results]
+
+
+def test_pdf_rows_go_through_export(templates, tmp_path):
+    exported = []
+
+    def export(docx_path, pdf_path):
+        if "Broken" in pdf_path:
+            raise RuntimeError("Word could not export")
+        exported.append((os.path.exists(docx_path), pdf_path))
+
+    summary = run_batch([contract("Jean Tremblay"), contract("Broken Client")], str(tmp_path / "out"),
+                        export=export, templates_dir=templates)
+
+    assert [r["status"] for r in summary["results"]] == ["success", "error"]
+    assert summary["results"][1]["error"] == "Word could not export"
+    assert exported == [(True, summary["results"][0]["file"])]
+    assert summary["results"][0]["file"].endswith(".pdf")
+
+
+def test_nothing_created_is_an_error(templates, tmp_path):
+    summary = run_batch([{"clientName": "A"}], str(tmp_path / "out"), pdf=False, templates_dir=templates)
+    assert summary["status"] == "error"
+    assert summary["failed"] == 1
@@ -0,0 +1,37 @@
+from datetime import datetime
+
+import pytest
+
+import calendar_cache
+
+
+@pytest.fixture
+def short_date(monkeypatch):
+    """ Sets the short date format the filters see (off Windows, the default is used). """
+    def use(windows_pattern):
+        monkeypatch.setattr(calendar_cache, "_date_pattern", None)
+        monkeypatch.setattr(calendar_cache, "DEFAULT_SHORT_DATE", windows_pattern)
+    return use
+
+
+@pytest.mark.parametrize("windows_pattern, expected", [
+    ("M/d/yyyy", "03/07/2026 09:30"),
+    ("dd/MM/yyyy", "07/03/2026 09:30"),
+    ("yyyy-MM-dd", "2026-03-07 09:30"),
+    ("d.M.yyyy", "07.03.2026 09:30"),
+])
+def test_restriction_date_follows_the_locale(short_date, windows_pattern, expected):
+    short_date(windows_pattern)
+    assert calendar_cache.restriction_date(datetime(2026, 3, 7, 9, 30)) == expected
+
+
+def test_window_filter_overlaps_the_range(short_date):
+    short_date("yyyy-MM-dd")
+    start, end = datetime(2026, 3, 1), datetime(2026, 3, 31, 23, 59)
+    assert calendar_cache.window_filter(start, end) == \
+        "[Start] <= '2026-03-31 23:59' AND [End] >= '2026-03-01 00:00'"
+
+
+def test_calendar_table_uses_the_same_filter():
+    import calendar_table
+    assert calendar_table.window_filter is calendar_cache.window_filter
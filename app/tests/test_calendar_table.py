@@ -0,0 +1,71 @@
+from datetime import datetime, timedelta
+
+from calendar_cache import read_calendar, read_calendar_items
+from calendar_table import read_calendar_table, record_fixture
+from fakes import FixtureNamespace
+
+START = datetime(2026, 3, 2)
+END = START + timedelta(days=30)
+
+
+def calendar():
+    """ Single appointments (as table rows) and a weekly series (as occurrences). """
+    rows = [
+        ["E1", "Client call", START + timedelta(days=1, hours=9), START + timedelta(days=1, hours=10),
+         "Lawyer 1", False, False],
+        ["E2", "Court", START + timedelta(days=3), START + timedelta(days=4), "Lawyer 2, Lawyer 1", True, False],
+        ["E3", "Intake", START + timedelta(days=2, hours=14), START + timedelta(days=2, hours=15),
+         "Lawyer 3", False, False],
+        ["E4", None, START + timedelta(days=8, hours=11), START + timedelta(days=8, hours=12), "", False, False],
+    ]
+    occurrences = [[f"R{week}", "Team meeting", START + timedelta(days=7 * week, hours=12),
+                    START + timedelta(days=7 * week, hours=13), "Lawyer 1, Lawyer 2", False, True]
+                   for week in range(4)]
+    return rows, occurrences
+
+
+def as_tuples(events):
+    return sorted((e.entry_id, e.subject, e.start, e.end, tuple(e.categories), e.all_day) for e in events)
+
+
+def test_table_read_matches_the_items_path():
+    rows, occurrences = calendar()
+    table = FixtureNamespace(rows=rows, occurrences=occurrences)
+    items = FixtureNamespace(rows=[], occurrences=rows + occurrences)
+
+    from_table = read_calendar(table, START, END)
+    from_items = read_calendar_items(items, START, END)
+
+    assert len(from_table) == 8
+    assert as_tuples(from_table) == as_tuples(from_items)
+    assert [e.start for e in from_table] == sorted(e.start for e in from_table)
+
+
+def test_occurrences_stop_at_the_window_end():
+    rows, occurrences = calendar()
+    occurrences.append(["R9", "Team meeting", END + timedelta(days=1), END + timedelta(days=1, hours=1),
+                        "Lawyer 1", False, True])
+    events = read_calendar_table(FixtureNamespace(rows=rows, occurrences=occurrences), START, END)
+    assert "R9" not in {e.entry_id for e in events}
+
+
+def test_failed_table_read_falls_back_to_items():
+    rows, occurrences = calendar()
+    namespace = FixtureNamespace(rows=[], occurrences=rows + occurrences)
+
+    def no_table(filter_text, table_contents=0):
+        raise RuntimeError("GetTable not supported")
+
+    namespace.folder.GetTable = no_table
+    assert as_tuples(read_calendar(namespace, START, END)) == \
+        as_tuples(read_calendar_items(namespace, START, END))
+
+
+def test_recorded_fixture_replays_the_same_events(tmp_path):
+    rows, occurrences = calendar()
+    live = FixtureNamespace(rows=rows, occurrences=occurrences)
+    path = tmp_path / "calendar.json"
+
+    assert record_fixture(live, START, END, str(path)) == (4, 4)
+    assert as_tuples(read_calendar(FixtureNamespace(path=str(path)), START, END)) == \
+        as_tuples(read_calendar(live, START, END))
@@ -0,0 +1,66 @@
+import json
+
+from fakes import SimulatedClock
+from cleanTempDoc import TempReaper
+
+
+def make_reaper(tmp_path, locked):
+    clock = SimulatedClock()
+    reaper = TempReaper(journal_path=str(tmp_path / "journal.json"), probe=lambda path: path not in locked,
+                        clock=clock, wall=clock, initial_delay=2.0, max_delay=60.0)
+    return clock, reaper
+
+
+def run_until_idle(clock, reaper, limit=3600):
+    while clock() < limit:
+        wait = reaper.run_pending()
+        if wait is None:
+            return
+        clock.advance(wait)
+
+
+def test_locked_file_is_deleted_once_released(tmp_path):
+    path = tmp_path / "Receipt.pdf"
+    path.write_bytes(b"pdf")
+    locked = {str(path)}
+    clock, reaper = make_reaper(tmp_path, locked)
+
+    reaper.add(str(path), timeout_minutes=30)
+    clock.advance(10)
+    reaper.run_pending()
+    assert path.exists()
+
+    locked.clear()
+    run_until_idle(clock, reaper)
+    assert not path.exists()
+    assert reaper.pending() == []
+    assert reaper.stats["deleted"] == 1
+
+
+def test_probes_back_off(tmp_path):
+    path = tmp_path / "Contract.docx"
+    path.write_bytes(b"docx")
+    clock, reaper = make_reaper(tmp_path, {str(path)})
+
+    reaper.add(str(path), timeout_minutes=10)
+    run_until_idle(clock, reaper)
+
+    # 2, 4, 8, ... 60 s apart over ten minutes, not a poll every second
+    assert reaper.stats["probes"] < 20
+    assert reaper.stats["expired"] == 1
+
+
+def test_expired_file_stays_in_the_journal_for_the_next_start(tmp_path):
+    path = tmp_path / "Receipt.pdf"
+    path.write_bytes(b"pdf")
+    clock, reaper = make_reaper(tmp_path, {str(path)})
+
+    reaper.add(str(path), timeout_minutes=1)
+    run_until_idle(clock, reaper)
+    with open(tmp_path / "journal.json", "r", encoding="utf-8") as f:
+        assert str(path) in json.dumps(json.load(f))
+
+    # Next session: the file is free now and the startup sweep deletes it
+    clock, reaper = make_reaper(tmp_path, set())
+    assert reaper.sweep() == 1
+    assert not path.exists()
@@ -0,0 +1,92 @@
+import zipfile
+import xml.etree.ElementTree as ET
+
+import pytest
+
+from docx_render import make_sample_docx, render_docx, prepare_docx, mailto_link, W_NS, R_NS, RELS_NS
+
+W = "{%s}" % W_NS
+REPLACEMENTS = {
+    "{clientName}": "Jean Tremblay",
+    "{contractTitle}": "Representation in Divorce",
+    "{depositAmount}": "1500",
+    "{totalAmount}": "1824.63",
+    "{date}": "July 22nd, 2025",
+}
+
+
+@pytest.fixture
+def template(tmp_path):
+    return make_sample_docx(str(tmp_path / "Contract.docx"), paragraphs=1)
+
+
+def part(path, name):
+    with zipfile.ZipFile(path) as z:
+        return ET.fromstring(z.read(name))
+
+
+def text_of(root):
+    return "".join(node.text or "" for node in root.iter(W + "t"))
+
+
+def test_placeholders_split_across_runs_are_filled(template, tmp_path):
+    dest = str(tmp_path / "filled.docx")
+    report = render_docx(template, dest, dict(REPLACEMENTS, clientEmail="jean@example.com"))
+
+    body = text_of(part(dest, "word/document.xml"))
+    assert "Between Jean Tremblay and the firm, on July 22nd, 2025." in body
+    assert "Deposit of 1500$ (total 1824.63$ & taxes)." in body
+    assert "{" not in body
+    # The footer's {da|te} is split too
+    assert text_of(part(dest, "word/footer1.xml")) == "Signed on July 22nd, 2025"
+    assert report["filled"]["date"] == 2
+    assert report["missing"] == []
+
+
+def test_values_are_escaped(template, tmp_path):
+    dest = str(tmp_path / "filled.docx")
+    render_docx(template, dest, dict(REPLACEMENTS, clientName="Smith & <Sons>"))
+    assert "Between Smith & <Sons> and the firm" in text_of(part(dest, "word/document.xml"))
+
+
+def test_hyperlink_gets_a_relationship_and_ordered_run_properties(template, tmp_path):
+    dest = str(tmp_path / "filled.docx")
+    report = render_docx(template, dest, REPLACEMENTS,
+                         {"{clientEmail}": mailto_link("jean@example.com", tooltip="Email & call")})
+    assert report["filled"]["clientEmail"] == 1
+
+    rels = part(dest, "word/_rels/document.xml.rels")
+    links = [r for r in rels if r.get("TargetMode") == "External"]
+    assert len(links) == 1
+    assert links[0].get("Target") == "mailto:jean@example.com"
+    assert links[0].get("Id") == "rId2"   # rId1 is the footer
+    assert links[0].tag == "{%s}Relationship" % RELS_NS
+
+    document = part(dest, "word/document.xml")
+    hyperlink = next(document.iter(W + "hyperlink"))
+    assert hyperlink.get("{%s}id" % R_NS) == "rId2"
+    assert hyperlink.get(W + "tooltip") == "Email & call"
+    assert text_of(hyperlink) == "jean@example.com"
+    # Schema order: rStyle before b (kept from the run), then color, then u
+    props = hyperlink.find(f"{W}r/{W}rPr")
+    assert [child.tag[len(W):] for child in props] == ["rStyle", "b", "color", "u"]
+    assert "Contact: jean@example.com" in text_of(document)
+
+
+def test_missing_placeholders_are_reported(template, tmp_path):
+    dest = str(tmp_path / "filled.docx")
+    report = render_docx(template, dest, dict(REPLACEMENTS, lawyerName="Me Assi-Bodje"))
+    assert report["missing"] == ["lawyerName"]
+
+    with pytest.raises(KeyError, match="lawyerName"):
+        render_docx(template, str(tmp_path / "strict.docx"), dict(REPLACEMENTS, lawyerName="x"), strict=True)
+
+
+def test_prepare_docx_hands_the_template_to_word_when_something_is_missing(template, tmp_path):
+    dest = str(tmp_path / "for_word.docx")
+    assert prepare_docx(template, dest, dict(REPLACEMENTS, lawyerName="x")) is False
+    with open(template, "rb") as a, open(dest, "rb") as b:
+        assert a.read() == b.read()
+
+    assert prepare_docx(template, dest, REPLACEMENTS) is True
+    assert "Jean Tremblay" in text_of(part(dest, "word/document.xml"))
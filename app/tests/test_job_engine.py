@@ -0,0 +1,48 @@
+import threading
+
+from job_engine import JobEngine, SUCCEEDED, CANCELLED
+
+
+def test_lane_jobs_run_one_at_a_time_without_blocking_other_jobs():
+    engine = JobEngine(max_workers=2)
+    release = threading.Event()
+    order = []
+
+    def pclaw_step(name):
+        release.wait(5)
+        order.append(name)
+        return name
+
+    try:
+        first = engine.submit_call("close_matter", pclaw_step, "first", lane="pclaw")
+        second = engine.submit_call("bill_matter", pclaw_step, "second", lane="pclaw")
+        mail = engine.submit_call("emailReply", lambda: "sent")
+
+        # The mail job gets the second worker while the pclaw lane is busy
+        assert engine.result(mail, timeout=5)["result"] == "sent"
+        assert engine.status(second)["status"] == "queued"
+
+        release.set()
+        assert engine.result(second, timeout=5)["status"] == SUCCEEDED
+        assert order == ["first", "second"]
+    finally:
+        release.set()
+        engine.shutdown(wait=True)
+
+
+def test_cancelled_lane_job_never_starts():
+    engine = JobEngine(max_workers=2)
+    release = threading.Event()
+    ran = []
+
+    try:
+        engine.submit_call("close_matter", release.wait, 5, lane="pclaw")
+        queued = engine.submit_call("bill_matter", lambda: ran.append("bill"), lane="pclaw")
+
+        assert engine.cancel(queued)["status"] == CANCELLED
+        release.set()
+        engine.result(queued, timeout=1)
+    finally:
+        release.set()
+        engine.shutdown(wait=True)
+    assert ran == []
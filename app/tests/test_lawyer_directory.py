@@ -0,0 +1,63 @@
+import json
+import os
+from pathlib import Path
+
+import pytest
+
+from lawyer_directory import LawyerDirectory
+
+LAWYERS = [
+    {"id": "MM", "name": "Lawyer 1", "specialties": ["estate", "common"], "responsibleLawyer": "MM"},
+    {"id": "DH", "name": "Lawyer 2", "specialties": ["Divorce", "common"]},
+]
+
+
+def write(path, lawyers, mtime_ns):
+    path.write_text(json.dumps({"lawyers": lawyers}), encoding="utf-8")
+    os.utime(path, ns=(mtime_ns, mtime_ns))
+
+
+@pytest.fixture
+def directory(tmp_path):
+    path = tmp_path / "lawyers.json"
+    write(path, LAWYERS, 1_000_000_000)
+    return LawyerDirectory(str(path))
+
+
+def test_lookup_by_id(directory):
+    assert directory.get("MM")["name"] == "Lawyer 1"
+    assert directory.get("ZZ") is None
+    assert [l["id"] for l in directory.all()] == ["MM", "DH"]
+
+
+def test_lookup_by_specialty_ignores_case(directory):
+    assert [l["id"] for l in directory.by_specialty("common")] == ["MM", "DH"]
+    assert [l["id"] for l in directory.by_specialty("DIVORCE")] == ["DH"]
+    assert directory.by_specialty("maritime") == []
+    assert directory.by_specialty(None) == []
+
+
+def test_resolve_and_responsible_lawyer(directory):
+    assert directory.resolve({"id": "MM", "name": "Stale"})["name"] == "Lawyer 1"
+    assert directory.resolve({"name": "Stale"}, "DH")["name"] == "Lawyer 2"
+    assert directory.resolve({"id": "ZZ", "name": "Guest"}) == {"id": "ZZ", "name": "Guest"}
+    assert directory.resolve(None) == {}
+
+    assert directory.responsible_lawyer("MM") == "MM"
+    assert directory.responsible_lawyer("DH") == "JR"   # no responsibleLawyer field
+    assert directory.responsible_lawyer("ZZ", default="XX") == "XX"
+
+
+def test_file_is_read_once_until_it_changes(directory):
+    for _ in range(5):
+        directory.get("MM")
+        directory.by_specialty("estate")
+    assert directory.loads == 1
+
+    renamed = [dict(LAWYERS[0], name="Lawyer 1 (renamed)"), LAWYERS[1],
+               {"id": "TG", "name": "Lawyer 3", "specialties": ["estate"]}]
+    write(Path(directory.path), renamed, 2_000_000_000)
+
+    assert directory.get("MM")["name"] == "Lawyer 1 (renamed)"
+    assert [l["id"] for l in directory.by_specialty("estate")] == ["MM", "TG"]
+    assert directory.loads == 2
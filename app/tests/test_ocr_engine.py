@@ -0,0 +1,96 @@
+from PIL import Image, ImageDraw, ImageFilter
+
+from fakes import StubBackend
+from ocr_engine import OcrEngine, DEFAULT_CONFIG, image_key
+
+
+def test_unchanged_image_is_read_from_cache():
+    backend = StubBackend("Trust 0.00")
+    engine = OcrEngine(backend, cache_size=8)
+
+    assert engine.read(b"crop") == "Trust 0.00"
+    assert engine.read(b"crop") == "Trust 0.00"
+
+    assert backend.calls == 1
+    cache = engine.summary()["cache"]
+    assert cache["hits"] == 1
+    assert cache["misses"] == 1
+
+
+def test_changed_pixels_or_config_miss_the_cache():
+    backend = StubBackend(["0.00", "8.00", "8.00"])
+    engine = OcrEngine(backend, cache_size=8)
+
+    assert engine.read(b"zero") == "0.00"
+    assert engine.read(b"eight") == "8.00"
+    assert engine.read(b"eight", config="--oem 3 --psm 7") == "8.00"
+    assert backend.calls == 3
+
+
+def test_cache_off():
+    backend = StubBackend("x")
+    engine = OcrEngine(backend, cache_size=0)
+    engine.read(b"crop")
+    engine.read(b"crop")
+    assert backend.calls == 2
+    assert engine.summary()["cache"] is None
+
+
+def test_read_parallel_keeps_job_order():
+    engine = OcrEngine(workers=3, factory=lambda: StubBackend(lambda image: image.decode(), delay=0.01),
+                       cache_size=0)
+    try:
+        results = engine.read_parallel([(f"region{i}".encode(), DEFAULT_CONFIG) for i in range(5)])
+    finally:
+        engine.close()
+    assert [text for text, _ in results] == [f"region{i}" for i in range(5)]
+
+
+def test_usage_since_counts_only_new_reads():
+    engine = OcrEngine(StubBackend("x"), cache_size=8)
+    engine.read(b"first")
+    before = engine.summary()
+    engine.read(b"first")
+    engine.read(b"second")
+    usage = engine.usage_since(before)
+    assert usage["images"] == 1
+    assert usage["cache_hits"] == 1
+
+
+def crop(text, background=(224, 226, 230), ink=(20, 20, 20)):
+    image = Image.new("RGB", (160, 24), background)
+    ImageDraw.Draw(image).text((4, 6), text, fill=ink)
+    return image.filter(ImageFilter.GaussianBlur(0.4))
+
+
+def test_recaptured_colour_crop_keeps_its_key():
+    first = crop("Trust 0.00")
+    shifted = crop("Trust 0.00", background=(226, 228, 232), ink=(22, 22, 22))
+
+    assert first.tobytes() != shifted.tobytes()
+    assert image_key(first, DEFAULT_CONFIG) == image_key(shifted, DEFAULT_CONFIG)
+    assert image_key(first, DEFAULT_CONFIG) != image_key(first, "--oem 3 --psm 7")
+
+
+def test_different_amounts_never_share_a_key():
+    assert image_key(crop("Trust 0.00"), DEFAULT_CONFIG) != image_key(crop("Trust 8.00"), DEFAULT_CONFIG)
+    assert image_key(crop("Trust 0.00"), DEFAULT_CONFIG) != image_key(crop("Trust 0.08"), DEFAULT_CONFIG)
+
+
+def test_flat_crops_are_hashed_exactly():
+    light = Image.new("RGB", (40, 10), (224, 224, 224))
+    lighter = Image.new("RGB", (40, 10), (226, 226, 226))
+    faint = crop("8.00", ink=(210, 210, 210))
+
+    assert image_key(light, DEFAULT_CONFIG) != image_key(lighter, DEFAULT_CONFIG)
+    assert image_key(light, DEFAULT_CONFIG) != image_key(faint, DEFAULT_CONFIG)
+
+
+def test_raw_recaptures_hit_the_cache():
+    backend = StubBackend("Trust 0.00")
+    engine = OcrEngine(backend, cache_size=8)
+    for shift in (0, 1, -1, 2):
+        engine.read(crop("Trust 0.00", background=(224 + shift, 226 + shift, 230 + shift), ink=(20 + shift,) * 3))
+
+    assert backend.calls == 1
+    assert engine.summary()["cache"]["hits"] == 3
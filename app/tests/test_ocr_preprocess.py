@@ -0,0 +1,172 @@
+import os
+import threading
+import time
+
+import numpy as np
+import pytest
+from PIL import Image, ImageDraw
+
+import ocr_preprocess
+from fakes import StubBackend
+from ocr_engine import OcrEngine, DEFAULT_CONFIG, make_backend
+from ocr_preprocess import (PROFILES, adaptive_threshold, trim, upscale, prepare, read_text,
+                            parse_amount, parse_date, load_corpus, OCR_CORPUS_DIR)
+
+
+def field(text="1,234.56", background=(224, 224, 224), ink=(20, 20, 20)):
+    image = Image.new("RGB", (96, 18), background)
+    ImageDraw.Draw(image).text((30, 3), text, fill=ink)
+    return image
+
+
+def test_threshold_marks_dark_text_on_grey():
+    gray = np.full((20, 40), 220.0)
+    gray[8:12, 10:30] = 30.0
+    mask = adaptive_threshold(gray, window=15, offset=10)
+
+    assert mask[8:12, 10:30].all()
+    assert not mask[:6].any() and not mask[14:].any()
+
+
+def test_threshold_inverts_light_text_on_dark():
+    gray = np.full((20, 40), 30.0)
+    gray[8:12, 10:30] = 230.0
+    mask = adaptive_threshold(gray, window=15, offset=10)
+
+    assert mask[8:12, 10:30].all()
+    assert mask.sum() == 4 * 20
+
+
+def test_trim_keeps_only_inked_rows_and_columns():
+    mask = np.zeros((10, 12), dtype=bool)
+    mask[3, 4] = mask[6, 9] = True
+
+    trimmed = trim(mask)
+    assert trimmed.shape == (4, 6)
+    assert trimmed[0, 0] and trimmed[-1, -1]
+    assert trim(np.zeros((5, 5), dtype=bool)).size == 0
+
+
+def test_upscale_repeats_each_pixel():
+    mask = np.array([[True, False]])
+    assert upscale(mask, 3).shape == (3, 6)
+    assert upscale(mask, 3)[:, :3].all() and not upscale(mask, 3)[:, 3:].any()
+    assert upscale(mask, 1) is mask
+
+
+def test_prepare_gives_a_scaled_binary_image_or_none():
+    prepared = prepare(field(), PROFILES["amount"])
+    assert prepared.mode == "L"
+    assert set(np.unique(np.asarray(prepared))) <= {0, 255}
+    assert prepared.size[1] > 18
+
+    assert prepare(field(""), PROFILES["amount"]) is None
+
+
+def test_profiles_parse_their_fields():
+    assert parse_amount("1,234.56") == 1234.56
+    assert parse_amount("(12.00)") == -12.0
+    assert parse_amount("$0.00") == 0.0
+    assert parse_amount("Trust") is None
+    assert parse_date("Date 2025-3-7") == "2025/03/07"
+    assert parse_date("2025/13/01") is None
+
+
+def test_preprocessing_sends_the_profile_config():
+    backend = StubBackend(lambda image: image.mode)
+    engine = OcrEngine(backend, cache_size=0)
+
+    assert read_text(field(), "amount", engine=engine, preprocess=True) == "L"
+    assert backend.configs[-1] == PROFILES["amount"].config
+    assert "tessedit_char_whitelist=0123456789.,-()$" in backend.configs[-1]
+
+    assert read_text(field("2025/03/07"), "date", engine=engine, preprocess=True) == "L"
+    assert "--psm 7" in backend.configs[-1]
+
+
+def test_raw_path_sends_the_colour_crop_and_default_config():
+    backend = StubBackend(lambda image: image.mode)
+    engine = OcrEngine(backend, cache_size=0)
+
+    assert read_text(field(), "amount", engine=engine, preprocess=False) == "RGB"
+    assert backend.configs == [DEFAULT_CONFIG]
+
+
+def test_config_flag_picks_the_path(monkeypatch):
+    backend = StubBackend(lambda image: image.mode)
+    engine = OcrEngine(backend, cache_size=0)
+
+    monkeypatch.setattr(ocr_preprocess, "OCR_PREPROCESS", True)
+    assert read_text(field(), "amount", engine=engine) == "L"
+    monkeypatch.setattr(ocr_preprocess, "OCR_PREPROCESS", False)
+    assert read_text(field(), "amount", engine=engine) == "RGB"
+
+
+def test_blank_crop_is_not_sent_to_tesseract():
+    backend = StubBackend("x")
+    engine = OcrEngine(backend, cache_size=0)
+
+    assert read_text(field(""), "amount", engine=engine, preprocess=True) == ""
+    assert backend.calls == 0
+
+
+def test_crops_are_captured_unlabelled(monkeypatch, tmp_path):
+    monkeypatch.setattr(ocr_preprocess, "OCR_CAPTURE_DIR", str(tmp_path))
+    engine = OcrEngine(StubBackend("0.00"), cache_size=0)
+
+    read_text(field(), "amount", engine=engine)
+    read_text(field(), "amount", engine=engine, preprocess=False)
+
+    entries = load_corpus(str(tmp_path))
+    assert [(e["profile"], e["expected"]) for e in entries] == [("amount", None)]
+    assert os.path.exists(tmp_path / entries[0]["file"])
+
+
+def test_committed_corpus_is_labelled():
+    entries = load_corpus()
+    assert {e["profile"] for e in entries} == {"amount", "date"}
+    for entry in entries:
+        assert PROFILES[entry["profile"]].parse(entry["expected"]) is not None
+        assert os.path.exists(os.path.join(OCR_CORPUS_DIR, entry["file"]))
+
+
+def test_preprocess_default_follows_the_corpus():
+    try:
+        engine = OcrEngine(make_backend("auto"), cache_size=0)
+    except Exception as e:
+        pytest.skip(f"no Tesseract backend: {e}")
+    results = ocr_preprocess.benchmark(engine=engine)
+
+    better = all(paths["preprocessed"]["accuracy"] >= paths["raw"]["accuracy"]
+                 for paths in results.values())
+    assert ocr_preprocess.OCR_PREPROCESS == better
+
+
+def test_read_regions_reads_every_region_on_a_bounded_pool():
+    lock = threading.Lock()
+    active = [0, 0]   # now, most at once
+
+    def read(image):
+        with lock:
+            active[0] += 1
+            active[1] = max(active[1], active[0])
+        time.sleep(0.02)
+        with lock:
+            active[0] -= 1
+        # The crop's width tells the regions apart
+        return f"{image.size[0]}.00"
+
+    engine = OcrEngine(workers=2, factory=lambda: StubBackend(read), cache_size=0)
+    screenshot = Image.new("RGB", (400, 100), (224, 224, 224))
+    regions = {f"field{i}": ((0, 0, i / 20, 1), "amount") for i in range(1, 7)}
+    try:
+        result = ocr_preprocess.read_regions(screenshot, regions, engine=engine, preprocess=False)
+    finally:
+        engine.close()
+
+    assert result["values"] == {f"field{i}": 20.0 * i for i in range(1, 7)}
+    assert result["texts"]["field3"] == "60.00"
+    assert set(result["ms"]) == set(regions) and all(ms > 0 for ms in result["ms"].values())
+    assert result["wall_ms"] > 0
+    assert active[1] <= 2
+    assert engine.stats["backends"] <= 2
@@ -0,0 +1,57 @@
+import pytest
+
+from fakes import fake_outlook_factory
+from outlook_session import OutlookSession
+
+
+def create_draft(outlook, namespace, to):
+    mail = outlook.CreateItem(0)
+    mail.To = to
+    mail.Display()
+    return mail
+
+
+def test_one_connection_is_shared_between_calls():
+    instances = []
+    session = OutlookSession(factory=fake_outlook_factory(instances=instances))
+    try:
+        for index in range(5):
+            session.run(create_draft, f"client{index}@example.com")
+    finally:
+        session.close()
+
+    assert len(instances) == 1
+    assert len(instances[0].created) == 5
+    assert session.stats["connects"] == 1
+
+
+def test_reconnects_once_when_outlook_was_closed():
+    instances = []
+    session = OutlookSession(factory=fake_outlook_factory(instances=instances))
+    try:
+        session.run(create_draft, "first@example.com")
+        instances[0].crash()
+        mail = session.run(create_draft, "second@example.com")
+    finally:
+        session.close()
+
+    assert mail.To == "second@example.com"
+    assert len(instances) == 2
+    assert session.stats["reconnects"] == 1
+
+
+def test_error_with_healthy_outlook_is_not_retried():
+    instances = []
+    session = OutlookSession(factory=fake_outlook_factory(instances=instances))
+
+    def broken(outlook, namespace):
+        raise ValueError("bad template")
+
+    try:
+        with pytest.raises(ValueError):
+            session.run(broken)
+    finally:
+        session.close()
+
+    assert len(instances) == 1
+    assert session.stats["reconnects"] == 0
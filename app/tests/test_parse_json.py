@@ -0,0 +1,73 @@
+import pytest
+
+from parse_json import FormCache, FormRequest, build_form_request, get_language, split_data
+
+
+def request(name="Jean Tremblay", **form):
+    return FormRequest({"form": {"clientName": name, **form}, "case": {}, "lawyer": {}})
+
+
+def test_store_and_get_by_revision():
+    cache = FormCache(size=4)
+    first = cache.store(request("A"))
+    second = cache.store(request("B"))
+
+    assert FormCache.is_revision(first) and first != second
+    assert cache.get(first)["form"]["clientName"] == "A"
+    assert cache.get(second)["form"]["clientName"] == "B"
+    assert cache.get("rev-999") is None
+    assert not FormCache.is_revision('{"form": {}}')
+
+
+def test_only_the_latest_entry_is_deduplicated():
+    cache = FormCache(size=4)
+    first = cache.store(request("A"))
+    assert cache.store(request("A")) == first
+
+    cache.store(request("B"))
+    # A is no longer the latest, so sending it again makes a new revision
+    assert cache.store(request("A")) != first
+
+
+def test_oldest_unused_revision_is_evicted():
+    cache = FormCache(size=2)
+    a, b = cache.store(request("A")), cache.store(request("B"))
+    cache.get(a)                    # A becomes the most recently used
+    c = cache.store(request("C"))
+
+    assert cache.get(b) is None
+    assert cache.get(a) is not None and cache.get(c) is not None
+
+
+def test_build_form_request_prefers_the_directory_record():
+    built = build_form_request({"clientName": "A", "lawyerId": "TG", "clientLanguage": "Français"},
+                               None, {"id": "TG", "name": "Stale copy"})
+
+    assert isinstance(built, FormRequest)
+    assert built["lawyer"]["name"] == "Lawyer 3"
+    assert built["case"] == {}
+    assert split_data(built) == (built["form"], {}, built["lawyer"])
+    assert get_language(built) == "français"
+
+
+def test_build_form_request_keeps_an_unknown_lawyer():
+    built = build_form_request({"clientName": "A"}, {"spouseName": "B"}, {"id": "ZZ", "name": "Guest"})
+    assert built["lawyer"] == {"id": "ZZ", "name": "Guest"}
+    assert built["case"] == {"spouseName": "B"}
+
+
+@pytest.mark.parametrize("form, case, lawyer, message", [
+    ("{}", None, None, "Form must be an object, got str"),
+    ({}, [], None, "Case details must be an object, got list"),
+    ({}, None, "DH", "Lawyer must be an object, got str"),
+])
+def test_build_form_request_rejects_non_objects(form, case, lawyer, message):
+    with pytest.raises(ValueError, match=message):
+        build_form_request(form, case, lawyer)
+
+
+def test_with_form_updates_leaves_the_original_untouched():
+    original = request("A")
+    updated = original.with_form_updates({"pdfPath": "x.pdf"})
+    assert updated["form"] == {"clientName": "A", "pdfPath": "x.pdf"}
+    assert original["form"] == {"clientName": "A"}
@@ -0,0 +1,58 @@
+import pytest
+
+from fakes import FakeWindowProvider
+from pclaw_connection import PclawConnection, PclawNotRunning
+
+
+def test_handle_is_found_once_and_revalidated():
+    provider = FakeWindowProvider()
+    provider.open()
+    connection = PclawConnection(provider)
+
+    first = connection.window()
+    for _ in range(5):
+        assert connection.window() is first
+
+    assert provider.finds == 1
+    assert provider.connects == 1
+    assert connection.stats["hits"] == 5
+
+
+def test_restarted_pclaw_is_found_again():
+    provider = FakeWindowProvider()
+    old = provider.open()
+    connection = PclawConnection(provider)
+    assert connection.handle() == old
+
+    provider.close(old)
+    new = provider.open()
+
+    assert connection.handle() == new
+    assert connection.window().handle == new
+    assert connection.stats["stale"] == 1
+    assert provider.finds == 2
+
+
+def test_handle_reused_by_another_window_is_rejected():
+    provider = FakeWindowProvider()
+    handle = provider.open()
+    connection = PclawConnection(provider)
+    connection.handle()
+
+    provider.windows[handle] = "Notepad"
+    with pytest.raises(PclawNotRunning):
+        connection.handle()
+
+
+def test_invalidate_forces_a_new_lookup():
+    provider = FakeWindowProvider()
+    provider.open()
+    connection = PclawConnection(provider)
+    connection.window()
+
+    connection.invalidate()
+    connection.window()
+
+    assert provider.finds == 2
+    assert provider.connects == 2
+    assert connection.summary()["invalidated"] == 1
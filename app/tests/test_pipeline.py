@@ -0,0 +1,92 @@
+import pytest
+
+from parse_json import FormRequest
+from pipeline import normalize_steps, pipeline_lane, run_pipeline
+
+FORM = {"form": {"clientName": "Jean Tremblay"}, "case": {}, "lawyer": {"id": "JR"}}
+
+
+def recording_runner(results):
+    """ Runner returning canned results per script and recording each call. """
+    calls = []
+
+    def runner(script, request):
+        calls.append((script, request))
+        result = results.get(script, {"status": "success"})
+        if isinstance(result, Exception):
+            raise result
+        return result
+    return runner, calls
+
+
+def test_steps_are_normalized_and_checked():
+    steps = normalize_steps(["emailContract", {"script": "wordContract", "continueOnError": 1}])
+    assert steps[0] == {"script": "emailContract", "continueOnError": False, "requires": [], "resultToForm": {}}
+    assert steps[1]["continueOnError"] is True
+
+    with pytest.raises(ValueError, match="Module not found: nope"):
+        normalize_steps(["nope"])
+    with pytest.raises(ValueError, match="Invalid pipeline step"):
+        normalize_steps([{"continueOnError": True}])
+
+
+def test_pclaw_step_puts_the_pipeline_in_its_lane():
+    assert pipeline_lane(normalize_steps(["emailContract", "new_matter"])) == "pclaw"
+    assert pipeline_lane(normalize_steps(["emailContract", "wordReceipt"])) is None
+
+
+def test_steps_run_in_order_on_one_shared_request():
+    runner, calls = recording_runner({})
+    summary = run_pipeline(normalize_steps(["wordContract", "emailContract", "emailFollowup"]), FORM,
+                           runner=runner)
+
+    assert summary["status"] == "success"
+    assert [step["script"] for step in summary["steps"]] == ["wordContract", "emailContract", "emailFollowup"]
+    assert [script for script, _ in calls] == ["wordContract", "emailContract", "emailFollowup"]
+    requests = {id(request) for _, request in calls}
+    assert len(requests) == 1 and isinstance(calls[0][1], FormRequest)
+
+
+@pytest.mark.parametrize("failure", [{"error": "Word is busy"}, {"status": "error", "error": "Word is busy"},
+                                     RuntimeError("Word is busy")])
+def test_first_failure_stops_the_pipeline(failure):
+    runner, calls = recording_runner({"wordContract": failure})
+    summary = run_pipeline(normalize_steps(["new_matter", "wordContract", "emailContract", "emailFollowup"]),
+                           FORM, runner=runner)
+
+    assert summary["status"] == "failed"
+    assert summary["error"] == "wordContract: Word is busy"
+    assert [step["status"] for step in summary["steps"]] == ["success", "error", "not_run", "not_run"]
+    assert [script for script, _ in calls] == ["new_matter", "wordContract"]
+
+
+def test_continue_on_error_gives_a_partial_run():
+    runner, calls = recording_runner({"wordContract": {"error": "Word is busy"}})
+    steps = normalize_steps([{"script": "wordContract", "continueOnError": True}, "emailContract"])
+
+    summary = run_pipeline(steps, FORM, runner=runner)
+    assert summary["status"] == "partial"
+    assert [step["status"] for step in summary["steps"]] == ["error", "success"]
+
+    summary = run_pipeline(normalize_steps(["wordContract", "emailContract"]), FORM, stop_on_error=False,
+                           runner=runner)
+    assert summary["status"] == "partial"
+    assert len(calls) == 4
+
+
+def test_requires_and_result_to_form_chain_the_steps():
+    runner, calls = recording_runner({"wordContract": {"status": "success", "pdf_path": "C:/out/contract.pdf"},
+                                      "emailContract": {"status": "success"}})
+    steps = normalize_steps([
+        "wordContract",
+        {"script": "emailContract", "requires": ["pdf_path"], "resultToForm": {"pdf_path": "pdfPath"}},
+        {"script": "emailFollowup", "requires": ["pdf_path"]},
+    ])
+    summary = run_pipeline(steps, FORM, runner=runner)
+
+    assert calls[1][1]["form"] == {"clientName": "Jean Tremblay", "pdfPath": "C:/out/contract.pdf"}
+    assert "pdfPath" not in calls[0][1]["form"]
+    # emailContract returned no pdf_path, so the next step is skipped, not failed
+    assert summary["steps"][2] == {"script": "emailFollowup", "status": "skipped", "missing": ["pdf_path"],
+                                   "elapsed_ms": 0.0}
+    assert summary["status"] == "success"
@@ -0,0 +1,45 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from calendar_cache import CalendarCache, CalendarEvent
+from scheduler import is_valid_time_slot
+
+DAY = datetime(2026, 3, 9)
+LAWYER = {"name": "Marie Tremblay", "break_minutes": 15}
+
+
+def cache_with(events):
+    cache = CalendarCache(max_age=None)
+    cache.load_events(events, DAY - timedelta(days=1), DAY + timedelta(days=30))
+    return cache
+
+
+@pytest.mark.parametrize("categories", [
+    ("Marie Tremblay",),
+    ("marie tremblay",),
+    ("MARIE TREMBLAY ", "Court"),
+])
+def test_outlook_fallback_matches_categories_like_the_cache(categories):
+    events = [CalendarEvent("E1", "Client", DAY.replace(hour=10), DAY.replace(hour=11), categories)]
+    start, end = DAY.replace(hour=11, minute=5), DAY.replace(hour=12)
+
+    assert is_valid_time_slot(start, end, events, LAWYER) is False
+    assert cache_with(events).is_free(LAWYER["name"], start, end, LAWYER["break_minutes"]) is False
+
+
+def test_other_lawyers_events_dont_block_either_path():
+    events = [CalendarEvent("E1", "Client", DAY.replace(hour=10), DAY.replace(hour=11), ("Marie-Eve Tremblay",))]
+    start, end = DAY.replace(hour=10), DAY.replace(hour=11)
+
+    assert is_valid_time_slot(start, end, events, LAWYER) is True
+    assert cache_with(events).is_free(LAWYER["name"], start, end, LAWYER["break_minutes"]) is True
+
+
+def test_break_buffer_applies_on_both_paths():
+    events = [CalendarEvent("E1", "Client", DAY.replace(hour=10), DAY.replace(hour=11), ("Marie Tremblay",))]
+
+    for start, free in ((DAY.replace(hour=11, minute=15), True), (DAY.replace(hour=11, minute=14), False)):
+        end = start + timedelta(hours=1)
+        assert is_valid_time_slot(start, end, events, LAWYER) is free
+        assert cache_with(events).is_free(LAWYER["name"], start, end, LAWYER["break_minutes"]) is free
@@ -0,0 +1,86 @@
+import os
+
+import pytest
+
+import template_engine
+from template_engine import Template, load_template, render_template
+
+CONTEXT = {
+    "date": "Tuesday July 22nd, 2025",
+    "time": "2:30 PM",
+    "rates": "125",
+    "totalRates": "143.72",
+    "teamsMeeting": "<a href='https://teams.example.com'>Join</a>",
+    "lawyerName": "Me Lawyer 1",
+    "depositAmount": "1500",
+    "totalAmount": "1824.63",
+}
+
+
+def shipped_templates():
+    for lang in ("en", "fr"):
+        folder = os.path.join(template_engine.TEMPLATES_DIR, lang)
+        for name in sorted(os.listdir(folder)):
+            if name.endswith(".html"):
+                yield lang, name
+
+
+@pytest.mark.parametrize("lang, name", list(shipped_templates()))
+def test_compiled_render_matches_the_replace_chain(lang, name):
+    path = template_engine.template_path(lang, name)
+    with open(path, "r", encoding="utf-8") as f:
+        html = f.read()
+    template = load_template(path)
+    context = {key: value for key, value in CONTEXT.items() if key in template.placeholders}
+    for key, value in context.items():
+        html = html.replace("{{" + key + "}}", value)
+
+    assert template.render(context) == html
+
+
+def test_placeholders_are_filled_in_one_pass():
+    template = Template("<p>{{ name }} / {{name}} / {{other}}</p>")
+    assert template.placeholders == {"name", "other"}
+    assert template.render({"name": "A", "other": None}) == "<p>A / A / </p>"
+    assert template.render({"name": "A"}) == "<p>A / A / {{other}}</p>"
+    # A value that looks like a placeholder is not expanded again
+    assert template.render({"name": "{{other}}", "other": "B"}) == "<p>{{other}} / {{other}} / B</p>"
+
+
+def test_values_are_inserted_verbatim():
+    # The templates take HTML fragments (Teams links), so nothing is escaped,
+    # and regex specials in a value are plain text
+    template = Template("<td>{{link}}</td><td>{{amount}}</td>")
+    rendered = template.render({"link": "<a href='x?a=1&b=2'>Join</a>", "amount": r"\1 $& 1500$"})
+    assert rendered == r"<td><a href='x?a=1&b=2'>Join</a></td><td>\1 $& 1500$</td>"
+
+
+def test_report_and_strict_render(tmp_path, monkeypatch):
+    monkeypatch.setattr(template_engine, "TEMPLATES_DIR", str(tmp_path))
+    os.makedirs(tmp_path / "en")
+    (tmp_path / "en" / "Mail.html").write_text("Hello {{clientName}} on {{date}}", encoding="utf-8")
+
+    template = load_template(template_engine.template_path("en", "Mail.html"))
+    assert template.report({"clientName": "A", "extra": 1}) == {"missing": ["date"], "unknown": ["extra"]}
+    assert render_template("en", "Mail.html", {"clientName": "A"}) == "Hello A on {{date}}"
+    with pytest.raises(KeyError, match="missing \\['date'\\]"):
+        render_template("en", "Mail.html", {"clientName": "A"}, strict=True)
+    with pytest.raises(FileNotFoundError):
+        render_template("en", "Nope.html")
+
+
+def test_cache_reloads_only_when_the_file_changes(tmp_path):
+    path = tmp_path / "Mail.html"
+    path.write_text("Hello {{clientName}}", encoding="utf-8")
+    os.utime(path, ns=(1_000_000_000, 1_000_000_000))
+
+    first = load_template(str(path))
+    assert load_template(str(path)) is first
+
+    # Same size, new mtime: the stamp changes and the file is read again
+    path.write_text("Salut {{clientName}}", encoding="utf-8")
+    os.utime(path, ns=(2_000_000_000, 2_000_000_000))
+    second = load_template(str(path))
+    assert second is not first
+    assert second.render({"clientName": "A"}) == "Salut A"
+    assert load_template(str(path)) is second
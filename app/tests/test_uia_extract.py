@@ -0,0 +1,121 @@
+from fakes import FakeControl, FakeDialog
+from uia_extract import (UiaNode, ExtractionStats, value_beside, dates_in, extract_values,
+                         record_ocr, walk_tree)
+
+BALANCES = {"Unbd D": r"^Unbd\s*D", "A/R": r"^A\S?R\b", "Gen Rtnr": r"^Gen\b", "Trust": r"^Trust\b"}
+
+
+def row(label, amount, top, left=80):
+    return [UiaNode(label, "Text", "", (10, top, 70, top + 16)),
+            UiaNode("", "Edit", amount, (left, top, left + 80, top + 16))]
+
+
+def register_tree():
+    # Period filter above the grid, then the grid's Date column and its cells
+    return [
+        UiaNode("From", "Text", "", (10, 10, 50, 26)),
+        UiaNode("", "Edit", "2024/01/01", (60, 10, 140, 26)),
+        UiaNode("Date", "Header", "", (20, 50, 100, 66)),
+        UiaNode("Description", "Header", "", (100, 50, 300, 66)),
+        UiaNode("2025/03/31", "DataItem", "", (22, 70, 98, 86)),
+        UiaNode("Fees 2025/04/30", "DataItem", "", (100, 70, 300, 86)),
+        UiaNode("2025/07/31", "DataItem", "", (22, 90, 98, 106)),
+        UiaNode("", "Edit", "2026/12/31", (400, 90, 480, 106)),
+    ]
+
+
+def test_value_beside_reads_the_control_right_of_its_label():
+    nodes = (row("Unbd D", "0.00", 300) + row("A/R", "12.50", 320)
+             + row("Gen Rtnr", "(143.72)", 340) + [UiaNode("Trust: 0.00", "Text", "", (10, 360, 90, 376))])
+
+    assert value_beside(nodes, BALANCES["Unbd D"]) == 0.0
+    assert value_beside(nodes, BALANCES["A/R"]) == 12.5
+    assert value_beside(nodes, BALANCES["Gen Rtnr"]) == -143.72
+    assert value_beside(nodes, BALANCES["Trust"]) == 0.0
+
+
+def test_value_beside_takes_the_nearest_number_on_the_same_row_only():
+    nodes = (row("Trust", "8.00", 300, left=200) + [UiaNode("", "Edit", "0.00", (80, 300, 160, 316))]
+             + [UiaNode("A/R", "Text", "", (10, 340, 70, 356)), UiaNode("", "Edit", "5.00", (80, 362, 160, 378))])
+
+    assert value_beside(nodes, BALANCES["Trust"]) == 0.0
+    # A number on the row below is not the label's value
+    assert value_beside(nodes, BALANCES["A/R"]) is None
+
+
+def test_dates_in_reads_the_date_column_only():
+    assert dates_in(register_tree()) == ["2025/03/31", "2025/07/31"]
+
+
+def test_dates_in_needs_the_header():
+    nodes = [node for node in register_tree() if node.name != "Date"]
+    assert dates_in(nodes) == []
+
+
+def test_values_from_the_tree_need_no_ocr():
+    stats = ExtractionStats()
+    calls = []
+    values, sources = extract_values("close_matter", row("Unbd D", "0.00", 300) + row("A/R", "0.00", 320)
+                                     + row("Gen Rtnr", "0.00", 340) + row("Trust", "0.00", 360),
+                                     BALANCES, calls.append, stats=stats)
+
+    assert values == {"Unbd D": 0.0, "A/R": 0.0, "Gen Rtnr": 0.0, "Trust": 0.0}
+    assert set(sources.values()) == {"uia"}
+    assert calls == []
+    assert stats.summary()["ocr_runs"] == 0
+
+
+def test_missing_values_fall_back_to_ocr_once():
+    stats = ExtractionStats()
+    calls = []
+
+    def ocr_fallback(missing):
+        calls.append(list(missing))
+        return {"retainer": 0.0, "dates": ["2025/07/31"], "trust": 99.0}
+
+    nodes = row("Trust:", "0.00", 500) + [UiaNode("Gen Rtnr", "Text", "", (10, 520, 70, 536))]
+    values, sources = extract_values("register", nodes, {"trust": r"^Trust\b", "retainer": r"^Gen\b"},
+                                     ocr_fallback, want_dates=True, stats=stats)
+
+    assert calls == [["retainer", "dates"]]
+    # Only the missing fields are taken from OCR
+    assert values == {"trust": 0.0, "retainer": 0.0, "dates": ["2025/07/31"]}
+    assert sources == {"trust": "uia", "retainer": "ocr", "dates": "ocr"}
+    summary = stats.summary()
+    assert summary["uia_values"] == 1 and summary["ocr_values"] == 2 and summary["ocr_runs"] == 1
+
+
+def test_failed_fallback_leaves_values_missing():
+    stats = ExtractionStats()
+
+    def ocr_fallback(missing):
+        raise RuntimeError("no screenshot")
+
+    values, sources = extract_values("close_matter", [], {"Trust": BALANCES["Trust"]}, ocr_fallback, stats=stats)
+    assert values == {"Trust": None}
+    assert sources == {"Trust": "missing"}
+    assert stats.summary()["fields"]["close_matter.Trust"] == {"uia": 0, "ocr": 0, "missing": 1}
+
+
+def test_ocr_only_reads_are_recorded_as_ocr():
+    stats = ExtractionStats()
+    record_ocr("register", {"trust": 0.0, "retainer": None, "dates": []}, 120.0, stats=stats)
+
+    summary = stats.summary()
+    assert summary["uia_first"] is False
+    assert summary["uia_values"] == 0 and summary["ocr_values"] == 1
+    assert summary["fields"]["register.retainer"]["missing"] == 1
+    assert summary["ocr_ms"] == 120.0
+
+
+def test_walk_falls_back_to_wrappers():
+    dialog = FakeDialog([
+        FakeControl("Trust", rect=(10, 300, 70, 316)),
+        FakeControl("", "Edit", " 0.00 ", rect=(80, 300, 160, 316)),
+    ])
+    nodes = walk_tree(dialog)
+
+    assert [(n.name, n.control_type, n.value) for n in nodes] == [("Trust", "Text", ""), ("", "Edit", "0.00")]
+    values, sources = extract_values("close_matter", dialog, {"Trust": BALANCES["Trust"]}, lambda m: {},
+                                     stats=ExtractionStats())
+    assert values == {"Trust": 0.0} and sources == {"Trust": "uia"}
@@ -0,0 +1,72 @@
+import pytest
+
+from fakes import FakeUI, SimulatedClock
+from wait_engine import (Waiter, WaitHistory, WaitTimeout, new_window, window_closed,
+                         close_matter_loaded, preview_ready)
+
+
+def make_waiter(history=None):
+    clock = SimulatedClock()
+    ui = FakeUI(clock)
+    return clock, ui, Waiter(ui=ui, clock=clock, sleep=clock.sleep, history=history or WaitHistory())
+
+
+def test_returns_as_soon_as_the_window_opens():
+    clock, ui, waiter = make_waiter()
+    before = ui.top_windows()
+    ui.add_window("Bill Settings", after=2.0)
+
+    assert waiter.until("bill_matter.settings", new_window(before), 15)
+    assert 2.0 <= clock() < 2.6
+    assert waiter.records[-1]["status"] == "ok"
+
+
+def test_required_step_raises_on_timeout():
+    clock, ui, waiter = make_waiter()
+    before = ui.top_windows()
+
+    with pytest.raises(WaitTimeout):
+        waiter.until("bill_matter.settings", new_window(before), 5)
+    assert clock() == pytest.approx(5.0)
+    assert waiter.records[-1]["status"] == "timeout"
+
+
+def test_optional_step_returns_none_on_timeout():
+    clock, ui, waiter = make_waiter()
+    popup = ui.add_window("Pop-Up Help")
+
+    assert waiter.until("find_matter.select", window_closed(popup), 5, required=False) is None
+
+
+def test_timeouts_grow_after_a_timed_out_step():
+    history = WaitHistory()
+    clock, ui, waiter = make_waiter(history)
+    before = ui.top_windows()
+    ui.add_window("Preview", after=9.0)
+    with pytest.raises(WaitTimeout):
+        waiter.until("bill_matter.preview", new_window(before), 6)
+
+    # The next run allows more than the old limit and catches the slow window
+    clock, ui, waiter = make_waiter(history)
+    assert history.timeout_for("bill_matter.preview", 6) > 6
+    before = ui.top_windows()
+    ui.add_window("Preview", after=9.0)
+    assert waiter.until("bill_matter.preview", new_window(before), 6)
+
+
+def test_close_matter_waits_for_ok_not_just_a_quiet_region():
+    clock, ui, waiter = make_waiter()
+    # Balances stop redrawing at 2 s, but OK is only enabled at 5 s
+    ui.add_window("Close Matter", settles_after=2.0, controls={"OK": 5.0})
+
+    assert waiter.until("close_matter.load", close_matter_loaded("Close Matter", (0, 0.7, 1, 1)), 36)
+    assert clock() >= 5.0
+
+
+def test_preview_waits_until_drawing_stops():
+    clock, ui, waiter = make_waiter()
+    before = ui.top_windows()
+    ui.add_window("Preview", after=1.0, settles_after=3.0)
+
+    assert waiter.until("bill_matter.preview", preview_ready(before), 6)
+    assert clock() >= 3.0
@@ -0,0 +1,61 @@
+import os
+
+import pytest
+
+from fakes import FakeWord
+from word_pool import WordPool
+
+
+def make_source(tmp_path):
+    source = tmp_path / "Receipt.docx"
+    source.write_bytes(b"fake")
+    return str(source)
+
+
+def test_instance_is_reused_then_recycled(tmp_path):
+    source = make_source(tmp_path)
+    words = []
+
+    def factory():
+        words.append(FakeWord())
+        return words[-1]
+
+    pool = WordPool(size=1, max_documents=3, factory=factory)
+    try:
+        for index in range(3):
+            with pool.document(source) as document:
+                document.export_pdf(str(tmp_path / f"{index}.pdf"))
+    finally:
+        pool.shutdown()
+
+    assert words[0].quit_called
+    assert pool.stats["documents"] == 3
+    assert pool.stats["recycled"] == 1
+    assert all(os.path.exists(tmp_path / f"{index}.pdf") for index in range(3))
+
+
+def test_failed_instance_is_replaced(tmp_path):
+    source = make_source(tmp_path)
+    words = []
+
+    def factory():
+        words.append(FakeWord())
+        return words[-1]
+
+    pool = WordPool(size=1, max_documents=20, factory=factory)
+    try:
+        pool.warm()
+        with pool.lease() as instance:
+            instance.call(lambda word: setattr(word, "fail_on_open", 1))   # wedged Word
+        with pytest.raises(RuntimeError):
+            with pool.document(source):
+                pass
+        with pool.document(source) as document:
+            document.export_pdf(str(tmp_path / "after.pdf"))
+    finally:
+        pool.shutdown()
+
+    assert pool.stats["recycled"] == 1
+    assert len(words) == 2
+    assert words[0].quit_called
+    assert os.path.exists(tmp_path / "after.pdf")
@@ -23,10 +23,98 @@ export const ACTIONS_BY_ID = {
   [ELEMENT_IDS.pclawCloseMatterSubmitBtn]: closeMatter,
   [ELEMENT_IDS.pclawBillMatterSubmitBtn]: billMatter,
   [ELEMENT_IDS.timeEntriesSubmitBtn]: processTimeEntries,
+  [ELEMENT_IDS.batchCloseSubmitBtn]: () => batchCloseMatters(isBatchResume()),
+  [ELEMENT_IDS.batchBillSubmitBtn]: () => batchBillMatters(isBatchResume()),
+  [ELEMENT_IDS.ocrStatsBtn]: showOcrStats,
 };
 
-/** Submits the current formState to the Python backend. */
-async function getForm() {
+/** True when the batch page asks to resume a stopped batch from its checkpoint. */
+function isBatchResume() {
+  const checkbox = document.getElementById(ELEMENT_IDS.batchResume);
+  return Boolean(checkbox && checkbox.checked);
+}
+
+/** Delay between job status polls, in milliseconds. */
+const JOB_POLL_INTERVAL_MS = 250;
+
+/**
+ * Last form sent to prepare_form and the revision the backend gave it.
+ * Until the form changes, actions only send the revision ID.
+ */
+const preparedForm = { snapshot: null, revision: null };
+
+/** True when the backend no longer has the form revision we sent. */
+function isExpiredRevision(response, jsonData) {
+  return Boolean(response.error) && jsonData === preparedForm.revision
+    && String(response.error).includes("form revision");
+}
+
+/**
+ * Waits for a backend job to finish by polling its status.
+ * @param {object} submitted - Response from run / run_pipeline.
+ * @param {string} label - Name used in log messages.
+ * @returns {Promise<object>} The job result, or an object with an error.
+ */
+async function waitForJob(submitted, label) {
+  if (submitted.error) {
+    return submitted;
+  }
+
+  while (true) {
+    const job = await window.pywebview.api.job_status(submitted.job_id);
+    if (job.error && !job.status) {
+      return job;
+    }
+    if (job.status === "succeeded") {
+      return job.result || {};
+    }
+    if (job.status === "failed" || job.status === "cancelled") {
+      console.error(`[AdminHub] Job ${job.job_id} (${label}) ${job.status}:`, job.error);
+      return { ...(job.result || {}), error: job.error || job.status, status: job.status };
+    }
+    await new Promise(resolve => setTimeout(resolve, JOB_POLL_INTERVAL_MS));
+  }
+}
+
+/**
+ * Runs a backend module as a job and waits for it to finish.
+ * The bridge returns a job ID right away, so the UI stays responsive
+ * while the module runs.
+ * @param {string} scriptName - Registered module name.
+ * @param {string} jsonData - Form revision ID or JSON payload for the module.
+ * @returns {Promise<object>} The module result, or an object with an error.
+ */
+export async function runJob(scriptName, jsonData) {
+  let submitted = await window.pywebview.api.run(scriptName, jsonData);
+  if (isExpiredRevision(submitted, jsonData)) {
+    // Evicted from the backend cache (or the hub restarted): send the form again
+    submitted = await window.pywebview.api.run(scriptName, await getForm(true));
+  }
+  return waitForJob(submitted, scriptName);
+}
+
+/**
+ * Runs several backend modules on one parsed form, in a single bridge call.
+ * @param {Array<string|object>} steps - Module names or step objects
+ *   ({ script, continueOnError, requires, resultToForm }).
+ * @param {string} jsonData - Form revision ID or JSON payload shared by every step.
+ * @param {boolean} [stopOnError=true] - Stop at the first failing step.
+ * @returns {Promise<object>} Overall status with per-step results and timings.
+ */
+export async function runPipeline(steps, jsonData, stopOnError = true) {
+  let submitted = await window.pywebview.api.run_pipeline(steps, jsonData, stopOnError);
+  if (isExpiredRevision(submitted, jsonData)) {
+    submitted = await window.pywebview.api.run_pipeline(steps, await getForm(true), stopOnError);
+  }
+  return waitForJob(submitted, "pipeline");
+}
+
+/**
+ * Returns the revision ID of the current form, sending the form to the
+ * Python backend only when it changed since the last call.
+ * @param {boolean} [force=false] - Send the form even if it didn't change.
+ */
+async function getForm(force = false) {
   const lawyer = getLawyerById(formState.lawyerId);
   const details = collectCaseDetails();
 
@@ -42,30 +130,39 @@ async function getForm() {
     throw new Error("Invalid client phone number.");
   }
 
-  let response = await window.pywebview.api.format_form(formState, details, lawyer);
-  console.log("[AdminHub] Form data prepared for submission:", response.json);
-  return response.json;
+  // The backend validates and caches the form, and hands back a revision ID
+  // that every following run / run_pipeline call uses instead of JSON.
+  // Comparing a local snapshot is much cheaper than a bridge round trip.
+  const snapshot = JSON.stringify([formState, details, lawyer]);
+  if (!force && preparedForm.revision && snapshot === preparedForm.snapshot) {
+    return preparedForm.revision;
+  }
+
+  const response = await window.pywebview.api.prepare_form(formState, details, lawyer);
+  if (response.error) {
+    throw new Error(response.error);
+  }
+  preparedForm.snapshot = snapshot;
+  preparedForm.revision = response.revision;
+  console.log("[AdminHub] Form data prepared for submission:", response.revision);
+  return response.revision;
 }
 
 /** Schedules an appointment based on the form state. */
 export async function scheduleAppointment() {
   try {
     const json_data = await getForm();
-    await window.pywebview.api.run("scheduler", json_data);
-    console.log("[AdminHub] Appointment scheduled successfully.");
 
-    // Chain actions without re-submitting the form
+    // Chain actions in one pipeline without re-submitting the form
     const alsoEmail = document.getElementById("also-email").checked;
     const alsoPclaw = document.getElementById("also-pclaw").checked;
 
-    if (alsoEmail) {
-      await window.pywebview.api.run("emailConfirmation", json_data);
-      console.log("[AdminHub] Confirmation email prepared and submitted.");
-    }
-    if (alsoPclaw) {
-      await window.pywebview.api.run("new_matter", json_data);
-      console.log("[AdminHub] PCLaw matter created successfully.");
-    }
+    const steps = ["scheduler"];
+    if (alsoEmail) steps.push("emailConfirmation");
+    if (alsoPclaw) steps.push("new_matter");
+
+    const result = await runPipeline(steps, json_data);
+    console.log("[AdminHub] Booking pipeline finished:", result);
   } catch (error) {
     console.error("[AdminHub] Error scheduling appointment:", error);
     alert("Failed to schedule appointment. Please try again.");
@@ -77,7 +174,7 @@ export async function scheduleAppointment() {
 export async function sendConfirmation() {
   try {
     const json_data = await getForm();
-    await window.pywebview.api.run("emailConfirmation", json_data);
+    await runJob("emailConfirmation", json_data);
     console.log("[AdminHub] Confirmation email prepared and submitted.");
   } catch (error) {
     console.error("[AdminHub] Error preparing confirmation email:", error);
@@ -90,7 +187,7 @@ export async function sendConfirmation() {
 export async function sendReply() {
   try {
     const json_data = await getForm();
-    await window.pywebview.api.run("emailReply", json_data);
+    await runJob("emailReply", json_data);
     console.log("[AdminHub] Reply email prepared and submitted.");
   } catch (error) {
     console.error("[AdminHub] Error preparing reply email:", error);
@@ -103,7 +200,7 @@ export async function sendReply() {
 export async function sendReview() {
   try {
     const json_data = await getForm();
-    await window.pywebview.api.run("emailReview", json_data);
+    await runJob("emailReview", json_data);
     console.log("[AdminHub] Review request email prepared and submitted.");
   } catch (error) {
     console.error("[AdminHub] Error preparing review request email:", error);
@@ -116,7 +213,7 @@ export async function sendReview() {
 export async function sendFollowup() {
   try {
     const json_data = await getForm();
-    await window.pywebview.api.run("emailFollowup", json_data);
+    await runJob("emailFollowup", json_data);
     console.log("[AdminHub] Follow-up email prepared and submitted.");
   } catch (error) {
     console.error("[AdminHub] Error preparing follow-up email:", error);
@@ -129,7 +226,7 @@ export async function sendFollowup() {
 export async function sendContract() {
   try {
     const json_data = await getForm();
-    await window.pywebview.api.run("emailContract", json_data);
+    await runJob("emailContract", json_data);
     console.log("[AdminHub] Contract email prepared and submitted.");
   } catch (error) {
     console.error("[AdminHub] Error preparing contract email:", error);
@@ -143,30 +240,30 @@ export async function createContract() {
   try {
     const json_data = await getForm();
     
-    // Create the Word contract
-    const result = await window.pywebview.api.run("wordContract", json_data);
-    
+    // Create the Word contract, then the email with the exported PDF attached
+    // when the user asked for it and didn't cancel the export
+    const steps = ["wordContract"];
+    const alsoContract = document.getElementById("also-contract").checked;
+    if (alsoContract) {
+      steps.push({
+        script: "emailContract",
+        requires: ["pdf_path"],
+        resultToForm: { pdf_path: "pdfPath" },
+      });
+    }
+
+    const result = await runPipeline(steps, json_data);
+    const contractStep = result.steps ? result.steps[0] : null;
+    if (contractStep && contractStep.result && contractStep.result.error) {
+      throw new Error(contractStep.result.error);
+    }
     if (result.error) {
       throw new Error(result.error);
     }
-    
+
     console.log("[AdminHub] Word contract created successfully.");
     console.log("[AdminHub] Result:", result);
     
-    // Check if user wants to also create email
-    const alsoContract = document.getElementById("also-contract").checked;
-    if (alsoContract && result.pdf_path) {
-      
-      // Add PDF path to form data for email
-      const formData = JSON.parse(json_data);
-      formData.form.pdfPath = result.pdf_path;
-      const emailJsonBlob = JSON.stringify(formData, null, 2);
-      
-      // Create contract email with PDF attachment
-      await window.pywebview.api.run("emailContract", emailJsonBlob);
-      console.log("[AdminHub] Contract email created with PDF attachment.");
-    }
-    
   } catch (error) {
     console.error("[AdminHub] Error creating word contract:", error);
     alert("Failed to create contract. Please try again.");
@@ -178,7 +275,7 @@ export async function createContract() {
 export async function createReceipt() {
   try {
     const json_data = await getForm();
-    await window.pywebview.api.run("wordReceipt", json_data);
+    await runJob("wordReceipt", json_data);
     console.log("[AdminHub] Word receipt created successfully.");
   } catch (error) {
     console.error("[AdminHub] Error creating word receipt:", error);
@@ -187,11 +284,37 @@ export async function createReceipt() {
   }
 }
 
+/**
+ * Create receipts or contracts in bulk from a CSV/JSON manifest.
+ * Asks for the manifest and output folder, then exports every PDF without dialogs.
+ */
+export async function batchDocuments(documentType = "receipt") {
+  try {
+    const manifestPath = await window.pywebview.api.select_batch_manifest();
+    if (!manifestPath) return null;
+    const outputDir = await window.pywebview.api.select_output_folder();
+    if (!outputDir) return null;
+
+    const json_data = JSON.stringify({ manifestPath, outputDir, documentType });
+    const summary = await runJob("batch_documents", json_data);
+    if (summary.error && !summary.report) {
+      throw new Error(summary.error);
+    }
+    console.log("[AdminHub] Batch documents done:", summary);
+    alert(`${summary.message}\nReport: ${summary.report}`);
+    return summary;
+  } catch (error) {
+    console.error("[AdminHub] Error creating batch documents:", error);
+    alert("Failed to create batch documents. Please try again.");
+    throw error;
+  }
+}
+
 /* Create PCLaw matter based on the form state */
 export async function newMatter() {
   try {
     const json_data = await getForm();
-    await window.pywebview.api.run("new_matter", json_data);
+    await runJob("new_matter", json_data);
     console.log("[AdminHub] PCLaw matter created successfully.");
   } catch (error) {
     console.error("[AdminHub] Error writing PCLaw matter", error);
@@ -204,7 +327,7 @@ export async function newMatter() {
 export async function closeMatter() {
   try {
     const json_data = await getForm();
-    await window.pywebview.api.run("close_matter", json_data);
+    await runJob("close_matter", json_data);
     console.log("[AdminHub] PCLaw matter closed successfully.");
   } catch (error) {
     console.error("[AdminHub] Error closing PCLaw matter", error);
@@ -213,11 +336,35 @@ export async function closeMatter() {
   }
 }
 
+/**
+ * Close a list of PCLaw matters back to back, skipping those with a balance.
+ * Asks for the matter list (CSV/JSON/text), or for a checkpoint when resuming.
+ */
+export async function batchCloseMatters(resume = false) {
+  try {
+    const path = await window.pywebview.api.select_matter_list(resume);
+    if (!path) return null;
+
+    const json_data = JSON.stringify(resume ? { resumePath: path } : { matterListPath: path });
+    const summary = await runJob("batch_close_matter", json_data);
+    if (summary.error) {
+      throw new Error(summary.error);
+    }
+    console.log("[AdminHub] Batch close done:", summary);
+    alert(`${summary.message}\nLog: ${summary.log}`);
+    return summary;
+  } catch (error) {
+    console.error("[AdminHub] Error closing PCLaw matters", error);
+    alert("Failed to close PCLaw matters. Please try again.");
+    throw error;
+  }
+}
+
 /** Bill the specified PCLaw matter */
 export async function billMatter() {
   try {
     const json_data = await getForm();
-    await window.pywebview.api.run("bill_matter", json_data);
+    await runJob("bill_matter", json_data);
     console.log("[AdminHub] PCLaw matter billed successfully.");
   } catch (error) {
     console.error("[AdminHub] Error billing PCLaw matter", error);
@@ -226,6 +373,70 @@ export async function billMatter() {
   }
 }
 
+/**
+ * Month-end billing run: bill a list of PCLaw matters back to back.
+ * Skipped matters and timings go to a ledger next to the matter list.
+ * Asks for the matter list (CSV/JSON/text), or for a checkpoint when resuming.
+ */
+export async function batchBillMatters(resume = false) {
+  try {
+    const path = await window.pywebview.api.select_matter_list(resume);
+    if (!path) return null;
+
+    const json_data = JSON.stringify(resume ? { resumePath: path } : { matterListPath: path });
+    const summary = await runJob("batch_bill_matter", json_data);
+    if (summary.error) {
+      throw new Error(summary.error);
+    }
+    console.log("[AdminHub] Billing run done:", summary);
+    alert(`${summary.message}\nLedger: ${summary.ledger}`);
+    return summary;
+  } catch (error) {
+    console.error("[AdminHub] Error in PCLaw billing run", error);
+    alert("Failed to run PCLaw billing. Please try again.");
+    throw error;
+  }
+}
+
+/**
+ * OCR counters for this session, to check the OCR cache during billing runs.
+ * @returns {Promise<object>} { engine: { calls, images, ms, cache: { hits, misses, hit_rate, saved_ms, ... } }, extraction }
+ */
+export async function getOcrStats() {
+  const stats = await window.pywebview.api.ocr_stats();
+  console.log("[AdminHub] OCR stats:", stats);
+  return stats;
+}
+
+/**
+ * PCLaw connection counters for this session, to check the window cache during batches.
+ * @returns {Promise<object>} { hits, misses, stale, connects, invalidated, hit_rate, connected }
+ */
+export async function getPclawStats() {
+  const stats = await window.pywebview.api.pclaw_stats();
+  console.log("[AdminHub] PCLaw connection stats:", stats);
+  return stats;
+}
+
+/** Show the session's OCR counters on the batch page. */
+export async function showOcrStats() {
+  try {
+    const stats = await getOcrStats();
+    if (stats.error) {
+      throw new Error(stats.error);
+    }
+    const output = document.getElementById(ELEMENT_IDS.ocrStatsOutput);
+    if (output) {
+      output.textContent = JSON.stringify(stats, null, 2);
+    }
+    return stats;
+  } catch (error) {
+    console.error("[AdminHub] Error reading OCR stats", error);
+    alert("Failed to read OCR stats.");
+    throw error;
+  }
+}
+
 export async function processTimeEntries() {
   try {
     const lawyerId = document.getElementById(ELEMENT_IDS.timeEntriesLawyer).value;
@@ -246,7 +457,7 @@ export async function processTimeEntries() {
 
     console.log("[AdminHub] Processing time entries with data:", json_data);
     
-    await window.pywebview.api.run("time_entries", json_data);
+    await runJob("time_entries", json_data);
     console.log("[AdminHub] Time entries processed successfully.");
     
   } catch (error) {
@@ -37,6 +37,7 @@ export const ELEMENT_IDS = {
     pclawMatterMenuBtn: "new-matter-menu-btn",
     pclawCloseMatterMenuBtn: "close-matter-menu-btn",
     pclawBillMatterMenuBtn: "bill-matter-menu-btn",
+    pclawBatchMenuBtn: "batch-matters-menu-btn",
 
     // --- Common Buttons ---
     backBtn: "back-btn",
@@ -176,6 +177,14 @@ export const ELEMENT_IDS = {
     billMatterId: "bill-matter-id",
     pclawBillMatterSubmitBtn: "bill-matter-btn",
 
+    // --- PCLaw Batch Page ---
+    pclawBatchPage: "pclaw-batch-page",
+    batchResume: "batch-resume",
+    batchCloseSubmitBtn: "batch-close-btn",
+    batchBillSubmitBtn: "batch-bill-btn",
+    ocrStatsBtn: "ocr-stats-btn",
+    ocrStatsOutput: "ocr-stats-output",
+
     // --- PCLaw Time Entry Page ---
     timeEntriesMenuBtn: "time-entries-menu-btn",
     timeEntriesPage: "pclaw-time-entries-page",
@@ -201,5 +210,6 @@ export const MENU_ROUTES = {
   [ELEMENT_IDS.pclawMatterMenuBtn]: ELEMENT_IDS.pclawMatterPage,
   [ELEMENT_IDS.pclawCloseMatterMenuBtn]: ELEMENT_IDS.pclawCloseMatterPage,
   [ELEMENT_IDS.pclawBillMatterMenuBtn]: ELEMENT_IDS.pclawBillMatterPage,
+  [ELEMENT_IDS.pclawBatchMenuBtn]: ELEMENT_IDS.pclawBatchPage,
   [ELEMENT_IDS.timeEntriesMenuBtn]: ELEMENT_IDS.timeEntriesPage
 };
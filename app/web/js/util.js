@@ -6,16 +6,10 @@ import {
 export const locationRules = {
   // Centralized list of locations
   locations: ["office", "phone", "teams"],
-  
-  // List of unavailability for each lawyer
-  lawyerUnavailability: {
-    DH: {
-      office: ["Monday"],
-    },
-    TG: {
-      office: ["Friday"],
-    }
-  },
+
+  // Per-lawyer unavailability ({ location: [weekday names] }) now lives in
+  // lawyers.json under "unavailability", so the backend availability search
+  // applies the same rules.
 };
 
 /** Handles the case type details based on the selected case type. */